@@ -0,0 +1,296 @@
+from array import array
+from typing import Iterable, Iterator, Self, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, DTypeLike, NDArray
+
+from lab1 import HEIGHT, WIDTH, Point2d, Vector2d
+
+IntArray = NDArray[np.int64]
+Buffer = bytes | bytearray | memoryview | array
+
+
+def as_coords(points: Sequence[Point2d] | ArrayLike) -> IntArray:
+    if isinstance(points, Sequence) and points and isinstance(points[0], Point2d):
+        return np.array([(p.x, p.y) for p in points], dtype=np.int64)
+    coords = np.asarray(points, dtype=np.int64)
+    if coords.size == 0:
+        return coords.reshape(0, 2)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError("Points must have shape (n, 2)")
+    return coords
+
+
+class Vector2dArray:
+    __slots__ = ("_x", "_y")
+
+    def __init__(self, x: ArrayLike, y: ArrayLike) -> None:
+        self._x: IntArray = np.ascontiguousarray(x, dtype=np.int64)
+        self._y: IntArray = np.ascontiguousarray(y, dtype=np.int64)
+        if self._x.ndim != 1 or self._x.shape != self._y.shape:
+            raise ValueError("x and y must be one-dimensional and of equal length")
+
+    @property
+    def x(self) -> IntArray:
+        return self._x
+
+    @property
+    def y(self) -> IntArray:
+        return self._y
+
+    @classmethod
+    def zeros(cls, size: int) -> Self:
+        return cls(np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64))
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector2d]) -> Self:
+        coords = np.array([tuple(v) for v in vectors], dtype=np.int64)
+        return cls._from_coords(coords)
+
+    @classmethod
+    def from_points(
+        cls,
+        start: Sequence[Point2d] | ArrayLike,
+        end: Sequence[Point2d] | ArrayLike,
+    ) -> Self:
+        first = as_coords(start)
+        second = as_coords(end)
+        return cls(second[:, 0] - first[:, 0], second[:, 1] - first[:, 1])
+
+    @classmethod
+    def _from_coords(cls, coords: IntArray) -> Self:
+        if coords.size == 0:
+            return cls.zeros(0)
+        return cls(coords[:, 0], coords[:, 1])
+
+    def dot(self, other: Self | Vector2d) -> IntArray:
+        return self.dot_product(self, other)
+
+    def cross(self, other: Self | Vector2d) -> IntArray:
+        return self.cross_product(self, other)
+
+    def mixed(self, second: Self | Vector2d, third: Self | Vector2d) -> IntArray:
+        return self.triple_product(self, second, third)
+
+    def norm(self) -> NDArray[np.float64]:
+        return abs(self)
+
+    @classmethod
+    def dot_product(cls, first: Self | Vector2d, second: Self | Vector2d) -> IntArray:
+        x1, y1 = cls._components(first)
+        x2, y2 = cls._components(second)
+        return x1 * x2 + y1 * y2
+
+    @classmethod
+    def cross_product(cls, first: Self | Vector2d, second: Self | Vector2d) -> IntArray:
+        x1, y1 = cls._components(first)
+        x2, y2 = cls._components(second)
+        return x1 * y2 - y1 * x2
+
+    @classmethod
+    def triple_product(
+        cls, a: Self | Vector2d, b: Self | Vector2d, c: Self | Vector2d
+    ) -> IntArray:
+        ax, ay = cls._components(a)
+        bx, by = cls._components(b)
+        cx, cy = cls._components(c)
+        return (ax - bx) * (cy - ay) - (ay - by) * (cx - ax)
+
+    @staticmethod
+    def _components(value: "Vector2dArray | Vector2d") -> tuple[IntArray, IntArray]:
+        if isinstance(value, Vector2dArray):
+            return value._x, value._y
+        if isinstance(value, Vector2d):
+            x, y = value
+            return np.int64(x), np.int64(y)
+        raise TypeError(f"Unsupported operand type: {type(value).__name__}")
+
+    def to_vectors(self) -> list[Vector2d]:
+        return [Vector2d(x, y) for x, y in zip(self._x.tolist(), self._y.tolist())]
+
+    def __getitem__(self, index: int | slice | ArrayLike) -> Vector2d | Self:
+        if isinstance(index, (int, np.integer)):
+            return Vector2d(int(self._x[index]), int(self._y[index]))
+        return self.__class__(self._x[index], self._y[index])
+
+    def __setitem__(
+        self, index: int | slice | ArrayLike, value: Self | Vector2d
+    ) -> None:
+        x, y = self._components(value)
+        self._x[index] = x
+        self._y[index] = y
+
+    def __iter__(self) -> Iterator[Vector2d]:
+        for x, y in zip(self._x.tolist(), self._y.tolist()):
+            yield Vector2d(x, y)
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, self.__class__):
+            return False
+        return np.array_equal(self._x, other._x) and np.array_equal(self._y, other._y)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __abs__(self) -> NDArray[np.float64]:
+        return np.sqrt((self._x * self._x + self._y * self._y).astype(np.float64))
+
+    def __add__(self, other: Self | Vector2d) -> Self:
+        x, y = self._components(other)
+        return self.__class__(self._x + x, self._y + y)
+
+    def __sub__(self, other: Self | Vector2d) -> Self:
+        x, y = self._components(other)
+        return self.__class__(self._x - x, self._y - y)
+
+    def __mul__(self, scalar: int | float | ArrayLike) -> Self:
+        with np.errstate(invalid="ignore"):
+            x, y = self._x * scalar, self._y * scalar
+        return self.__class__(self._truncate(x), self._truncate(y))
+
+    def __truediv__(self, scalar: int | float | ArrayLike) -> Self:
+        if np.any(np.asarray(scalar) == 0):
+            raise ZeroDivisionError("division by zero")
+        return self.__class__(
+            self._truncate(self._x / scalar), self._truncate(self._y / scalar)
+        )
+
+    @staticmethod
+    def _truncate(values: NDArray) -> IntArray:
+        if values.dtype.kind in "iu":
+            return values
+        invalid = ~np.isfinite(values)
+        if invalid.any():
+            # the same errors int() raises for the scalar Vector2d
+            if np.isnan(values[invalid][0]):
+                raise ValueError("cannot convert float NaN to integer")
+            raise OverflowError("cannot convert float infinity to integer")
+        return np.trunc(values).astype(np.int64)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}(size={len(self)})"
+
+    __repr__ = __str__
+
+
+class PointCloudError(ValueError):
+    def __init__(self, indices: NDArray[np.intp]) -> None:
+        self.indices = indices
+        shown = ", ".join(map(str, indices[:20].tolist()))
+        more = f" and {len(indices) - 20} more" if len(indices) > 20 else ""
+        super().__init__(
+            f"Coordinates out of canvas bounds ({WIDTH}x{HEIGHT}) "
+            f"at indices: {shown}{more}"
+        )
+
+
+class PointCloud2d:
+    __slots__ = ("_coords",)
+
+    def __init__(self, data: Buffer | ArrayLike, dtype: DTypeLike = np.int32) -> None:
+        coords = self._as_coords(data, dtype)
+        self.validate(coords)
+        self._coords = coords
+
+    @classmethod
+    def from_points(cls, points: Iterable[Point2d]) -> Self:
+        return cls(np.array([(p.x, p.y) for p in points], dtype=np.int32))
+
+    @staticmethod
+    def _as_coords(data: Buffer | ArrayLike, dtype: DTypeLike) -> NDArray:
+        if isinstance(data, (memoryview, array)):
+            view = memoryview(data)
+            if view.itemsize == 1:
+                coords = np.frombuffer(view, dtype=dtype)
+            else:
+                coords = np.asarray(view)
+        elif isinstance(data, (bytes, bytearray)):
+            coords = np.frombuffer(data, dtype=dtype)
+        elif isinstance(data, np.ndarray):
+            coords = data
+        else:
+            coords = np.asarray(data, dtype=dtype)
+        if coords.dtype.kind not in "iu":
+            raise TypeError(f"Coordinates must be integers, got {coords.dtype}")
+        if coords.ndim > 2 or (coords.ndim == 2 and coords.shape[1] != 2):
+            raise ValueError("Points must have shape (n, 2)")
+        if coords.size % 2:
+            raise ValueError("Coordinates must come in (x, y) pairs")
+        return coords.reshape(-1, 2)
+
+    @staticmethod
+    def invalid_indices(coords: ArrayLike) -> NDArray[np.intp]:
+        coords = np.asarray(coords).reshape(-1, 2)
+        x = coords[:, 0]
+        y = coords[:, 1]
+        outside = (x < 0) | (x > WIDTH) | (y < 0) | (y > HEIGHT)
+        return np.flatnonzero(outside)
+
+    @classmethod
+    def validate(cls, coords: ArrayLike) -> None:
+        indices = cls.invalid_indices(coords)
+        if len(indices):
+            raise PointCloudError(indices)
+
+    @property
+    def x(self) -> NDArray:
+        return self._coords[:, 0]
+
+    @property
+    def y(self) -> NDArray:
+        return self._coords[:, 1]
+
+    @property
+    def coords(self) -> NDArray:
+        return self._coords
+
+    def to_points(self, point_type: type[Point2d] = Point2d) -> list[Point2d]:
+        return point_type.from_trusted(self._coords.tolist())
+
+    def __array__(self, dtype: DTypeLike = None, copy: bool | None = None) -> NDArray:
+        if dtype is None:
+            return self._coords.copy() if copy else self._coords
+        if copy is False and np.dtype(dtype) != self._coords.dtype:
+            raise ValueError(f"Unable to avoid a copy when converting to {dtype}")
+        return self._coords.astype(dtype, copy=bool(copy))
+
+    def __getitem__(self, index: int | slice) -> Point2d | Self:
+        if isinstance(index, (int, np.integer)):
+            x, y = self._coords[index].tolist()
+            return Point2d.trusted(x, y)
+        cloud = object.__new__(self.__class__)
+        cloud._coords = self._coords[index]
+        return cloud
+
+    def __iter__(self) -> Iterator[Point2d]:
+        trusted = Point2d.trusted
+        for x, y in self._coords.tolist():
+            yield trusted(x, y)
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, self.__class__):
+            return False
+        return np.array_equal(self._coords, other._coords)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}(size={len(self)})"
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    starts = [Point2d(0, 0), Point2d(10, 10), Point2d(100, 200)]
+    ends = [Point2d(3, 4), Point2d(20, 5), Point2d(50, 50)]
+    vectors = Vector2dArray.from_points(starts, ends)
+    print(vectors, vectors.to_vectors(), abs(vectors))
+    print((vectors * 0.5).to_vectors(), vectors.dot(Vector2d(1, 1)))
+
+    cloud = PointCloud2d(array("i", [0, 0, 10, 10, WIDTH, HEIGHT]))
+    print(cloud, list(cloud), Vector2dArray.from_points(cloud[:-1], cloud[1:]))
@@ -0,0 +1,216 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from functools import reduce
+from operator import add
+from typing import Callable
+
+import numpy as np
+
+from geometry import convex_hull, points_in_polygon, polygon_area
+from index import GridIndex
+from lab1 import HEIGHT, WIDTH, Point2d, Vector2d
+from raster import Framebuffer
+from storage import PackedFile, write_points
+
+QUERIES = 200
+
+
+def measure(func: Callable[[], object], repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def random_coords(size: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        (
+            rng.integers(0, WIDTH + 1, size, dtype=np.int32),
+            rng.integers(0, HEIGHT + 1, size, dtype=np.int32),
+        )
+    )
+
+
+def brute_rect(coords: np.ndarray, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+    x, y = coords[:, 0], coords[:, 1]
+    return np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+
+
+def brute_radius(coords: np.ndarray, cx: int, cy: int, radius: float) -> np.ndarray:
+    dx = coords[:, 0].astype(np.int64) - cx
+    dy = coords[:, 1].astype(np.int64) - cy
+    return np.flatnonzero(dx * dx + dy * dy <= radius * radius)
+
+
+def brute_nearest(coords: np.ndarray, cx: int, cy: int, k: int) -> np.ndarray:
+    dx = coords[:, 0].astype(np.int64) - cx
+    dy = coords[:, 1].astype(np.int64) - cy
+    distances = dx * dx + dy * dy
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return nearest[np.argsort(distances[nearest], kind="stable")]
+
+
+def bench_index(size: int) -> None:
+    coords = random_coords(size)
+    centers = random_coords(QUERIES, seed=1).tolist()
+    repeat = max(1, 10**6 // size)
+
+    build = measure(lambda: GridIndex.build(coords), repeat=1)
+    index = GridIndex.build(coords)
+    points = [Point2d(x, y) for x, y in centers]
+
+    cases = {
+        "rect 64x64": (
+            lambda: [index.query_rect(x, y, x + 64, y + 64) for x, y in centers],
+            lambda: [brute_rect(coords, x, y, x + 64, y + 64) for x, y in centers],
+        ),
+        "radius 32": (
+            lambda: [index.query_radius(p, 32) for p in points],
+            lambda: [brute_radius(coords, x, y, 32) for x, y in centers],
+        ),
+        "nearest k=10": (
+            lambda: [index.nearest(p, 10) for p in points],
+            lambda: [brute_nearest(coords, x, y, 10) for x, y in centers],
+        ),
+    }
+    print(f"n={size:>10,}  build {build * 1e3:9.2f} ms")
+    for name, (indexed, brute) in cases.items():
+        grid = measure(indexed, repeat) / QUERIES
+        scan = measure(brute, repeat) / QUERIES
+        print(
+            f"  {name:<14} grid {grid * 1e6:9.1f} us  "
+            f"scan {scan * 1e6:11.1f} us  x{scan / grid:8.1f}"
+        )
+
+
+def bench_geometry(size: int) -> None:
+    coords = random_coords(size)
+    polygon = convex_hull(random_coords(64, seed=2))
+    repeat = max(1, 10**5 // size)
+    cases = {
+        "convex hull": lambda vectorized: convex_hull(coords, vectorized),
+        "polygon area": lambda vectorized: polygon_area(coords, vectorized),
+        "in polygon": lambda vectorized: points_in_polygon(coords, polygon, vectorized),
+    }
+    print(f"n={size:>10,}")
+    for name, kernel in cases.items():
+        fast = measure(lambda: kernel(True), repeat)
+        slow = measure(lambda: kernel(False), repeat)
+        print(
+            f"  {name:<14} numpy {fast * 1e3:9.2f} ms  "
+            f"python {slow * 1e3:9.2f} ms  x{slow / fast:8.1f}"
+        )
+
+
+def bench_reducers(size: int) -> None:
+    vectors = [Vector2d(x, y) for x, y in random_coords(size).tolist()]
+    weights = [0.5] * size
+    repeat = max(1, 10**6 // size)
+
+    def inplace() -> Vector2d:
+        total = Vector2d(0, 0)
+        for vector in vectors:
+            total += vector
+        return total
+
+    cases = {
+        "sum": (lambda: reduce(add, vectors), lambda: Vector2d.sum(vectors)),
+        "sum (+=)": (lambda: reduce(add, vectors), inplace),
+        "mean": (
+            lambda: reduce(add, vectors) / len(vectors),
+            lambda: Vector2d.mean(iter(vectors)),
+        ),
+        "weighted sum": (
+            lambda: reduce(add, (v * w for v, w in zip(vectors, weights))),
+            lambda: Vector2d.weighted_sum(vectors, weights),
+        ),
+    }
+    print(f"n={size:>10,}")
+    for name, (chain, streaming) in cases.items():
+        before = measure(chain, repeat)
+        after = measure(streaming, repeat)
+        print(
+            f"  {name:<14} chain {before * 1e3:9.2f} ms  "
+            f"stream {after * 1e3:9.2f} ms  x{before / after:8.1f}"
+        )
+
+
+def bench_storage(size: int) -> None:
+    coords = random_coords(size)
+    with tempfile.TemporaryDirectory() as directory:
+        packed_path = os.path.join(directory, "points.p2d")
+        json_path = os.path.join(directory, "points.json")
+
+        def load() -> int:
+            with PackedFile(packed_path) as packed:
+                return len(packed) + packed[size // 2].x
+
+        def load_json() -> list[Point2d]:
+            with open(json_path, encoding="utf-8") as f:
+                return [Point2d(x, y) for x, y in json.load(f)]
+
+        write = measure(lambda: write_points(packed_path, coords))
+        opened = measure(load, repeat=20)
+        packed = PackedFile(packed_path)
+        cloud = measure(packed.to_cloud)
+        verify = measure(packed.verify)
+        del packed
+        print(
+            f"n={size:>10,}  write {write * 1e3:9.2f} ms  open {opened * 1e3:7.3f} ms  "
+            f"to_cloud {cloud * 1e3:8.2f} ms  verify {verify * 1e3:8.2f} ms"
+        )
+        if size <= 10**6:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(coords.tolist(), f)
+            print(f"  json load {measure(load_json) * 1e3:9.2f} ms")
+
+
+def bench_raster(size: int) -> None:
+    frame = Framebuffer()
+    starts, ends = random_coords(size, seed=1), random_coords(size, seed=2)
+    points = [
+        (Point2d(x0, y0), Point2d(x1, y1))
+        for (x0, y0), (x1, y1) in zip(starts[:1000].tolist(), ends[:1000].tolist())
+    ]
+    radii = np.random.default_rng(3).integers(1, 50, size)
+    triangles = np.stack((starts, ends, random_coords(size, seed=4)), axis=1)[:1000]
+
+    def rate(draw: Callable[[], int]) -> str:
+        start = time.perf_counter()
+        pixels = draw()
+        elapsed = time.perf_counter() - start
+        return f"{pixels / elapsed / 1e6:8.1f} Mpx/s"
+
+    cases = {
+        "line (python)": lambda: sum(frame.draw_line(a, b, 1) for a, b in points),
+        "lines": lambda: frame.draw_lines(starts, ends, 1),
+        "circles": lambda: frame.draw_circles(starts, radii, 2),
+        "filled circles": lambda: frame.draw_circles(starts, radii, 3, fill=True),
+        "filled polygons": lambda: frame.fill_polygons(list(triangles), 4),
+    }
+    print(f"n={size:>10,}")
+    for name, draw in cases.items():
+        print(f"  {name:<16} {rate(draw)}")
+
+
+BENCHMARKS: dict[str, tuple[Callable[[int], None], list[int]]] = {
+    "index": (bench_index, [10**4, 10**5, 10**6, 10**7]),
+    "geometry": (bench_geometry, [10**2, 10**4, 10**5]),
+    "reducers": (bench_reducers, [10**3, 10**5, 10**6]),
+    "storage": (bench_storage, [10**5, 10**6, 10**7]),
+    "raster": (bench_raster, [10**3, 10**4]),
+}
+
+
+if __name__ == "__main__":
+    names = [arg for arg in sys.argv[1:] if arg in BENCHMARKS] or list(BENCHMARKS)
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    for name in names:
+        bench, default_sizes = BENCHMARKS[name]
+        print(f"# {name}")
+        for size in sizes or default_sizes:
+            bench(size)
@@ -0,0 +1,231 @@
+from typing import Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from arrays import Vector2dArray, as_coords
+from lab1 import Point2d, Vector2d
+
+VECTORIZE_THRESHOLD: int = 64
+
+PointsLike = Sequence[Point2d] | ArrayLike
+BoolArray = NDArray[np.bool_]
+
+
+def _use_numpy(size: int, vectorized: bool | None) -> bool:
+    if vectorized is None:
+        return size >= VECTORIZE_THRESHOLD
+    return vectorized
+
+
+def _as_vectors(points: PointsLike) -> list[Vector2d]:
+    if isinstance(points, Sequence) and all(isinstance(p, Point2d) for p in points):
+        return [Vector2d(p.x, p.y) for p in points]
+    return [Vector2d(x, y) for x, y in as_coords(points).tolist()]
+
+
+def _as_array(points: PointsLike) -> Vector2dArray:
+    coords = as_coords(points)
+    return Vector2dArray(coords[:, 0], coords[:, 1])
+
+
+def _orientation(a: Vector2d, b: Vector2d, c: Vector2d) -> int:
+    return Vector2d.triple_product(b, a, c)
+
+
+def _on_segment(a: Vector2d, b: Vector2d, p: Vector2d) -> bool:
+    within_x = min(a[0], b[0]) <= p[0] <= max(a[0], b[0])
+    return within_x and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+
+def convex_hull(points: PointsLike, vectorized: bool | None = None) -> list[Point2d]:
+    if _use_numpy(len(points), vectorized):
+        hull = _convex_hull_np(as_coords(points))
+    else:
+        hull = _convex_hull_py(_as_vectors(points))
+    return [Point2d(x, y) for x, y in hull]
+
+
+def _convex_hull_py(vectors: list[Vector2d]) -> list[Vector2d]:
+    unique = sorted({(v[0], v[1]) for v in vectors})
+    if len(unique) < 3:
+        return [Vector2d(x, y) for x, y in unique]
+    ordered = [Vector2d(x, y) for x, y in unique]
+
+    def chain(candidates: Sequence[Vector2d]) -> list[Vector2d]:
+        result: list[Vector2d] = []
+        for p in candidates:
+            while len(result) >= 2 and _orientation(result[-2], result[-1], p) <= 0:
+                result.pop()
+            result.append(p)
+        return result
+
+    lower = chain(ordered)
+    upper = chain(ordered[::-1])
+    return lower[:-1] + upper[:-1]
+
+
+def _convex_hull_np(coords: NDArray[np.int64]) -> list[Vector2d]:
+    if len(coords) < 3:
+        return _convex_hull_py([Vector2d(x, y) for x, y in coords.tolist()])
+    x, y = coords[:, 0], coords[:, 1]
+    extremes = [
+        np.argmin(x),
+        np.argmin(x + y),
+        np.argmin(y),
+        np.argmax(x - y),
+        np.argmax(x),
+        np.argmax(x + y),
+        np.argmax(y),
+        np.argmax(y - x),
+    ]
+    corners: list[Vector2d] = []
+    for i in extremes:
+        corner = Vector2d(*coords[i].tolist())
+        if not corners or corner != corners[-1]:
+            corners.append(corner)
+    if len(corners) > 1 and corners[0] == corners[-1]:
+        corners.pop()
+    if len(corners) >= 3:
+        vectors = Vector2dArray(x, y)
+        inside = np.ones(len(coords), dtype=bool)
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            inside &= Vector2dArray.triple_product(b, a, vectors) > 0
+        coords = coords[~inside]
+    return _convex_hull_py([Vector2d(x, y) for x, y in coords.tolist()])
+
+
+def polygon_area(polygon: PointsLike, vectorized: bool | None = None) -> float:
+    if _use_numpy(len(polygon), vectorized):
+        vertices = _as_array(polygon)
+        following = Vector2dArray(np.roll(vertices.x, -1), np.roll(vertices.y, -1))
+        doubled = int(Vector2dArray.cross_product(vertices, following).sum())
+    else:
+        vertices = _as_vectors(polygon)
+        doubled = sum(
+            Vector2d.cross_product(a, b)
+            for a, b in zip(vertices, vertices[1:] + vertices[:1])
+        )
+    return abs(doubled) / 2
+
+
+def points_in_polygon(
+    points: PointsLike, polygon: PointsLike, vectorized: bool | None = None
+) -> BoolArray:
+    if _use_numpy(len(points), vectorized):
+        return _points_in_polygon_np(_as_array(points), _as_vectors(polygon))
+    vertices = _as_vectors(polygon)
+    return np.array(
+        [_point_in_polygon_py(p, vertices) for p in _as_vectors(points)], dtype=bool
+    )
+
+
+def _point_in_polygon_py(p: Vector2d, vertices: list[Vector2d]) -> bool:
+    inside = False
+    for a, b in zip(vertices, vertices[1:] + vertices[:1]):
+        turn = _orientation(a, b, p)
+        if turn == 0 and _on_segment(a, b, p):
+            return True
+        if (a[1] > p[1]) != (b[1] > p[1]) and (turn > 0) == (b[1] > a[1]):
+            inside = not inside
+    return inside
+
+
+def _points_in_polygon_np(points: Vector2dArray, vertices: list[Vector2d]) -> BoolArray:
+    x, y = points.x, points.y
+    inside = np.zeros(len(points), dtype=bool)
+    boundary = np.zeros(len(points), dtype=bool)
+    for a, b in zip(vertices, vertices[1:] + vertices[:1]):
+        turn = Vector2dArray.triple_product(b, a, points)
+        boundary |= (
+            (turn == 0)
+            & (x >= min(a[0], b[0]))
+            & (x <= max(a[0], b[0]))
+            & (y >= min(a[1], b[1]))
+            & (y <= max(a[1], b[1]))
+        )
+        crosses = (a[1] > y) != (b[1] > y)
+        inside ^= crosses & ((turn > 0) == (b[1] > a[1]))
+    return inside | boundary
+
+
+def segments_intersect(
+    first_starts: PointsLike,
+    first_ends: PointsLike,
+    second_starts: PointsLike,
+    second_ends: PointsLike,
+    vectorized: bool | None = None,
+) -> BoolArray:
+    if _use_numpy(len(first_starts), vectorized):
+        return _segments_intersect_np(
+            _as_array(first_starts),
+            _as_array(first_ends),
+            _as_array(second_starts),
+            _as_array(second_ends),
+        )
+    return np.array(
+        [
+            _segment_intersects_py(p1, p2, q1, q2)
+            for p1, p2, q1, q2 in zip(
+                _as_vectors(first_starts),
+                _as_vectors(first_ends),
+                _as_vectors(second_starts),
+                _as_vectors(second_ends),
+            )
+        ],
+        dtype=bool,
+    )
+
+
+def _segment_intersects_py(
+    p1: Vector2d, p2: Vector2d, q1: Vector2d, q2: Vector2d
+) -> bool:
+    d1 = _orientation(q1, q2, p1)
+    d2 = _orientation(q1, q2, p2)
+    d3 = _orientation(p1, p2, q1)
+    d4 = _orientation(p1, p2, q2)
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        return True
+    return (
+        (d1 == 0 and _on_segment(q1, q2, p1))
+        or (d2 == 0 and _on_segment(q1, q2, p2))
+        or (d3 == 0 and _on_segment(p1, p2, q1))
+        or (d4 == 0 and _on_segment(p1, p2, q2))
+    )
+
+
+def _segments_intersect_np(
+    p1: Vector2dArray, p2: Vector2dArray, q1: Vector2dArray, q2: Vector2dArray
+) -> BoolArray:
+    d1 = np.sign(Vector2dArray.triple_product(q2, q1, p1))
+    d2 = np.sign(Vector2dArray.triple_product(q2, q1, p2))
+    d3 = np.sign(Vector2dArray.triple_product(p2, p1, q1))
+    d4 = np.sign(Vector2dArray.triple_product(p2, p1, q2))
+
+    def on_segment(a: Vector2dArray, b: Vector2dArray, p: Vector2dArray) -> BoolArray:
+        return (
+            (np.minimum(a.x, b.x) <= p.x)
+            & (p.x <= np.maximum(a.x, b.x))
+            & (np.minimum(a.y, b.y) <= p.y)
+            & (p.y <= np.maximum(a.y, b.y))
+        )
+
+    proper = (d1 * d2 < 0) & (d3 * d4 < 0)
+    touching = (
+        ((d1 == 0) & on_segment(q1, q2, p1))
+        | ((d2 == 0) & on_segment(q1, q2, p2))
+        | ((d3 == 0) & on_segment(p1, p2, q1))
+        | ((d4 == 0) & on_segment(p1, p2, q2))
+    )
+    return proper | touching
+
+
+if __name__ == "__main__":
+    square = [Point2d(0, 0), Point2d(10, 0), Point2d(10, 10), Point2d(0, 10)]
+    print(convex_hull(square + [Point2d(5, 5)]), polygon_area(square))
+    print(points_in_polygon([Point2d(5, 5), Point2d(10, 5), Point2d(11, 5)], square))
+    print(
+        segments_intersect(
+            [Point2d(0, 0)], [Point2d(10, 10)], [Point2d(0, 10)], [Point2d(10, 0)]
+        )
+    )
@@ -0,0 +1,190 @@
+import math
+from typing import Iterable, Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from arrays import PointCloud2d
+from lab1 import HEIGHT, WIDTH, Point2d
+
+IdArray = NDArray[np.intp]
+
+
+class GridIndex:
+    REBUILD_RATIO: float = 0.25
+    MIN_PENDING: int = 1024
+
+    def __init__(self, cell_size: int = 32) -> None:
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = cell_size
+        self._cols = WIDTH // cell_size + 1
+        self._rows = HEIGHT // cell_size + 1
+        self._x = np.empty(0, dtype=np.int32)
+        self._y = np.empty(0, dtype=np.int32)
+        self._alive = np.empty(0, dtype=bool)
+        self._size = 0
+        self._count = 0
+        self._order: IdArray = np.empty(0, dtype=np.intp)
+        self._starts: IdArray = np.zeros(self._cols * self._rows + 1, dtype=np.intp)
+        self._pending: dict[int, list[int]] = {}
+        self._pending_count = 0
+
+    @classmethod
+    def build(
+        cls, points: PointCloud2d | Iterable[Point2d] | ArrayLike, cell_size: int = 32
+    ) -> Self:
+        index = cls(cell_size)
+        cloud = cls._as_cloud(points)
+        index._append(cloud.x, cloud.y)
+        index.rebuild()
+        return index
+
+    @staticmethod
+    def _as_cloud(points: PointCloud2d | Iterable[Point2d] | ArrayLike) -> PointCloud2d:
+        if isinstance(points, PointCloud2d):
+            return points
+        if isinstance(points, np.ndarray):
+            return PointCloud2d(points)
+        points = list(points)
+        if points and isinstance(points[0], Point2d):
+            return PointCloud2d.from_points(points)
+        return PointCloud2d(np.asarray(points, dtype=np.int32))
+
+    def _append(self, xs: ArrayLike, ys: ArrayLike) -> IdArray:
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        start, end = self._size, self._size + len(xs)
+        if end > len(self._x):
+            capacity = max(end, 2 * len(self._x), 16)
+            self._x = np.resize(self._x, capacity)
+            self._y = np.resize(self._y, capacity)
+            self._alive = np.resize(self._alive, capacity)
+        self._x[start:end] = xs
+        self._y[start:end] = ys
+        self._alive[start:end] = True
+        self._size = end
+        self._count += end - start
+        return np.arange(start, end, dtype=np.intp)
+
+    def rebuild(self) -> None:
+        ids = np.flatnonzero(self._alive[: self._size])
+        cells = self._cells(self._x[ids], self._y[ids])
+        perm = np.argsort(cells, kind="stable")
+        self._order = ids[perm]
+        counts = np.bincount(cells, minlength=self._cols * self._rows)
+        self._starts = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+        self._pending.clear()
+        self._pending_count = 0
+
+    def _cells(self, xs: NDArray, ys: NDArray) -> IdArray:
+        cs = self.cell_size
+        return (ys // cs).astype(np.intp) * self._cols + (xs // cs).astype(np.intp)
+
+    def insert(self, point: Point2d) -> int:
+        point_id = int(self._append([point.x], [point.y])[0])
+        cell = (point.y // self.cell_size) * self._cols + point.x // self.cell_size
+        self._pending.setdefault(cell, []).append(point_id)
+        self._pending_count += 1
+        if self._pending_count > max(
+            self.MIN_PENDING, len(self._order) * self.REBUILD_RATIO
+        ):
+            self.rebuild()
+        return point_id
+
+    def remove(self, point_id: int) -> None:
+        if point_id not in self:
+            raise KeyError(f"Point {point_id} is not in the index")
+        self._alive[point_id] = False
+        self._count -= 1
+
+    def point(self, point_id: int) -> Point2d:
+        if point_id not in self:
+            raise KeyError(f"Point {point_id} is not in the index")
+        return Point2d.trusted(int(self._x[point_id]), int(self._y[point_id]))
+
+    def points(self, ids: ArrayLike) -> PointCloud2d:
+        ids = np.asarray(ids, dtype=np.intp)
+        return PointCloud2d(np.column_stack((self._x[ids], self._y[ids])))
+
+    def _candidates(self, x0: int, y0: int, x1: int, y1: int) -> IdArray:
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, WIDTH), min(y1, HEIGHT)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.intp)
+        cs = self.cell_size
+        cx0, cy0, cx1, cy1 = x0 // cs, y0 // cs, x1 // cs, y1 // cs
+        parts = []
+        for row in range(cy0, cy1 + 1):
+            first = row * self._cols
+            parts.append(
+                self._order[self._starts[first + cx0] : self._starts[first + cx1 + 1]]
+            )
+        for cell, ids in self._pending.items():
+            row, col = divmod(cell, self._cols)
+            if cy0 <= row <= cy1 and cx0 <= col <= cx1:
+                parts.append(np.array(ids, dtype=np.intp))
+        ids = np.concatenate(parts)
+        return ids[self._alive[ids]]
+
+    def query_rect(self, x0: int, y0: int, x1: int, y1: int) -> IdArray:
+        ids = self._candidates(x0, y0, x1, y1)
+        xs, ys = self._x[ids], self._y[ids]
+        return ids[(xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)]
+
+    def query_radius(self, center: Point2d, radius: float) -> IdArray:
+        if radius < 0:
+            return np.empty(0, dtype=np.intp)
+        reach = int(math.floor(radius))
+        cx, cy = center.x, center.y
+        ids = self._candidates(cx - reach, cy - reach, cx + reach, cy + reach)
+        return ids[self._distances(ids, cx, cy) <= radius * radius]
+
+    def nearest(self, center: Point2d, k: int = 1) -> IdArray:
+        k = min(k, self._count)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        cx, cy = center.x, center.y
+        half = self.cell_size
+        while True:
+            ids = self._candidates(cx - half, cy - half, cx + half, cy + half)
+            if len(ids) >= k:
+                distances = self._distances(ids, cx, cy)
+                kth = int(np.partition(distances, k - 1)[k - 1])
+                if kth > half * half:
+                    half = math.isqrt(kth) + 1
+                    ids = self._candidates(cx - half, cy - half, cx + half, cy + half)
+                    distances = self._distances(ids, cx, cy)
+                return ids[np.lexsort((ids, distances))[:k]]
+            half *= 2
+
+    def _distances(self, ids: IdArray, cx: int, cy: int) -> NDArray[np.int64]:
+        dx = self._x[ids].astype(np.int64) - cx
+        dy = self._y[ids].astype(np.int64) - cy
+        return dx * dx + dy * dy
+
+    def __contains__(self, point_id: object) -> bool:
+        return (
+            isinstance(point_id, (int, np.integer))
+            and 0 <= point_id < self._size
+            and bool(self._alive[point_id])
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __str__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(size={self._count}, cell_size={self.cell_size})"
+        )
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    index = GridIndex.build([Point2d(10, 10), Point2d(500, 500), Point2d(900, 100)])
+    new_id = index.insert(Point2d(12, 14))
+    print(index, index.points(index.query_rect(0, 0, 100, 100)).to_points())
+    print(index.point(int(index.nearest(Point2d(0, 0))[0])))
+    index.remove(new_id)
+    print(index.points(index.query_radius(Point2d(505, 495), 10)).to_points())
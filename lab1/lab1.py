@@ -1,4 +1,5 @@
-from typing import Iterator, Self
+from collections import OrderedDict
+from typing import Iterable, Iterator, Self
 
 # constants
 WIDTH: int = 1920
@@ -12,6 +13,18 @@ class Point2d:
         self.x = x
         self.y = y
 
+    @classmethod
+    def trusted(cls, x: int, y: int) -> Self:
+        point = object.__new__(cls)
+        point._x = x
+        point._y = y
+        return point
+
+    @classmethod
+    def from_trusted(cls, coords: Iterable[tuple[int, int]]) -> list[Self]:
+        trusted = cls.trusted
+        return [trusted(x, y) for x, y in coords]
+
     @property
     def x(self) -> int:
         return self._x
@@ -39,12 +52,70 @@ class Point2d:
             return False
         return self._x == other._x and self._y == other._y
 
+    def __hash__(self) -> int:
+        return hash((self._x, self._y))
+
     def __str__(self) -> str:
         return f"{self.__class__.__name__}(x={self._x}, y={self._y})"
 
     __repr__ = __str__
 
 
+class FrozenPoint2d(Point2d):
+    __slots__ = ()
+
+    cache_size: int = 1 << 16
+    _cache: OrderedDict[tuple[int, int], "FrozenPoint2d"] = OrderedDict()
+
+    def __new__(cls, x: int, y: int) -> Self:
+        cls.check_coordinate(x, WIDTH)
+        cls.check_coordinate(y, HEIGHT)
+        return cls.trusted(x, y)
+
+    def __init__(self, x: int, y: int) -> None:
+        pass
+
+    @classmethod
+    def trusted(cls, x: int, y: int) -> Self:
+        key = (x, y)
+        cache = cls._cache
+        point = cache.get(key)
+        if point is not None:
+            cache.move_to_end(key)
+            return point
+        point = super().trusted(x, y)
+        cache[key] = point
+        if len(cache) > cls.cache_size:
+            cache.popitem(last=False)
+        return point
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls._cache.clear()
+
+    @classmethod
+    def cached_count(cls) -> int:
+        return len(cls._cache)
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Point2d):
+            return False
+        return self._x == other._x and self._y == other._y
+
+    __hash__ = Point2d.__hash__
+
+    def __reduce__(self) -> tuple[type[Self], tuple[int, int]]:
+        return self.__class__, (self._x, self._y)
+
+
 class Vector2d:
     __slots__ = ("_x", "_y")
 
@@ -77,6 +148,35 @@ class Vector2d:
     def triple_product(cls, a: Self, b: Self, c: Self) -> int:
         return cls.cross_product(a - b, c - a)
 
+    @classmethod
+    def sum(cls, vectors: Iterable[Self]) -> Self:
+        x = y = 0
+        for vector in vectors:
+            x += vector._x
+            y += vector._y
+        return cls(x, y)
+
+    @classmethod
+    def mean(cls, vectors: Iterable[Self]) -> Self:
+        x = y = count = 0
+        for vector in vectors:
+            x += vector._x
+            y += vector._y
+            count += 1
+        if not count:
+            raise ValueError("Cannot compute mean of empty sequence")
+        return cls(int(x / count), int(y / count))
+
+    @classmethod
+    def weighted_sum(
+        cls, vectors: Iterable[Self], weights: Iterable[int | float]
+    ) -> Self:
+        x = y = 0
+        for vector, weight in zip(vectors, weights, strict=True):
+            x += int(vector._x * weight)
+            y += int(vector._y * weight)
+        return cls(x, y)
+
     def __getitem__(self, index: int) -> int:
         if index == 0:
             return self._x
@@ -119,6 +219,26 @@ class Vector2d:
     def __truediv__(self, scalar: int | float) -> Self:
         return self.__class__(int(self._x / scalar), int(self._y / scalar))
 
+    def __iadd__(self, other: Self) -> Self:
+        self._x += other._x
+        self._y += other._y
+        return self
+
+    def __isub__(self, other: Self) -> Self:
+        self._x -= other._x
+        self._y -= other._y
+        return self
+
+    def __imul__(self, scalar: int | float) -> Self:
+        self._x = int(self._x * scalar)
+        self._y = int(self._y * scalar)
+        return self
+
+    def __itruediv__(self, scalar: int | float) -> Self:
+        self._x = int(self._x / scalar)
+        self._y = int(self._y / scalar)
+        return self
+
     def __str__(self) -> str:
         return f"{self.__class__.__name__}(x={self._x}, y={self._y})"
 
@@ -0,0 +1,252 @@
+from typing import Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from arrays import as_coords
+from lab1 import HEIGHT, WIDTH, Point2d
+
+PointsLike = Sequence[Point2d] | ArrayLike
+
+
+class Framebuffer:
+    STRIDE: int = WIDTH + 1
+    ROWS: int = HEIGHT + 1
+
+    def __init__(self, buffer: bytearray | memoryview | None = None) -> None:
+        size = self.STRIDE * self.ROWS
+        if buffer is None:
+            buffer = bytearray(size)
+        view = memoryview(buffer)
+        if view.readonly:
+            raise ValueError("Framebuffer must be writable")
+        if view.nbytes != size:
+            raise ValueError(f"Framebuffer must be exactly {size} bytes")
+        self.buffer = buffer
+        self._pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(
+            self.ROWS, self.STRIDE
+        )
+        self._flat = self._pixels.reshape(-1)
+
+    @property
+    def pixels(self) -> NDArray[np.uint8]:
+        return self._pixels
+
+    def clear(self, color: int = 0) -> None:
+        self._pixels.fill(color)
+
+    def get_pixel(self, point: Point2d) -> int:
+        return self.buffer[point.y * self.STRIDE + point.x]
+
+    def set_pixel(self, point: Point2d, color: int) -> None:
+        self.buffer[point.y * self.STRIDE + point.x] = color
+
+    def draw_line(self, start: Point2d, end: Point2d, color: int) -> int:
+        buffer, stride = self.buffer, self.STRIDE
+        x, y = start.x, start.y
+        dx, dy = abs(end.x - x), abs(end.y - y)
+        sx = 1 if end.x >= x else -1
+        sy = 1 if end.y >= y else -1
+        if dx >= dy:
+            error = 2 * dy - dx
+            for _ in range(dx + 1):
+                buffer[y * stride + x] = color
+                if error >= 0:
+                    y += sy
+                    error -= 2 * dx
+                error += 2 * dy
+                x += sx
+            return dx + 1
+        error = 2 * dx - dy
+        for _ in range(dy + 1):
+            buffer[y * stride + x] = color
+            if error >= 0:
+                x += sx
+                error -= 2 * dy
+            error += 2 * dx
+            y += sy
+        return dy + 1
+
+    def draw_lines(
+        self, starts: PointsLike, ends: PointsLike, colors: int | ArrayLike
+    ) -> int:
+        first, second = as_coords(starts), as_coords(ends)
+        if len(first) != len(second):
+            raise ValueError("Line starts and ends must have equal length")
+        colors = self._colors(colors, len(first))
+        delta = second - first
+        adx, ady = np.abs(delta[:, 0]), np.abs(delta[:, 1])
+        sx, sy = np.sign(delta[:, 0]), np.sign(delta[:, 1])
+        x_major = adx >= ady
+        steps = np.maximum(adx, ady)
+        counts = steps + 1
+        t = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        # Bresenham's minor-axis offset is round-half-up(minor * t / steps)
+        n = np.repeat(np.maximum(steps, 1), counts)
+        bend = (2 * np.repeat(np.minimum(adx, ady), counts) * t + n) // (2 * n)
+        major = np.where(x_major, sx, sy * self.STRIDE)
+        minor = np.where(x_major, sy * self.STRIDE, sx)
+        if self._inside(first) and self._inside(second):
+            flat = (
+                np.repeat(first[:, 1] * self.STRIDE + first[:, 0], counts)
+                + t * np.repeat(major, counts)
+                + bend * np.repeat(minor, counts)
+            )
+            self._flat[flat] = np.repeat(colors, counts)
+            return len(flat)
+        xs = np.repeat(first[:, 0], counts) + np.where(
+            np.repeat(x_major, counts), t, bend
+        ) * np.repeat(sx, counts)
+        ys = np.repeat(first[:, 1], counts) + np.where(
+            np.repeat(x_major, counts), bend, t
+        ) * np.repeat(sy, counts)
+        return self._plot(xs, ys, np.repeat(colors, counts))
+
+    def draw_polyline(
+        self, points: PointsLike, color: int, closed: bool = False
+    ) -> int:
+        coords = as_coords(points)
+        if len(coords) < 2:
+            return self._plot(coords[:, 0], coords[:, 1], self._colors(color, 1))
+        ends = np.roll(coords, -1, axis=0) if closed else coords[1:]
+        starts = coords if closed else coords[:-1]
+        return self.draw_lines(starts, ends, color)
+
+    def fill_polygon(self, polygon: PointsLike, color: int) -> int:
+        return self.fill_polygons([polygon], [color])
+
+    def fill_polygons(
+        self, polygons: Sequence[PointsLike], colors: int | ArrayLike
+    ) -> int:
+        colors = self._colors(colors, len(polygons))
+        rows, lefts, rights, span_colors = [], [], [], []
+        for polygon, color in zip(polygons, colors):
+            coords = as_coords(polygon)
+            if len(coords) < 3:
+                continue
+            a, b = coords, np.roll(coords, -1, axis=0)
+            sloped = a[:, 1] != b[:, 1]
+            a, b = a[sloped], b[sloped]
+            low = np.minimum(a[:, 1], b[:, 1])
+            counts = np.abs(b[:, 1] - a[:, 1])
+            edge = np.repeat(np.arange(len(a)), counts)
+            y = np.repeat(low, counts) + (
+                np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            )
+            ax, ay, bx, by = a[edge, 0], a[edge, 1], b[edge, 0], b[edge, 1]
+            x = ax + (y - ay) * (bx - ax) / (by - ay)
+            order = np.lexsort((x, y))
+            y, x = y[order], x[order]
+            rows.append(y[0::2])
+            lefts.append(np.ceil(x[0::2]).astype(np.int64))
+            rights.append(np.floor(x[1::2]).astype(np.int64))
+            span_colors.append(np.full(len(y) // 2, color, dtype=np.uint8))
+        written = 0
+        if rows:
+            written += self._spans(
+                np.concatenate(rows),
+                np.concatenate(lefts),
+                np.concatenate(rights),
+                np.concatenate(span_colors),
+            )
+        for polygon, color in zip(polygons, colors):
+            written += self.draw_polyline(polygon, int(color), closed=True)
+        return written
+
+    def draw_circle(
+        self, center: Point2d, radius: int, color: int, fill: bool = False
+    ) -> int:
+        return self.draw_circles([center], [radius], [color], fill)
+
+    def draw_circles(
+        self,
+        centers: PointsLike,
+        radii: ArrayLike,
+        colors: int | ArrayLike,
+        fill: bool = False,
+    ) -> int:
+        coords = as_coords(centers)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), (len(coords),))
+        if (radii < 0).any():
+            raise ValueError("Radius must be non-negative")
+        colors = self._colors(colors, len(coords))
+        counts = radii + 1
+        circle = np.repeat(np.arange(len(coords)), counts)
+        dy = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        dx = self._round_sqrt(radii[circle] ** 2 - dy * dy)
+        cx, cy = coords[circle, 0], coords[circle, 1]
+        if fill:
+            mirrored = dy > 0
+            rows = np.concatenate((cy + dy, (cy - dy)[mirrored]))
+            half = np.concatenate((dx, dx[mirrored]))
+            middle = np.concatenate((cx, cx[mirrored]))
+            span_colors = colors[np.concatenate((circle, circle[mirrored]))]
+            return self._spans(rows, middle - half, middle + half, span_colors)
+        xs = np.concatenate(
+            [cx + dx, cx - dx, cx + dx, cx - dx, cx + dy, cx - dy, cx + dy, cx - dy]
+        )
+        ys = np.concatenate(
+            [cy + dy, cy + dy, cy - dy, cy - dy, cy + dx, cy + dx, cy - dx, cy - dx]
+        )
+        return self._plot(xs, ys, np.tile(colors[circle], 8))
+
+    @staticmethod
+    def _round_sqrt(values: NDArray[np.int64]) -> NDArray[np.int64]:
+        root = np.floor(np.sqrt(values)).astype(np.int64)
+        root -= root * root > values
+        root += (root + 1) * (root + 1) <= values
+        return root + (values - root * root > root)
+
+    def _inside(self, coords: NDArray[np.int64]) -> bool:
+        if not len(coords):
+            return True
+        low, high = coords.min(axis=0), coords.max(axis=0)
+        return bool((low >= 0).all() and high[0] < self.STRIDE and high[1] < self.ROWS)
+
+    @staticmethod
+    def _colors(colors: int | ArrayLike, size: int) -> NDArray[np.uint8]:
+        return np.broadcast_to(np.asarray(colors, dtype=np.uint8), (size,))
+
+    def _plot(
+        self, xs: NDArray[np.int64], ys: NDArray[np.int64], colors: NDArray[np.uint8]
+    ) -> int:
+        inside = (xs >= 0) & (xs < self.STRIDE) & (ys >= 0) & (ys < self.ROWS)
+        self._flat[ys[inside] * self.STRIDE + xs[inside]] = colors[inside]
+        return int(inside.sum())
+
+    def _spans(
+        self,
+        rows: NDArray[np.int64],
+        lefts: NDArray[np.int64],
+        rights: NDArray[np.int64],
+        colors: NDArray[np.uint8],
+    ) -> int:
+        lefts = np.maximum(lefts, 0)
+        rights = np.minimum(rights, self.STRIDE - 1)
+        keep = (rows >= 0) & (rows < self.ROWS) & (lefts <= rights)
+        rows, lefts, rights, colors = (
+            rows[keep],
+            lefts[keep],
+            rights[keep],
+            colors[keep],
+        )
+        lengths = rights - lefts + 1
+        first = np.repeat(rows * self.STRIDE + lefts, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        self._flat[first + offsets] = np.repeat(colors, lengths)
+        return int(lengths.sum())
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.STRIDE}x{self.ROWS})"
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    frame = Framebuffer()
+    frame.draw_line(Point2d(0, 0), Point2d(WIDTH, HEIGHT), 1)
+    frame.draw_circle(Point2d(960, 540), 100, 2, fill=True)
+    frame.fill_polygon([Point2d(10, 10), Point2d(200, 40), Point2d(60, 300)], 3)
+    print(frame, np.bincount(frame.pixels.reshape(-1), minlength=4))
@@ -0,0 +1,197 @@
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Sequence
+from enum import Enum
+from typing import Iterator, Self, overload
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from arrays import PointCloud2d, Vector2dArray, as_coords
+from lab1 import Point2d, Vector2d
+
+MAGIC = b"P2DB"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBQI4x")
+FLAG_CHECKSUM = 0x01
+DTYPES = {2: np.dtype("<i2"), 4: np.dtype("<i4")}
+CHUNK = 1 << 16
+
+
+class PackedKind(Enum):
+    POINTS = 0
+    VECTORS = 1
+
+
+def _fits(coords: NDArray, itemsize: int) -> bool:
+    if coords.size == 0:
+        return True
+    info = np.iinfo(DTYPES[itemsize])
+    return info.min <= int(coords.min()) and int(coords.max()) <= info.max
+
+
+def _pick_itemsize(coords: NDArray) -> int:
+    for itemsize in DTYPES:
+        if _fits(coords, itemsize):
+            return itemsize
+    raise ValueError("Coordinates do not fit into int32")
+
+
+def _write(
+    path: str | os.PathLike,
+    kind: PackedKind,
+    coords: ArrayLike,
+    itemsize: int | None,
+    checksum: bool,
+) -> None:
+    coords = np.asarray(coords)
+    itemsize = itemsize or _pick_itemsize(coords)
+    if itemsize not in DTYPES:
+        raise ValueError(f"Unsupported coordinate width: {itemsize}")
+    if not _fits(coords, itemsize):
+        raise ValueError(f"Coordinates do not fit into {itemsize}-byte integers")
+    payload = np.ascontiguousarray(coords, dtype=DTYPES[itemsize])
+    crc = zlib.crc32(payload) if checksum else 0
+    flags = FLAG_CHECKSUM if checksum else 0
+    with open(path, "wb") as f:
+        f.write(
+            HEADER.pack(MAGIC, VERSION, kind.value, itemsize, flags, len(coords), crc)
+        )
+        f.write(payload.data)
+
+
+def write_points(
+    path: str | os.PathLike,
+    points: PointCloud2d | Sequence[Point2d] | ArrayLike,
+    itemsize: int | None = None,
+    checksum: bool = True,
+) -> None:
+    if not isinstance(points, PointCloud2d):
+        points = PointCloud2d(as_coords(points))
+    _write(path, PackedKind.POINTS, points.coords, itemsize, checksum)
+
+
+def write_vectors(
+    path: str | os.PathLike,
+    vectors: Vector2dArray | Sequence[Vector2d],
+    itemsize: int | None = None,
+    checksum: bool = True,
+) -> None:
+    if not isinstance(vectors, Vector2dArray):
+        vectors = Vector2dArray.from_vectors(vectors)
+    _write(
+        path,
+        PackedKind.VECTORS,
+        np.column_stack((vectors.x, vectors.y)),
+        itemsize,
+        checksum,
+    )
+
+
+class PackedFile(Sequence):
+    def __init__(self, path: str | os.PathLike, verify: bool = False) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header()
+            if verify:
+                self.verify()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self) -> None:
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{self.path}: file is too short")
+        magic, version, kind, itemsize, flags, count, crc = HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a packed point file")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: unsupported version {version}")
+        if itemsize not in DTYPES:
+            raise ValueError(f"{self.path}: unsupported coordinate width {itemsize}")
+        if len(self._mmap) != HEADER.size + count * 2 * itemsize:
+            raise ValueError(f"{self.path}: payload size does not match header")
+        self.kind = PackedKind(kind)
+        self.itemsize = itemsize
+        self.checksum: int | None = crc if flags & FLAG_CHECKSUM else None
+        self._count = count
+        self._coords = np.frombuffer(
+            self._mmap, dtype=DTYPES[itemsize], count=count * 2, offset=HEADER.size
+        ).reshape(-1, 2)
+
+    @property
+    def coords(self) -> NDArray:
+        return self._coords
+
+    def verify(self) -> None:
+        if self.checksum is None:
+            return
+        if zlib.crc32(self._coords) != self.checksum:
+            raise ValueError(f"{self.path}: checksum mismatch")
+
+    def to_cloud(self) -> PointCloud2d:
+        return PointCloud2d(self._coords)
+
+    def to_vector_array(self) -> Vector2dArray:
+        return Vector2dArray(self._coords[:, 0], self._coords[:, 1])
+
+    def _item(self, x: int, y: int) -> Point2d | Vector2d:
+        if self.kind is PackedKind.POINTS:
+            return Point2d(x, y)
+        return Vector2d(x, y)
+
+    @overload
+    def __getitem__(self, index: int) -> Point2d | Vector2d: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Point2d | Vector2d]: ...
+
+    def __getitem__(self, index: int | slice) -> Point2d | Vector2d | list:
+        if isinstance(index, slice):
+            return [self._item(x, y) for x, y in self._coords[index].tolist()]
+        x, y = self._coords[index].tolist()
+        return self._item(x, y)
+
+    def __iter__(self) -> Iterator[Point2d | Vector2d]:
+        for start in range(0, self._count, CHUNK):
+            for x, y in self._coords[start : start + CHUNK].tolist():
+                yield self._item(x, y)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._coords = np.empty((0, 2), dtype=np.int16)
+        try:
+            self._mmap.close()
+        except BufferError:
+            # arrays handed out by coords/to_cloud still reference the mapping,
+            # it is released once the last of them is garbage collected
+            pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(path={self.path!r}, kind={self.kind.name}, "
+            f"size={self._count})"
+        )
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    write_points("points.p2d", [Point2d(1, 2), Point2d(1920, 1080)])
+    with PackedFile("points.p2d", verify=True) as packed:
+        print(packed, list(packed))
+    os.remove("points.p2d")
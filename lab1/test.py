@@ -1,5 +1,22 @@
+import copy
+import math
+import operator
+import pickle
+from array import array
+
+import numpy as np
 import pytest
-from lab1 import Point2d, Vector2d, WIDTH, HEIGHT
+from lab1 import FrozenPoint2d, Point2d, Vector2d, WIDTH, HEIGHT
+from arrays import PointCloud2d, PointCloudError, Vector2dArray
+from geometry import (
+    convex_hull,
+    points_in_polygon,
+    polygon_area,
+    segments_intersect,
+)
+from index import GridIndex
+from raster import Framebuffer
+from storage import PackedFile, PackedKind, write_points, write_vectors
 
 
 class TestPoint2d:
@@ -30,6 +47,67 @@ class TestPoint2d:
         assert str(p) == "Point2d(x=5, y=15)"
         assert repr(p) == "Point2d(x=5, y=15)"
 
+    def test_hash(self):
+        assert hash(Point2d(1, 2)) == hash(Point2d(1, 2))
+        assert len({Point2d(1, 2), Point2d(1, 2), Point2d(2, 1)}) == 2
+
+    def test_trusted(self):
+        assert Point2d.trusted(5, 15) == Point2d(5, 15)
+        assert Point2d.from_trusted([(1, 2), (3, 4)]) == [Point2d(1, 2), Point2d(3, 4)]
+
+
+class TestFrozenPoint2d:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        FrozenPoint2d.clear_cache()
+        yield
+        FrozenPoint2d.clear_cache()
+
+    def test_interning(self):
+        assert FrozenPoint2d(1, 2) is FrozenPoint2d(1, 2)
+        assert FrozenPoint2d.trusted(1, 2) is FrozenPoint2d(1, 2)
+        assert FrozenPoint2d.cached_count() == 1
+
+    @pytest.mark.parametrize("x,y", [(-1, 0), (WIDTH + 1, 0), (0, HEIGHT + 1)])
+    def test_invalid_creation(self, x, y):
+        with pytest.raises(ValueError):
+            FrozenPoint2d(x, y)
+
+    def test_immutable(self):
+        p = FrozenPoint2d(1, 2)
+        with pytest.raises(AttributeError):
+            p.x = 5
+        with pytest.raises(AttributeError):
+            p.y = 5
+
+    def test_equality_and_hash(self):
+        p = FrozenPoint2d(3, 4)
+        assert p == Point2d(3, 4)
+        assert Point2d(3, 4) == p
+        assert p != FrozenPoint2d(4, 3)
+        assert hash(p) == hash(Point2d(3, 4))
+        assert {p: "value"}[Point2d(3, 4)] == "value"
+
+    def test_eviction(self, monkeypatch):
+        monkeypatch.setattr(FrozenPoint2d, "cache_size", 2)
+        first = FrozenPoint2d(0, 0)
+        FrozenPoint2d(1, 1)
+        FrozenPoint2d(0, 0)
+        FrozenPoint2d(2, 2)
+        assert FrozenPoint2d.cached_count() == 2
+        assert FrozenPoint2d(0, 0) is first
+        assert FrozenPoint2d(1, 1) == Point2d(1, 1)
+
+    def test_copy_keeps_identity(self):
+        p = FrozenPoint2d(7, 8)
+        assert copy.copy(p) is p
+        assert pickle.loads(pickle.dumps(p)) is p
+
+    def test_cloud_to_frozen_points(self):
+        cloud = PointCloud2d([1, 2, 1, 2])
+        first, second = cloud.to_points(FrozenPoint2d)
+        assert first is second
+
 
 class TestVector2d:
     @pytest.mark.parametrize("x,y", [(0, 0), (1, 2), (-3, -4)])
@@ -135,3 +213,474 @@ class TestVector2d:
         b = Vector2d(0, 1)
         c = Vector2d(1, 1)
         assert a.mixed(b, c) == 1
+
+    def test_inplace(self):
+        v = Vector2d(2, 4)
+        same = v
+        v += Vector2d(1, 1)
+        v -= Vector2d(0, 2)
+        assert v is same
+        assert v == Vector2d(3, 3)
+        v *= 0.5
+        assert v == Vector2d(1, 1)
+        v = Vector2d(7, -7)
+        v /= 2
+        assert v == Vector2d(7, -7) / 2
+
+    def test_sum(self):
+        vectors = [Vector2d(1, 2), Vector2d(3, 4), Vector2d(-5, 6)]
+        assert Vector2d.sum(vectors) == vectors[0] + vectors[1] + vectors[2]
+        assert Vector2d.sum(v for v in vectors) == Vector2d(-1, 12)
+        assert Vector2d.sum([]) == Vector2d(0, 0)
+
+    def test_mean(self):
+        vectors = [Vector2d(1, 2), Vector2d(3, 4), Vector2d(-5, 7)]
+        assert Vector2d.mean(iter(vectors)) == Vector2d.sum(vectors) / 3
+        with pytest.raises(ValueError):
+            Vector2d.mean([])
+
+    def test_weighted_sum(self):
+        vectors = [Vector2d(1, 2), Vector2d(3, 4), Vector2d(-5, 7)]
+        weights = [0.5, 2, -0.3]
+        expected = vectors[0] * 0.5 + vectors[1] * 2 + vectors[2] * -0.3
+        assert Vector2d.weighted_sum(vectors, weights) == expected
+        with pytest.raises(ValueError):
+            Vector2d.weighted_sum(vectors, [1])
+
+
+class TestVector2dArray:
+    @pytest.fixture
+    def pairs(self):
+        return [
+            (Vector2d(1, 2), Vector2d(3, 4)),
+            (Vector2d(-7, 5), Vector2d(2, -9)),
+            (Vector2d(0, 0), Vector2d(1, 1)),
+            (Vector2d(1919, -1079), Vector2d(-3, 17)),
+        ]
+
+    @pytest.fixture
+    def arrays(self, pairs):
+        first = Vector2dArray.from_vectors(a for a, _ in pairs)
+        second = Vector2dArray.from_vectors(b for _, b in pairs)
+        return first, second
+
+    def test_creation(self):
+        vectors = Vector2dArray([1, 2, 3], [4, 5, 6])
+        assert len(vectors) == 3
+        assert vectors[1] == Vector2d(2, 5)
+        assert list(vectors) == [Vector2d(1, 4), Vector2d(2, 5), Vector2d(3, 6)]
+        with pytest.raises(ValueError):
+            Vector2dArray([1, 2], [3])
+
+    def test_from_points(self):
+        starts = [Point2d(1, 2), Point2d(10, 10)]
+        ends = [Point2d(4, 6), Point2d(0, 20)]
+        expected = [Vector2d.from_points(s, e) for s, e in zip(starts, ends)]
+        assert Vector2dArray.from_points(starts, ends).to_vectors() == expected
+        coords = Vector2dArray.from_points([(1, 2), (10, 10)], [(4, 6), (0, 20)])
+        assert coords.to_vectors() == expected
+
+    def test_get_set_item(self):
+        vectors = Vector2dArray.zeros(3)
+        vectors[1] = Vector2d(7, 8)
+        assert vectors[1] == Vector2d(7, 8)
+        assert vectors[1:].to_vectors() == [Vector2d(7, 8), Vector2d(0, 0)]
+
+    def test_equality(self):
+        assert Vector2dArray([1], [2]) == Vector2dArray([1], [2])
+        assert Vector2dArray([1], [2]) != Vector2dArray([2], [1])
+        assert Vector2dArray([1], [2]) != "not an array"
+
+    def test_add_sub(self, pairs, arrays):
+        first, second = arrays
+        assert (first + second).to_vectors() == [a + b for a, b in pairs]
+        assert (first - second).to_vectors() == [a - b for a, b in pairs]
+        assert (first + Vector2d(1, 1)).to_vectors() == [
+            a + Vector2d(1, 1) for a, _ in pairs
+        ]
+
+    @pytest.mark.parametrize("scalar", [2, 0.5, -1, -0.3, 3.7])
+    def test_mul_div_truncation(self, pairs, arrays, scalar):
+        first, _ = arrays
+        assert (first * scalar).to_vectors() == [a * scalar for a, _ in pairs]
+        assert (first / scalar).to_vectors() == [a / scalar for a, _ in pairs]
+
+    @pytest.mark.parametrize(
+        "op, scalar, error",
+        [
+            (operator.truediv, 0, ZeroDivisionError),
+            (operator.truediv, 0.0, ZeroDivisionError),
+            (operator.mul, math.inf, OverflowError),
+            (operator.mul, math.nan, ValueError),
+        ],
+    )
+    def test_mul_div_errors(self, pairs, arrays, op, scalar, error):
+        first, _ = arrays
+        with pytest.raises(error):
+            op(pairs[0][0], scalar)
+        with pytest.raises(error):
+            op(first, scalar)
+
+    def test_products(self, pairs, arrays):
+        first, second = arrays
+        assert first.dot(second).tolist() == [a.dot(b) for a, b in pairs]
+        assert first.cross(second).tolist() == [a.cross(b) for a, b in pairs]
+        third = second * 3
+        assert Vector2dArray.triple_product(first, second, third).tolist() == [
+            Vector2d.triple_product(a, b, b * 3) for a, b in pairs
+        ]
+
+    def test_abs(self, pairs, arrays):
+        first, _ = arrays
+        assert abs(first).tolist() == [abs(a) for a, _ in pairs]
+        assert first.norm().tolist() == [abs(a) for a, _ in pairs]
+
+
+class TestPointCloud2d:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            array("i", [1, 2, 3, 4]),
+            memoryview(array("i", [1, 2, 3, 4])),
+            array("i", [1, 2, 3, 4]).tobytes(),
+            np.array([[1, 2], [3, 4]], dtype=np.int32),
+        ],
+    )
+    def test_creation_from_buffer(self, data):
+        cloud = PointCloud2d(data)
+        assert len(cloud) == 2
+        assert list(cloud) == [Point2d(1, 2), Point2d(3, 4)]
+
+    def test_zero_copy(self):
+        buffer = array("i", [1, 2, 3, 4])
+        cloud = PointCloud2d(buffer)
+        assert np.shares_memory(cloud.coords, np.frombuffer(buffer, dtype=np.int32))
+        coords = np.array([[5, 6], [7, 8]], dtype=np.int16)
+        assert PointCloud2d(coords).coords.base is coords
+
+    def test_array_copy(self):
+        cloud = PointCloud2d([1, 2, 3, 4])
+        assert np.shares_memory(np.asarray(cloud), cloud.coords)
+        assert not np.shares_memory(np.array(cloud, copy=True), cloud.coords)
+        assert np.array(cloud, dtype=np.int64).tolist() == [[1, 2], [3, 4]]
+        with pytest.raises(ValueError):
+            np.array(cloud, dtype=np.int64, copy=False)
+
+    def test_elements_are_points(self):
+        cloud = PointCloud2d.from_points([Point2d(0, 0), Point2d(WIDTH, HEIGHT)])
+        assert cloud[1] == Point2d(WIDTH, HEIGHT)
+        assert cloud[1:].to_points() == [Point2d(WIDTH, HEIGHT)]
+
+    def test_invalid_indices_reported(self):
+        data = [0, 0, -1, 5, 10, 10, 5, HEIGHT + 1, WIDTH + 1, 0]
+        with pytest.raises(PointCloudError) as info:
+            PointCloud2d(data)
+        assert info.value.indices.tolist() == [1, 3, 4]
+        assert isinstance(info.value, ValueError)
+
+    def test_invalid_shape(self):
+        with pytest.raises(ValueError):
+            PointCloud2d([1, 2, 3])
+        with pytest.raises(ValueError):
+            PointCloud2d(np.array([[1, 2, 3], [4, 5, 6]]))
+        with pytest.raises(TypeError):
+            PointCloud2d(np.array([0.5, 1.5]))
+
+    def test_vectors_from_cloud(self):
+        cloud = PointCloud2d([0, 0, 3, 4, 6, 8])
+        vectors = Vector2dArray.from_points(cloud[:-1], cloud[1:])
+        assert vectors.to_vectors() == [Vector2d(3, 4), Vector2d(3, 4)]
+
+
+class TestGridIndex:
+    @pytest.fixture
+    def coords(self):
+        rng = np.random.default_rng(0)
+        return np.column_stack(
+            (rng.integers(0, WIDTH + 1, 2000), rng.integers(0, HEIGHT + 1, 2000))
+        )
+
+    @pytest.fixture
+    def index(self, coords):
+        return GridIndex.build(coords, cell_size=64)
+
+    def test_build(self, coords, index):
+        assert len(index) == len(coords)
+        assert index.point(5) == Point2d(*coords[5].tolist())
+
+    @pytest.mark.parametrize(
+        "rect", [(0, 0, WIDTH, HEIGHT), (100, 200, 400, 300), (-50, -50, 10, 10)]
+    )
+    def test_query_rect(self, coords, index, rect):
+        x0, y0, x1, y1 = rect
+        x, y = coords[:, 0], coords[:, 1]
+        expected = np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+        assert sorted(index.query_rect(*rect).tolist()) == expected.tolist()
+
+    @pytest.mark.parametrize("radius", [0, 15, 100.5, 3000])
+    def test_query_radius(self, coords, index, radius):
+        center = Point2d(700, 300)
+        d2 = (coords[:, 0] - 700) ** 2 + (coords[:, 1] - 300) ** 2
+        expected = np.flatnonzero(d2 <= radius * radius)
+        assert sorted(index.query_radius(center, radius).tolist()) == expected.tolist()
+
+    @pytest.mark.parametrize("k", [1, 7, 2000, 5000])
+    def test_nearest(self, coords, index, k):
+        center = Point2d(WIDTH, 0)
+        d2 = (coords[:, 0] - WIDTH) ** 2 + coords[:, 1] ** 2
+        expected = np.lexsort((np.arange(len(coords)), d2))[:k]
+        assert index.nearest(center, k).tolist() == expected.tolist()
+
+    def test_insert_remove(self, index):
+        new_id = index.insert(Point2d(1, 1))
+        assert new_id in index
+        assert new_id in index.query_rect(0, 0, 1, 1).tolist()
+        assert index.nearest(Point2d(1, 1))[0] == new_id
+        index.remove(new_id)
+        assert new_id not in index
+        assert new_id not in index.query_rect(0, 0, 1, 1).tolist()
+        with pytest.raises(KeyError):
+            index.remove(new_id)
+
+    def test_rebuild_after_many_inserts(self):
+        index = GridIndex(cell_size=16)
+        ids = [index.insert(Point2d(i % WIDTH, i % HEIGHT)) for i in range(3000)]
+        assert len(index) == 3000
+        assert index.query_rect(0, 0, 0, 0).tolist() == [ids[0]]
+        assert len(index.query_rect(0, 0, WIDTH, HEIGHT)) == 3000
+
+
+class TestGeometry:
+    @pytest.fixture
+    def coords(self):
+        rng = np.random.default_rng(1)
+        return np.column_stack((rng.integers(0, 200, 500), rng.integers(0, 200, 500)))
+
+    @pytest.fixture
+    def polygon(self):
+        return [
+            Point2d(10, 10),
+            Point2d(150, 20),
+            Point2d(100, 80),
+            Point2d(180, 180),
+            Point2d(20, 150),
+        ]
+
+    def test_convex_hull_square(self):
+        square = [Point2d(0, 0), Point2d(10, 0), Point2d(10, 10), Point2d(0, 10)]
+        points = square + [Point2d(5, 5), Point2d(5, 0), Point2d(0, 0)]
+        assert convex_hull(points) == square
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_convex_hull_degenerate(self, vectorized):
+        assert convex_hull([], vectorized) == []
+        twice = [Point2d(1, 1), Point2d(1, 1)]
+        assert convex_hull(twice, vectorized) == [Point2d(1, 1)]
+        line = [Point2d(i, 2 * i) for i in range(5)]
+        assert convex_hull(line, vectorized) == [Point2d(0, 0), Point2d(4, 8)]
+
+    def test_convex_hull_paths_agree(self, coords):
+        hull = convex_hull(coords, vectorized=True)
+        assert hull == convex_hull(coords, vectorized=False)
+        assert points_in_polygon(coords, hull).all()
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_polygon_area(self, polygon, vectorized):
+        square = [Point2d(0, 0), Point2d(10, 0), Point2d(10, 10), Point2d(0, 10)]
+        assert polygon_area(square, vectorized) == 100.0
+        assert polygon_area(square[::-1], vectorized) == 100.0
+        assert polygon_area(polygon, vectorized) == 17200.0
+
+    def test_points_in_polygon(self, coords, polygon):
+        fast = points_in_polygon(coords, polygon, vectorized=True)
+        slow = points_in_polygon(coords, polygon, vectorized=False)
+        assert fast.tolist() == slow.tolist()
+        assert 0 < fast.sum() < len(coords)
+        probes = [Point2d(50, 50), Point2d(10, 10), Point2d(80, 15), Point2d(140, 60)]
+        expected = [True, True, True, False]
+        assert points_in_polygon(probes, polygon).tolist() == expected
+        assert points_in_polygon(probes, polygon, vectorized=True).tolist() == expected
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_segments_intersect(self, vectorized):
+        first_starts = [Point2d(0, 0), Point2d(0, 0), Point2d(0, 0), Point2d(0, 0)]
+        first_ends = [Point2d(10, 10), Point2d(10, 0), Point2d(5, 0), Point2d(4, 4)]
+        second_starts = [Point2d(0, 10), Point2d(5, 0), Point2d(6, 0), Point2d(5, 5)]
+        second_ends = [Point2d(10, 0), Point2d(20, 0), Point2d(9, 0), Point2d(9, 0)]
+        result = segments_intersect(
+            first_starts, first_ends, second_starts, second_ends, vectorized
+        )
+        assert result.tolist() == [True, True, False, False]
+
+    def test_segments_paths_agree(self, coords):
+        p1, p2, q1, q2 = coords.reshape(4, -1, 2)
+        fast = segments_intersect(p1, p2, q1, q2, vectorized=True)
+        assert fast.tolist() == segments_intersect(p1, p2, q1, q2, False).tolist()
+
+
+class TestPackedFile:
+    def test_points_round_trip(self, tmp_path):
+        path = tmp_path / "points.p2d"
+        points = [Point2d(0, 0), Point2d(10, 20), Point2d(WIDTH, HEIGHT)]
+        write_points(path, points)
+        with PackedFile(path, verify=True) as packed:
+            assert packed.kind is PackedKind.POINTS
+            assert packed.itemsize == 2
+            assert len(packed) == 3
+            assert packed[1] == Point2d(10, 20)
+            assert packed[-1] == Point2d(WIDTH, HEIGHT)
+            assert list(packed) == points
+            assert packed.to_cloud().to_points() == points
+
+    def test_vectors_round_trip(self, tmp_path):
+        path = tmp_path / "vectors.p2d"
+        vectors = [Vector2d(-1, 2), Vector2d(100000, -5)]
+        write_vectors(path, vectors)
+        with PackedFile(path) as packed:
+            assert packed.kind is PackedKind.VECTORS
+            assert packed.itemsize == 4
+            assert packed[:] == vectors
+            assert packed.to_vector_array().to_vectors() == vectors
+
+    def test_itemsize_overflow(self, tmp_path):
+        path = tmp_path / "vectors.p2d"
+        with pytest.raises(ValueError):
+            write_vectors(path, [Vector2d(100000, -5)], itemsize=2)
+        assert not path.exists()
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "empty.p2d"
+        write_points(path, [], checksum=False)
+        with PackedFile(path, verify=True) as packed:
+            assert len(packed) == 0
+            assert packed.checksum is None
+            assert list(packed) == []
+
+    def test_zero_copy(self, tmp_path):
+        path = tmp_path / "cloud.p2d"
+        write_points(path, PointCloud2d(array("i", [1, 2, 3, 4] * 1000)))
+        packed = PackedFile(path)
+        cloud = packed.to_cloud()
+        assert cloud.coords.base is not None
+        assert not cloud.coords.flags.writeable
+        assert len(cloud) == 2000
+        del cloud
+        packed.close()
+
+    def test_checksum_mismatch(self, tmp_path):
+        path = tmp_path / "points.p2d"
+        write_points(path, [Point2d(1, 2), Point2d(3, 4)])
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError):
+            PackedFile(path, verify=True)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"",
+            b"P2DB",
+            b"NOPE" + bytes(20),
+            b"P2DB\x02\x00\x02\x01" + bytes(16),
+            b"P2DB\x01\x00\x02\x01\x05" + bytes(15),
+        ],
+    )
+    def test_invalid_file(self, tmp_path, data):
+        path = tmp_path / "broken.p2d"
+        path.write_bytes(data)
+        with pytest.raises(ValueError):
+            PackedFile(path)
+
+
+class TestFramebuffer:
+    @pytest.fixture
+    def frame(self):
+        return Framebuffer()
+
+    def test_creation(self):
+        buffer = bytearray(Framebuffer.STRIDE * Framebuffer.ROWS)
+        frame = Framebuffer(memoryview(buffer))
+        frame.set_pixel(Point2d(WIDTH, HEIGHT), 7)
+        assert buffer[-1] == 7
+        assert frame.get_pixel(Point2d(WIDTH, HEIGHT)) == 7
+        with pytest.raises(ValueError):
+            Framebuffer(bytearray(10))
+        with pytest.raises(ValueError):
+            Framebuffer(bytes(len(buffer)))
+
+    @pytest.mark.parametrize(
+        "start,end,pixels",
+        [
+            (Point2d(0, 0), Point2d(10, 0), 11),
+            (Point2d(5, 5), Point2d(5, 0), 6),
+            (Point2d(0, 0), Point2d(10, 10), 11),
+            (Point2d(3, 3), Point2d(3, 3), 1),
+        ],
+    )
+    def test_draw_line(self, frame, start, end, pixels):
+        assert frame.draw_line(start, end, 1) == pixels
+        assert np.count_nonzero(frame.pixels) == pixels
+        assert frame.get_pixel(start) == frame.get_pixel(end) == 1
+
+    def test_draw_lines_matches_bresenham(self):
+        rng = np.random.default_rng(2)
+        coords = rng.integers(0, 200, (300, 4)).tolist()
+        single, batch = Framebuffer(), Framebuffer()
+        for x0, y0, x1, y1 in coords:
+            single.draw_line(Point2d(x0, y0), Point2d(x1, y1), (x0 + y1) % 255)
+        starts = [(x0, y0) for x0, y0, _, _ in coords]
+        ends = [(x1, y1) for _, _, x1, y1 in coords]
+        colors = [(x0 + y1) % 255 for x0, _, _, y1 in coords]
+        batch.draw_lines(starts, ends, colors)
+        assert np.array_equal(single.pixels, batch.pixels)
+
+    def test_draw_lines_clipped(self, frame):
+        assert frame.draw_lines([(-10, 0)], [(10, 0)], 1) == 11
+
+    def test_draw_polyline(self, frame):
+        square = [Point2d(0, 0), Point2d(10, 0), Point2d(10, 10), Point2d(0, 10)]
+        frame.draw_polyline(square, 1, closed=True)
+        assert np.count_nonzero(frame.pixels) == 40
+        frame.clear()
+        frame.draw_polyline(square, 1)
+        assert np.count_nonzero(frame.pixels) == 31
+
+    def test_fill_polygon(self, frame):
+        square = [Point2d(0, 0), Point2d(10, 0), Point2d(10, 10), Point2d(0, 10)]
+        frame.fill_polygon(square, 3)
+        assert np.count_nonzero(frame.pixels) == 121
+        assert (frame.pixels[:11, :11] == 3).all()
+
+    def test_fill_polygons_concave(self, frame):
+        notch = [(0, 0), (20, 0), (20, 20), (10, 5), (0, 20)]
+        triangle = [(100, 100), (120, 100), (110, 120)]
+        frame.fill_polygons([notch, triangle], [1, 2])
+        assert frame.get_pixel(Point2d(10, 2)) == 1
+        assert frame.get_pixel(Point2d(10, 15)) == 0
+        assert frame.get_pixel(Point2d(110, 105)) == 2
+
+    def test_draw_circle(self, frame):
+        center = Point2d(100, 100)
+        frame.draw_circle(center, 10, 1)
+        assert frame.get_pixel(Point2d(110, 100)) == 1
+        assert frame.get_pixel(Point2d(100, 90)) == 1
+        assert frame.get_pixel(center) == 0
+        outline = np.argwhere(frame.pixels)
+        assert np.array_equal(
+            np.sort(outline[:, 0] - 100), np.sort(100 - outline[:, 0])
+        )
+
+    def test_fill_circle_clipped(self, frame):
+        frame.draw_circle(Point2d(0, 0), 10, 1, fill=True)
+        assert frame.get_pixel(Point2d(0, 0)) == 1
+        assert frame.get_pixel(Point2d(7, 7)) == 1
+        assert frame.get_pixel(Point2d(8, 8)) == 0
+        with pytest.raises(ValueError):
+            frame.draw_circle(Point2d(0, 0), -1, 1)
+
+    def test_draw_circles_batch(self, frame):
+        centers = [(50, 50), (WIDTH, HEIGHT)]
+        written = frame.draw_circles(centers, [5, 20], [1, 2], fill=True)
+        assert written == np.count_nonzero(frame.pixels)
+        assert frame.get_pixel(Point2d(WIDTH, HEIGHT)) == 2
@@ -0,0 +1,188 @@
+import contextlib
+import io
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from bitmap import BitmapPrinter
+from fonts import FONT_FILE, Font, compile_font, get_font
+from lab2 import Color, Printer
+from screen import Screen
+
+BANNERS = ["STATUS OK", "WARNING", "ERROR LOAD HIGH", "SYNCING"]
+
+
+def measure(func: Callable[[], object], repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_cache(repeat: int) -> None:
+    def render() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for banner in BANNERS:
+                Printer.print(banner, Color.GREEN, (1, 1), "#", 3)
+
+    def cold() -> None:
+        Printer.cache_clear()
+        render()
+
+    before = measure(cold, repeat)
+    Printer.cache_clear()
+    after = measure(render, repeat)
+    print(
+        f"repeat={repeat:>6,}  uncached {before * 1e6:9.1f} us  "
+        f"cached {after * 1e6:9.1f} us  x{before / after:6.1f}"
+    )
+    print(f"  {Printer.cache_info()}")
+
+
+def import_time(module: str) -> int:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def bench_import(repeat: int) -> None:
+    best = min(import_time("lab2") for _ in range(repeat))
+    print(f"import lab2 (best of {repeat}, -X importtime) {best:>8,} us")
+    with tempfile.TemporaryDirectory() as directory:
+        compiled = os.path.join(directory, "font.bin")
+        compile_font(FONT_FILE, compiled)
+        for name, path in (("json", FONT_FILE), ("compiled", compiled)):
+            load = measure(lambda: Font.load(path), repeat)
+            print(
+                f"  load {name:<9} {load * 1e6:9.1f} us  {os.path.getsize(path)} bytes"
+            )
+
+
+class CountingSink(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+def bench_screen(frames: int) -> None:
+    words = ["TICK", "TOCK", "TACK"]
+
+    def frame(tick: int, draw: Callable[..., None]) -> None:
+        for i, banner in enumerate(BANNERS):
+            draw(banner, Color.GREEN, (1, 1 + i * 16), "#", 3)
+        draw(words[tick % len(words)], Color.RED, (1, 65), "@", 3)
+
+    printer_sink, screen_sink = CountingSink(), CountingSink()
+    screen = Screen(200, 100, screen_sink)
+    screen.invalidate()
+
+    def printer_frames() -> None:
+        with contextlib.redirect_stdout(printer_sink):
+            for tick in range(frames):
+                frame(tick, Printer.print)
+
+    def screen_frames() -> None:
+        for tick in range(frames):
+            frame(tick, screen.print)
+            screen.refresh()
+
+    before = measure(printer_frames) / frames
+    after = measure(screen_frames) / frames
+    for name, sink, elapsed in (
+        ("printer", printer_sink, before),
+        ("screen", screen_sink, after),
+    ):
+        print(
+            f"  {name:<8} {elapsed * 1e6:9.1f} us/frame  "
+            f"{len(sink.getvalue()) / frames:9,.0f} bytes/frame  "
+            f"{sink.writes / frames:5.1f} writes/frame"
+        )
+
+
+def bench_bitmap(length: int) -> None:
+    rng = random.Random(length)
+    text = "".join(rng.choice(string.ascii_uppercase + " ") for _ in range(length))
+    font = get_font()
+    repeat = max(1, 10**4 // length)
+    print(f"chars={length:>8,}")
+    for font_size in range(1, 9):
+
+        def strings() -> None:
+            Printer._compose.cache_clear()
+            Printer._compose(text, font_size, "#", font)
+
+        def arrays() -> None:
+            BitmapPrinter._compose.cache_clear()
+            BitmapPrinter._compose(text, font_size, "#", font)
+
+        before, after = measure(strings, repeat), measure(arrays, repeat)
+        print(
+            f"  size {font_size}  strings {before * 1e3:9.3f} ms  "
+            f"bitmap {after * 1e3:9.3f} ms  x{before / after:6.1f}"
+        )
+
+
+def bench_render(length: int) -> None:
+    rng = random.Random(length)
+    words = ["".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 9)))]
+    while sum(map(len, words)) < length:
+        words.append("".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 9))))
+    text = " ".join(words)
+
+    def peak(func: Callable[[], object]) -> tuple[float, int]:
+        Printer.cache_clear()
+        elapsed = measure(func)
+        Printer.cache_clear()
+        tracemalloc.start()
+        func()
+        _, top = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, top
+
+    with open(os.devnull, "wb") as sink:
+        cases = {
+            "whole frame": lambda: Printer.render(text, sink, symbol="#"),
+            "wrapped 200": lambda: Printer.render(text, sink, symbol="#", width=200),
+        }
+        print(f"chars={length:>10,}")
+        for name, render in cases.items():
+            elapsed, top = peak(render)
+            print(f"  {name:<12} {elapsed * 1e3:9.2f} ms  peak {top / 1024:10,.0f} KiB")
+
+
+BENCHMARKS: dict[str, tuple[Callable[[int], None], list[int]]] = {
+    "cache": (bench_cache, [1000]),
+    "import": (bench_import, [15]),
+    "screen": (bench_screen, [100]),
+    "bitmap": (bench_bitmap, [10, 100, 10**4]),
+    "render": (bench_render, [10**4, 10**5]),
+}
+
+
+if __name__ == "__main__":
+    names = [arg for arg in sys.argv[1:] if arg in BENCHMARKS] or list(BENCHMARKS)
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    for name in names:
+        bench, default_sizes = BENCHMARKS[name]
+        print(f"# {name}")
+        for size in sizes or default_sizes:
+            bench(size)
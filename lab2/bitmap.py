@@ -0,0 +1,116 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from fonts import BitmapGlyphs, Font
+from lab2 import LINE_CACHE_SIZE, Printer
+
+GAP = 2
+ATLAS_CACHE_SIZE = 16
+CELLS_CACHE_SIZE = 64
+
+
+class GlyphAtlas:
+    def __init__(self, font: Font) -> None:
+        self.height = font.height
+        chars = [char for char in font.symbols if len(char) == 1]
+        blocks, widths = [], []
+        for char in chars:
+            bits = self._bits(font, char)
+            blocks.append(bits)
+            blocks.append(np.zeros((self.height, GAP), dtype=bool))
+            widths.append(bits.shape[1] + GAP)
+        self.bitmap = (
+            np.concatenate(blocks, axis=1)
+            if blocks
+            else np.zeros((self.height, 0), dtype=bool)
+        )
+        self.widths = np.array(widths, dtype=np.int64)
+        self.offsets = np.cumsum(self.widths) - self.widths
+        codepoints = [ord(char) for char in chars]
+        self.lookup = np.full(max(codepoints, default=-1) + 1, -1, dtype=np.int64)
+        self.lookup[codepoints] = np.arange(len(chars))
+
+    def _bits(self, font: Font, char: str) -> NDArray[np.bool_]:
+        if isinstance(font.symbols, BitmapGlyphs):
+            width, rows = font.symbols.masks(char)
+            shifts = np.arange(width - 1, -1, -1)
+            return (np.array(rows, dtype=np.int64)[:, None] >> shifts & 1).astype(bool)
+        pattern = font.symbols[char]
+        if len(pattern) != self.height or len({len(line) for line in pattern}) > 1:
+            raise ValueError(f"Glyph {char!r} is not a {self.height}-row bitmap")
+        if set("".join(pattern)) - {"*", " "}:
+            raise ValueError(f"Glyph {char!r} may only contain '*' and ' '")
+        return np.array(
+            [[c == "*" for c in line] for line in pattern], dtype=bool
+        ).reshape(self.height, -1)
+
+    def indices(self, text: str) -> NDArray[np.int64]:
+        encoded = text.upper().encode("utf-32-le", "surrogatepass")
+        codes = np.frombuffer(encoded, dtype="<u4")
+        known = codes < len(self.lookup)
+        indices = np.full(len(codes), -1, dtype=np.int64)
+        indices[known] = self.lookup[codes[known]]
+        return indices[indices >= 0]
+
+    def columns(self, text: str, font_size: int = 1) -> NDArray[np.int64]:
+        indices = self.indices(text)
+        widths = self.widths[indices] * font_size
+        shift = self.offsets[indices] * font_size - (np.cumsum(widths) - widths)
+        return np.repeat(shift, widths) + np.arange(widths.sum())
+
+    def compose(self, text: str, font_size: int = 1) -> NDArray[np.bool_]:
+        scaled = np.repeat(self.bitmap, font_size, axis=1)
+        return np.take(scaled, self.columns(text, font_size), axis=1)
+
+    def render(
+        self, text: str, font_size: int = 1, symbol: str = "*"
+    ) -> Tuple[str, ...]:
+        # only one-codepoint symbols map onto array cells, longer ones are
+        # substituted into the finished rows like Printer._glyph does
+        cell = symbol if len(symbol) == 1 else "*"
+        columns = self.columns(text, font_size)
+        if len(columns):
+            codes = np.take(_cells(self, font_size, cell), columns, axis=1)
+            rows = codes.view(f"<U{len(columns)}").ravel().tolist()
+        else:
+            rows = [""] * self.height
+        if len(symbol) > 1:
+            rows = [row.replace("*", symbol) for row in rows]
+        return tuple(row for row in rows for _ in range(font_size))
+
+
+@lru_cache(maxsize=CELLS_CACHE_SIZE)
+def _cells(atlas: GlyphAtlas, font_size: int, cell: str) -> NDArray[np.uint32]:
+    table = np.array([ord(" "), ord(cell)], dtype="<u4")
+    return np.repeat(table[atlas.bitmap.view(np.uint8)], font_size, axis=1)
+
+
+@lru_cache(maxsize=ATLAS_CACHE_SIZE)
+def get_atlas(font: Font) -> GlyphAtlas:
+    return GlyphAtlas(font)
+
+
+class BitmapPrinter(Printer):
+    @classmethod
+    @lru_cache(maxsize=LINE_CACHE_SIZE)
+    def _compose(
+        cls, text: str, font_size: int, symbol: str, font: Font
+    ) -> Tuple[str, ...]:
+        return get_atlas(font).render(text, font_size, symbol)
+
+    @classmethod
+    def cache_clear(cls) -> None:
+        super().cache_clear()
+        get_atlas.cache_clear()
+        _cells.cache_clear()
+
+
+if __name__ == "__main__":
+    from lab2 import Color
+
+    BitmapPrinter.print("BITMAP", Color.GREEN, (1, 1), "#", 2)
+    with BitmapPrinter(Color.CYAN, (1, 12), "♥", 1) as printer:
+        printer.print_text("LOVE")
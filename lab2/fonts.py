@@ -0,0 +1,134 @@
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterator, Mapping
+from functools import lru_cache
+from typing import List, Self, Tuple
+
+FONT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font.json")
+
+MAGIC = b"PFNT"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxH")
+ENTRY = struct.Struct("<IB")
+ROW_FORMATS = {1: "B", 2: "H", 4: "I"}
+MAX_WIDTH = 32
+
+
+def _row_size(width: int) -> int:
+    return next(size for size in ROW_FORMATS if width <= size * 8)
+
+
+class BitmapGlyphs(Mapping[str, List[str]]):
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path}: file is too short")
+        magic, version, height, row_size, count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a compiled font")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported version {version}")
+        if row_size not in ROW_FORMATS:
+            raise ValueError(f"{path}: unsupported row size {row_size}")
+        self.height = height
+        self._rows = struct.Struct(f"<{height}{ROW_FORMATS[row_size]}")
+        self._rows_offset = HEADER.size + count * ENTRY.size
+        if len(self._mmap) != self._rows_offset + count * self._rows.size:
+            raise ValueError(f"{path}: glyph table does not match header")
+        self._index: dict[str, Tuple[int, int]] = {}
+        for i, (codepoint, width) in enumerate(
+            ENTRY.iter_unpack(self._mmap[HEADER.size : self._rows_offset])
+        ):
+            self._index[chr(codepoint)] = (i, width)
+
+    def masks(self, char: str) -> Tuple[int, Tuple[int, ...]]:
+        i, width = self._index[char]
+        return width, self._rows.unpack_from(
+            self._mmap, self._rows_offset + i * self._rows.size
+        )
+
+    def __getitem__(self, char: str) -> List[str]:
+        width, rows = self.masks(char)
+        bits = range(width - 1, -1, -1)
+        return ["".join("*" if row >> bit & 1 else " " for bit in bits) for row in rows]
+
+    def __contains__(self, char: object) -> bool:
+        return char in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class Font:
+    def __init__(self, height: int, symbols: Mapping[str, List[str]]) -> None:
+        self.height = height
+        self.symbols = symbols
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> Self:
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+        if magic == MAGIC:
+            return cls.from_binary(path)
+        return cls.from_json(path)
+
+    @classmethod
+    def from_json(cls, path: str | os.PathLike) -> Self:
+        import json
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["height"], data["symbols"])
+
+    @classmethod
+    def from_binary(cls, path: str | os.PathLike) -> Self:
+        glyphs = BitmapGlyphs(path)
+        return cls(glyphs.height, glyphs)
+
+    def compile(self, path: str | os.PathLike) -> None:
+        widths = {
+            char: max((len(line) for line in pattern), default=0)
+            for char, pattern in self.symbols.items()
+        }
+        for char, pattern in self.symbols.items():
+            if widths[char] > MAX_WIDTH:
+                raise ValueError(f"Glyph {char!r} is wider than {MAX_WIDTH}")
+            if len(pattern) != self.height:
+                raise ValueError(f"Glyph {char!r} must have {self.height} rows")
+        row_size = _row_size(max(widths.values(), default=0))
+        rows = struct.Struct(f"<{self.height}{ROW_FORMATS[row_size]}")
+        entries, bitmaps = [], []
+        for char, pattern in self.symbols.items():
+            width = widths[char]
+            masks = [
+                sum(1 << (width - 1 - j) for j, c in enumerate(line) if c != " ")
+                for line in pattern
+            ]
+            entries.append(ENTRY.pack(ord(char), width))
+            bitmaps.append(rows.pack(*masks))
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.height, row_size, len(entries)))
+            f.writelines(entries)
+            f.writelines(bitmaps)
+
+
+@lru_cache()
+def get_font(path: str | os.PathLike = FONT_FILE) -> Font:
+    return Font.load(path)
+
+
+def compile_font(source: str | os.PathLike, target: str | os.PathLike) -> None:
+    Font.load(source).compile(target)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"usage: {sys.argv[0]} <font.json> <font.bin>")
+    compile_font(sys.argv[1], sys.argv[2])
@@ -1,9 +1,16 @@
-import json
-import os
+import io
+import re
+import socket
+import sys
 from enum import Enum
-from typing import Self, Tuple, List
+from functools import lru_cache
+from typing import Any, Callable, Iterator, List, Self, Tuple
 
-FONT_FILE = "font.json"
+from fonts import Font, get_font
+
+GLYPH_CACHE_SIZE = 1024
+LINE_CACHE_SIZE = 256
+WRITE_CHUNK = 1 << 16
 
 
 class Color(Enum):
@@ -16,11 +23,21 @@ class Color(Enum):
     RESET = "\033[0m"
 
 
-if not os.path.exists(FONT_FILE):
-    raise FileNotFoundError(FONT_FILE)
+def __getattr__(name: str):
+    if name == "FONT_DATA":
+        font = get_font()
+        return {"height": font.height, "symbols": dict(font.symbols)}
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-with open(FONT_FILE, "r", encoding="utf-8") as f:
-    FONT_DATA = json.load(f)
+def _writer(sink: Any, encoding: str) -> Callable[[str], Any]:
+    if isinstance(sink, bytearray):
+        return lambda data: sink.extend(data.encode(encoding))
+    if isinstance(sink, socket.socket):
+        return lambda data: sink.sendall(data.encode(encoding))
+    if isinstance(sink, (io.RawIOBase, io.BufferedIOBase)):
+        return lambda data: sink.write(data.encode(encoding))
+    return sink.write
 
 
 class Printer:
@@ -30,15 +47,29 @@ class Printer:
         position: Tuple[int, int] = (0, 0),
         symbol: str = "*",
         font_size: int = 1,
+        font: Font | None = None,
     ) -> None:
         self.color = color
         self.position = position
         self.symbol = symbol
         self.font_size = font_size
+        self.font = font
 
     def print_text(self, text: str) -> None:
         self.__class__.print(
-            text, self.color, self.position, self.symbol, self.font_size
+            text, self.color, self.position, self.symbol, self.font_size, self.font
+        )
+
+    def render_text(self, text: str, sink: Any, width: int | None = None) -> int:
+        return self.__class__.render(
+            text,
+            sink,
+            self.color,
+            self.position,
+            self.symbol,
+            self.font_size,
+            self.font,
+            width,
         )
 
     @classmethod
@@ -49,8 +80,9 @@ class Printer:
         position: Tuple[int, int] = (0, 0),
         symbol: str = "*",
         font_size: int = 1,
+        font: Font | None = None,
     ) -> None:
-        cls._render_text(text, color, position, symbol, font_size)
+        cls._render_text(text, color, position, symbol, font_size, font)
 
     @classmethod
     def _render_text(
@@ -60,27 +92,136 @@ class Printer:
         position: Tuple[int, int],
         symbol: str,
         font_size: int,
+        font: Font | None = None,
     ) -> None:
-        base_height = FONT_DATA["height"]
-        lines = ["" for _ in range(base_height * font_size)]
+        cls.render(text, sys.stdout, color, position, symbol, font_size, font)
+
+    @classmethod
+    def render(
+        cls,
+        text: str,
+        sink: Any,
+        color: Color | None = None,
+        position: Tuple[int, int] | None = None,
+        symbol: str = "*",
+        font_size: int = 1,
+        font: Font | None = None,
+        width: int | None = None,
+        encoding: str = "utf-8",
+    ) -> int:
+        write = _writer(sink, encoding)
+        chunk: List[str] = []
+        size = 0
+        if color is not None:
+            chunk.append(color.value + ("\n" if position is not None else ""))
+        count = 0
+        for count, row in enumerate(cls.rows(text, font_size, symbol, font, width), 1):
+            if position is not None:
+                row = f"\033[{position[1] + count - 1};{position[0]}H{row}"
+            chunk.append(row + "\n")
+            size += len(row) + 1
+            if size >= WRITE_CHUNK:
+                write("".join(chunk))
+                chunk, size = [], 0
+        if color is not None:
+            chunk.append(Color.RESET.value)
+        if chunk:
+            write("".join(chunk))
+        return count
+
+    @classmethod
+    def rows(
+        cls,
+        text: str,
+        font_size: int = 1,
+        symbol: str = "*",
+        font: Font | None = None,
+        width: int | None = None,
+    ) -> Iterator[str]:
+        font = font or get_font()
+        if width is None:
+            yield from cls._compose(text, font_size, symbol, font)
+            return
+        for line in cls._wrap(text, width, font_size, symbol, font):
+            yield from cls._compose(line, font_size, symbol, font)
+
+    @classmethod
+    def _wrap(
+        cls, text: str, width: int, font_size: int, symbol: str, font: Font
+    ) -> Iterator[str]:
+        if width <= 0:
+            raise ValueError("Wrap width must be positive")
+
+        def advance(char: str) -> int:
+            glyph = cls._glyph(char, font_size, symbol, font)
+            return 0 if glyph is None else len(glyph[0]) + 2 * font_size
+
+        space = advance(" ")
+        for paragraph in text.split("\n"):
+            line: List[str] = []
+            used = 0
+            for match in re.finditer(r"\S+", paragraph):
+                word = match.group().upper()
+                needed = sum(advance(char) for char in word)
+                if line and used + space + needed > width:
+                    yield " ".join(line)
+                    line, used = [], 0
+                if needed <= width:
+                    used += needed + (space if line else 0)
+                    line.append(word)
+                    continue
+                # a word wider than the whole line is split between glyphs
+                piece: List[str] = []
+                for char in word:
+                    step = advance(char)
+                    if piece and used + step > width:
+                        yield "".join(piece)
+                        piece, used = [], 0
+                    piece.append(char)
+                    used += step
+                line = ["".join(piece)]
+            yield " ".join(line)
+
+    @classmethod
+    @lru_cache(maxsize=LINE_CACHE_SIZE)
+    def _compose(
+        cls, text: str, font_size: int, symbol: str, font: Font
+    ) -> Tuple[str, ...]:
+        rows: List[List[str]] = [[] for _ in range(font.height * font_size)]
+        gap = " " * font_size * 2
 
         for char in text.upper():
-            if char not in FONT_DATA["symbols"]:
+            glyph = cls._glyph(char, font_size, symbol, font)
+            if glyph is None:
                 continue
-            char_pattern = FONT_DATA["symbols"][char]
-            scaled_pattern = cls._scale_pattern(char_pattern, font_size)
-
-            for i, line in enumerate(scaled_pattern):
-                if symbol:
-                    line = line.replace("*", symbol)
-                lines[i] += line + (" " * font_size * 2)
-
-        print(color.value, end="\n")
-        for i, line in enumerate(lines):
-            y = position[1] + i
-            x = position[0]
-            print(f"\033[{y};{x}H{line}")
-        print(Color.RESET.value, end="")
+            for row, line in zip(rows, glyph):
+                row.append(line)
+                row.append(gap)
+        return tuple("".join(row) for row in rows)
+
+    @classmethod
+    @lru_cache(maxsize=GLYPH_CACHE_SIZE)
+    def _glyph(
+        cls, char: str, font_size: int, symbol: str, font: Font
+    ) -> Tuple[str, ...] | None:
+        if char not in font.symbols:
+            return None
+        scaled_pattern = cls._scale_pattern(font.symbols[char], font_size)
+        if symbol:
+            scaled_pattern = [line.replace("*", symbol) for line in scaled_pattern]
+        return tuple(scaled_pattern)
+
+    @classmethod
+    def cache_info(cls) -> dict:
+        return {
+            "glyphs": cls._glyph.cache_info(),
+            "lines": cls._compose.cache_info(),
+        }
+
+    @classmethod
+    def cache_clear(cls) -> None:
+        cls._glyph.cache_clear()
+        cls._compose.cache_clear()
 
     @staticmethod
     def _scale_pattern(pattern: List[str], scale: int) -> List[str]:
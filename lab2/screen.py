@@ -0,0 +1,161 @@
+import shutil
+import sys
+from functools import lru_cache
+from typing import List, Self, TextIO, Tuple
+
+from fonts import Font, get_font
+from lab2 import Color, Printer
+
+# rewriting a few unchanged cells is cheaper than a "\033[row;colH" jump
+MAX_GAP = 6
+COLOR_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def _cell_colors(line: str, color: Color) -> Tuple[Color | None, ...]:
+    return tuple(None if c == " " else color for c in line)
+
+
+class Screen:
+    def __init__(
+        self,
+        width: int | None = None,
+        height: int | None = None,
+        sink: TextIO | None = None,
+    ) -> None:
+        if width is None or height is None:
+            size = shutil.get_terminal_size()
+            width = size.columns if width is None else width
+            height = size.lines if height is None else height
+        if width <= 0 or height <= 0:
+            raise ValueError("Screen size must be positive")
+        self.width = width
+        self.height = height
+        self.sink = sink
+        self._chars = self._blank_chars()
+        self._colors = self._blank_colors()
+        self._shown_chars = self._blank_chars()
+        self._shown_colors = self._blank_colors()
+
+    def _blank_chars(self) -> List[List[str]]:
+        return [[" "] * self.width for _ in range(self.height)]
+
+    def _blank_colors(self) -> List[List[Color | None]]:
+        return [[None] * self.width for _ in range(self.height)]
+
+    def clear(self) -> None:
+        self._chars = self._blank_chars()
+        self._colors = self._blank_colors()
+
+    def invalidate(self) -> None:
+        # forget what the terminal shows so the next refresh repaints everything
+        self._shown_chars = [["\0"] * self.width for _ in range(self.height)]
+
+    def print(
+        self,
+        text: str,
+        color: Color,
+        position: Tuple[int, int] = (0, 0),
+        symbol: str = "*",
+        font_size: int = 1,
+        font: Font | None = None,
+    ) -> None:
+        lines = Printer._compose(text, font_size, symbol, font or get_font())
+        self.put_lines(lines, color, position)
+
+    def print_text(self, printer: Printer, text: str) -> None:
+        self.print(
+            text,
+            printer.color,
+            printer.position,
+            printer.symbol,
+            printer.font_size,
+            printer.font,
+        )
+
+    def put_lines(
+        self,
+        lines: Tuple[str, ...] | List[str],
+        color: Color,
+        position: Tuple[int, int],
+    ) -> None:
+        # positions are terminal coordinates like in Printer, where 0 and 1 are
+        # both the first row/column
+        x, y = max(position[0] - 1, 0), max(position[1] - 1, 0)
+        for row, line in enumerate(lines, y):
+            if row >= self.height:
+                break
+            line = line[: self.width - x]
+            if not line:
+                continue
+            end = x + len(line)
+            self._chars[row][x:end] = line
+            self._colors[row][x:end] = _cell_colors(line, color)
+
+    def render(self) -> str:
+        parts: List[str] = []
+        pen: Color | None = None
+        for row in range(self.height):
+            chars, colors = self._chars[row], self._colors[row]
+            shown_chars, shown_colors = self._shown_chars[row], self._shown_colors[row]
+            if chars == shown_chars and colors == shown_colors:
+                continue
+            changed = [
+                col
+                for col, (char, shown, color, shown_color) in enumerate(
+                    zip(chars, shown_chars, colors, shown_colors)
+                )
+                if char != shown or color is not shown_color
+            ]
+            cursor = -1
+            for col in changed:
+                if (
+                    cursor < 0
+                    or col - cursor > MAX_GAP
+                    or any(colors[i] not in (None, pen) for i in range(cursor, col))
+                ):
+                    parts.append(f"\033[{row + 1};{col + 1}H")
+                elif cursor < col:
+                    parts.append("".join(chars[cursor:col]))
+                color = colors[col]
+                if color is not None and color is not pen:
+                    parts.append(color.value)
+                    pen = color
+                parts.append(chars[col])
+                cursor = col + 1
+            self._shown_chars[row] = chars.copy()
+            self._shown_colors[row] = colors.copy()
+        if pen is not None:
+            parts.append(Color.RESET.value)
+        return "".join(parts)
+
+    def refresh(self) -> int:
+        frame = self.render()
+        if frame:
+            sink = self.sink or sys.stdout
+            sink.write(frame)
+            sink.flush()
+        return len(frame)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.refresh()
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.width}x{self.height})"
+
+    __repr__ = __str__
+
+
+if __name__ == "__main__":
+    import time
+
+    screen = Screen(100, 30)
+    screen.invalidate()
+    for tick in range(20):
+        screen.print(("TICK", "TOCK")[tick % 2], Color.GREEN, (2, 2), "#", 2)
+        screen.print("LIVE" if tick % 4 < 2 else "    ", Color.RED, (2, 16), "@", 1)
+        screen.refresh()
+        time.sleep(0.1)
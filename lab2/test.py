@@ -0,0 +1,335 @@
+import io
+import os
+import socket
+
+import pytest
+from bitmap import BitmapPrinter, GlyphAtlas, get_atlas
+from fonts import FONT_FILE, BitmapGlyphs, Font, compile_font, get_font
+from lab2 import Color, FONT_DATA, Printer
+from screen import Screen
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    Printer.cache_clear()
+    BitmapPrinter.cache_clear()
+    yield
+    Printer.cache_clear()
+    BitmapPrinter.cache_clear()
+
+
+class TestPrinter:
+    def test_print(self, capsys):
+        Printer.print("AB", Color.RED, (3, 4), "#", 1)
+        output = capsys.readouterr().out
+        assert output.startswith(Color.RED.value + "\n")
+        assert output.endswith(Color.RESET.value)
+        assert "\033[4;3H" in output
+        expected = "".join(
+            line.replace("*", "#") + "  " for line in FONT_DATA["symbols"]["A"][:1]
+        )
+        assert f"\033[4;3H{expected}" in output
+
+    def test_scale_pattern(self):
+        assert Printer._scale_pattern([" *", "* "], 2) == [
+            "  **",
+            "  **",
+            "**  ",
+            "**  ",
+        ]
+        pattern = ["*"]
+        assert Printer._scale_pattern(pattern, 1) is pattern
+
+    @pytest.mark.parametrize("font_size", [1, 2, 3])
+    def test_compose(self, font_size):
+        lines = Printer._compose("ab?", font_size, "@", get_font())
+        assert len(lines) == FONT_DATA["height"] * font_size
+        assert "*" not in "".join(lines)
+        width = sum(
+            len(Printer._scale_pattern(FONT_DATA["symbols"][c], font_size)[0])
+            + 2 * font_size
+            for c in "AB"
+        )
+        assert all(len(line) == width for line in lines)
+
+    def test_glyph_cache(self, capsys):
+        for _ in range(3):
+            Printer.print("LOVE", Color.GREEN, (0, 0), "*", 2)
+        info = Printer.cache_info()
+        assert info["lines"].misses == 1
+        assert info["lines"].hits == 2
+        assert info["glyphs"].misses == 4
+        Printer.print("EVOL", Color.GREEN, (0, 0), "*", 2)
+        info = Printer.cache_info()
+        assert info["glyphs"].hits == 4
+        assert info["glyphs"].misses == 4
+
+    def test_cache_key_includes_symbol_and_size(self):
+        font = get_font()
+        assert Printer._glyph("A", 1, "#", font) != Printer._glyph("A", 1, "@", font)
+        assert Printer._glyph("A", 1, "#", font) != Printer._glyph("A", 2, "#", font)
+        assert Printer._glyph("?", 1, "#", font) is None
+        assert Printer.cache_info()["glyphs"].currsize == 4
+
+
+class TestRender:
+    TEXT = "the quick brown fox jumps over the lazy dog"
+
+    def test_rows_without_width(self):
+        assert tuple(Printer.rows("Hello", 2, "#")) == Printer._compose(
+            "Hello", 2, "#", get_font()
+        )
+
+    @pytest.mark.parametrize("font_size", [1, 2, 3])
+    def test_wrap_to_width(self, font_size):
+        width = 60 * font_size
+        rows = list(Printer.rows(self.TEXT, font_size, "#", width=width))
+        height = FONT_DATA["height"] * font_size
+        assert len(rows) % height == 0 and len(rows) > height
+        assert all(0 < len(row) <= width for row in rows)
+        lines = list(Printer._wrap(self.TEXT, width, font_size, "#", get_font()))
+        assert " ".join(lines) == self.TEXT.upper()
+        assert len(rows) == len(lines) * height
+
+    def test_wrap_splits_long_words(self):
+        lines = list(Printer._wrap("abcdefghij xy", 20, 1, "*", get_font()))
+        assert len(lines) > 2
+        assert "".join(lines).replace(" ", "") == "ABCDEFGHIJXY"
+        assert all(
+            len(row) <= 20 for row in Printer.rows("abcdefghij xy", 1, "*", width=20)
+        )
+
+    def test_wrap_keeps_paragraphs(self):
+        lines = list(Printer._wrap("ab\n\ncd", 100, 1, "*", get_font()))
+        assert lines == ["AB", "", "CD"]
+        with pytest.raises(ValueError):
+            list(Printer._wrap("ab", 0, 1, "*", get_font()))
+
+    def test_render_matches_print(self, capsys):
+        Printer.print("HELLO", Color.BLUE, (2, 3), "#", 2)
+        expected = capsys.readouterr().out
+        sink = io.StringIO()
+        assert Printer.render("HELLO", sink, Color.BLUE, (2, 3), "#", 2) == 10
+        assert sink.getvalue() == expected
+
+    def test_plain_render(self):
+        sink = io.StringIO()
+        Printer.render(self.TEXT, sink, Color.RED, symbol="#", width=80)
+        output = sink.getvalue()
+        assert output.startswith(Color.RED.value + " ")
+        assert output.count("\033[") == 2
+        rows = list(Printer.rows(self.TEXT, 1, "#", width=80))
+        assert output.count("\n") == len(rows)
+
+    def test_render_text(self):
+        sink = io.StringIO()
+        printer = Printer(Color.RED, (4, 5), "#", 1)
+        assert printer.render_text("AB", sink, width=80) == FONT_DATA["height"]
+        assert "\033[5;4H" in sink.getvalue()
+
+    def test_bytes_sinks(self, tmp_path):
+        expected = io.StringIO()
+        Printer.render(self.TEXT, expected, symbol="●", width=100)
+        expected = expected.getvalue().encode()
+
+        buffer = bytearray()
+        Printer.render(self.TEXT, buffer, symbol="●", width=100)
+        assert bytes(buffer) == expected
+
+        stream = io.BytesIO()
+        Printer.render(self.TEXT, stream, symbol="●", width=100)
+        assert stream.getvalue() == expected
+
+        path = tmp_path / "banner.txt"
+        with open(path, "wb") as f:
+            Printer.render(self.TEXT, f, symbol="●", width=100)
+        assert path.read_bytes() == expected
+
+        left, right = socket.socketpair()
+        with left, right:
+            Printer.render("HI", left, symbol="●")
+            left.shutdown(socket.SHUT_WR)
+            received = b"".join(iter(lambda: right.recv(4096), b""))
+        plain = io.StringIO()
+        Printer.render("HI", plain, symbol="●")
+        assert received == plain.getvalue().encode()
+
+    def test_large_render_is_chunked(self):
+        sink = CountingSink()
+        rows = Printer.render(self.TEXT * 200, sink, symbol="#", width=200)
+        assert sink.writes > 1
+        assert sink.getvalue().count("\n") == rows
+
+    def test_rows_are_lazy(self):
+        rows = Printer.rows(self.TEXT * 1000, 1, "#", width=100)
+        assert len(next(rows)) <= 100
+        assert Printer.cache_info()["lines"].currsize == 1
+
+
+class TestFont:
+    @pytest.fixture
+    def compiled(self, tmp_path):
+        path = tmp_path / "font.bin"
+        compile_font(FONT_FILE, path)
+        return path
+
+    def test_json_font(self):
+        font = Font.from_json(FONT_FILE)
+        assert font.height == FONT_DATA["height"]
+        assert font.symbols == FONT_DATA["symbols"]
+
+    def test_compiled_round_trip(self, compiled):
+        font = Font.load(compiled)
+        assert isinstance(font.symbols, BitmapGlyphs)
+        assert font.height == FONT_DATA["height"]
+        assert dict(font.symbols) == FONT_DATA["symbols"]
+        assert "?" not in font.symbols
+
+    def test_compiled_font_is_compact(self, compiled):
+        assert compiled.stat().st_size < os.path.getsize(FONT_FILE) / 4
+
+    def test_printer_with_compiled_font(self, compiled, capsys):
+        Printer.print("HELLO", Color.BLUE, (1, 1), "#", 2)
+        expected = capsys.readouterr().out
+        with Printer(Color.BLUE, (1, 1), "#", 2, Font.load(compiled)) as printer:
+            printer.print_text("HELLO")
+        assert capsys.readouterr().out == expected + Color.RESET.value
+
+    @pytest.mark.parametrize("data", [b"", b"PFNT", b"PFNT\x02\x05\x00\x00"])
+    def test_invalid_compiled_font(self, tmp_path, data):
+        path = tmp_path / "broken.bin"
+        path.write_bytes(data)
+        with pytest.raises(ValueError):
+            BitmapGlyphs(path)
+
+    def test_missing_font_is_lazy(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            get_font(str(tmp_path / "missing.json"))
+
+
+class TestBitmapPrinter:
+    @pytest.mark.parametrize("font_size", range(1, 9))
+    @pytest.mark.parametrize("symbol", ["*", "#", "●", "", "<>"])
+    def test_matches_string_engine(self, font_size, symbol):
+        font = get_font()
+        for text in ["", "?", "Hello, World", "straße", "THE QUICK BROWN FOX" * 20]:
+            assert BitmapPrinter._compose(
+                text, font_size, symbol, font
+            ) == Printer._compose(text, font_size, symbol, font)
+
+    def test_compiled_font(self, tmp_path):
+        compile_font(FONT_FILE, tmp_path / "font.bin")
+        compiled = Font.load(tmp_path / "font.bin")
+        assert BitmapPrinter._compose("LOVE", 3, "#", compiled) == Printer._compose(
+            "LOVE", 3, "#", get_font()
+        )
+
+    def test_print_output(self, capsys):
+        Printer.print("HELLO", Color.BLUE, (1, 1), "#", 2)
+        expected = capsys.readouterr().out
+        BitmapPrinter.print("HELLO", Color.BLUE, (1, 1), "#", 2)
+        assert capsys.readouterr().out == expected
+
+    def test_compose_array(self):
+        atlas = get_atlas(get_font())
+        bits = atlas.compose("AB?", 3)
+        lines = Printer._compose("AB?", 1, "*", get_font())
+        assert bits.shape == (len(lines), len(lines[0]) * 3)
+        assert bits[:, ::3].tolist() == [[c == "*" for c in line] for line in lines]
+
+    def test_irregular_glyph(self):
+        with pytest.raises(ValueError):
+            GlyphAtlas(Font(2, {"A": ["**", "*"]}))
+        with pytest.raises(ValueError):
+            GlyphAtlas(Font(1, {"A": ["#"]}))
+
+
+class CountingSink(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+class TestScreen:
+    @pytest.fixture
+    def sink(self):
+        return CountingSink()
+
+    def test_first_frame_is_one_write(self, sink):
+        screen = Screen(80, 20, sink)
+        screen.print("AB", Color.RED, (3, 4), "#", 2)
+        screen.print("C", Color.BLUE, (30, 4), "@", 1)
+        assert screen.refresh() > 0
+        frame = sink.getvalue()
+        assert sink.writes == 1
+        assert Color.RED.value in frame and Color.BLUE.value in frame
+        assert frame.endswith(Color.RESET.value)
+        assert frame.startswith("\033[4;")
+
+    def test_color_is_emitted_once_per_run(self, sink):
+        screen = Screen(80, 20, sink)
+        screen.print("LOVE", Color.MAGENTA, (1, 1), "#", 3)
+        screen.refresh()
+        assert sink.getvalue().count(Color.MAGENTA.value) == 1
+
+    def test_unchanged_frame_writes_nothing(self, sink):
+        screen = Screen(80, 20, sink)
+        screen.print("AB", Color.RED, (1, 1), "#", 2)
+        screen.refresh()
+        screen.print("AB", Color.RED, (1, 1), "#", 2)
+        assert screen.refresh() == 0
+        assert sink.writes == 1
+
+    def test_only_changed_cells_are_emitted(self, sink):
+        screen = Screen(80, 20, sink)
+        screen.print("AAAA", Color.RED, (1, 1), "#", 1)
+        screen.refresh()
+        full = len(sink.getvalue())
+        screen.print("AAAB", Color.RED, (1, 1), "#", 1)
+        screen.refresh()
+        diff = sink.getvalue()[full:]
+        assert 0 < len(diff) < full / 2
+        width = len(Printer._compose("AAA", 1, "#", get_font())[0])
+        assert diff.startswith("\033[")
+        assert all(f";{col}H" not in diff for col in range(1, width))
+
+    def test_color_change_repaints(self, sink):
+        screen = Screen(40, 10, sink)
+        screen.print("A", Color.RED, (1, 1), "#", 1)
+        screen.refresh()
+        screen.print("A", Color.GREEN, (1, 1), "#", 1)
+        screen.refresh()
+        assert sink.writes == 2
+        assert Color.GREEN.value in sink.getvalue()
+
+    def test_matches_printer_layout(self, sink):
+        screen = Screen(80, 20, sink)
+        screen.print("HI", Color.CYAN, (2, 3), "*", 1)
+        lines = Printer._compose("HI", 1, "*", get_font())
+        for row, line in enumerate(lines, 2):
+            assert "".join(screen._chars[row][1 : 1 + len(line)]) == line
+
+    def test_clipping_and_clear(self, sink):
+        screen = Screen(5, 2, sink)
+        screen.print("WIDE", Color.RED, (3, 1), "#", 3)
+        screen.refresh()
+        assert all(len(row) == 5 for row in screen._chars)
+        screen.clear()
+        screen.refresh()
+        assert "#" not in "".join(map("".join, screen._shown_chars))
+
+    def test_invalidate_repaints(self, sink):
+        screen = Screen(10, 3, sink)
+        screen.refresh()
+        assert sink.writes == 0
+        screen.invalidate()
+        screen.refresh()
+        assert sink.getvalue().count(" ") == 30
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            Screen(0, 10)
@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full
+from typing import Callable, List, Self
+
+from lab3 import Logger, LogHandlerProtocol, LogRecord
+
+SHIP_BATCH = 512
+SHIP_INTERVAL = 0.1
+QUEUE_SIZE = 1024
+
+
+class QueueHandler(LogHandlerProtocol):
+    def __init__(
+        self,
+        queue: multiprocessing.Queue,
+        batch_size: int = SHIP_BATCH,
+        flush_interval: float = SHIP_INTERVAL,
+    ) -> None:
+        self.queue = queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.errors = 0
+        self.dropped = 0
+        self._batch: List[str | LogRecord] = []
+        self._flusher: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def handle(self, text: str | LogRecord) -> None:
+        await self.handle_batch([text])
+
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
+        self._batch.extend(texts)
+        if self._flusher is None and self.flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> None:
+        # one flush at a time keeps batches in order while one waits for room,
+        # and lets aclose() wait for a put already in flight
+        async with self._lock:
+            if not self._batch:
+                return
+            # one pickled list per batch, pickling and the pipe write itself
+            # happen on the queue's feeder thread
+            batch, self._batch = self._batch, []
+            try:
+                try:
+                    self.queue.put_nowait(batch)
+                except Full:
+                    # the aggregator is behind, wait for room off the loop
+                    await asyncio.to_thread(self.queue.put, batch)
+            except Exception as e:
+                self.errors += 1
+                self.dropped += len(batch)
+                sys.stderr.write(f"QueueHandler error: {e}\n")
+
+    async def aclose(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
+async def _drain(records: multiprocessing.Queue, build: Callable[[], Logger]) -> None:
+    logger = build()
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        while True:
+            batch = await loop.run_in_executor(reader, records.get)
+            if batch is None:
+                break
+            await logger.log_many(batch)
+    await logger.aclose()
+    for handler in logger.handlers:
+        aclose = getattr(handler, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _aggregate(records: multiprocessing.Queue, build: Callable[[], Logger]) -> None:
+    asyncio.run(_drain(records, build))
+
+
+class Aggregator:
+    def __init__(
+        self,
+        build: Callable[[], Logger],
+        queue_size: int = QUEUE_SIZE,
+        start_method: str | None = None,
+    ) -> None:
+        # the Logger is built inside the aggregator process, so build has to be
+        # picklable (a module level function or a functools.partial of one)
+        context = multiprocessing.get_context(start_method)
+        self.queue = context.Queue(queue_size)
+        self._process = context.Process(
+            target=_aggregate, args=(self.queue, build), daemon=True
+        )
+        self._closed = False
+
+    def start(self) -> None:
+        self._process.start()
+
+    def handler(
+        self, batch_size: int = SHIP_BATCH, flush_interval: float = SHIP_INTERVAL
+    ) -> QueueHandler:
+        return QueueHandler(self.queue, batch_size, flush_interval)
+
+    def close(self, timeout: float | None = None) -> None:
+        # producers must be finished first, anything they queue after the
+        # sentinel is never read
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            sys.stderr.write("Aggregator failed to drain queued logs\n")
+            self._process.terminate()
+        self.queue.close()
+
+    @property
+    def exitcode(self) -> int | None:
+        return self._process.exitcode
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
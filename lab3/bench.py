@@ -0,0 +1,528 @@
+import asyncio
+import contextlib
+import functools
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+from aggregator import Aggregator, QueueHandler
+from filters import compile_filters
+from lab3 import (
+    DispatchMode,
+    FileHandler,
+    LevelFilter,
+    LogRecord,
+    Logger,
+    OverflowPolicy,
+    ReLogFilter,
+    SimpleLogFilter,
+    SocketHandler,
+    SyslogHandler,
+)
+from logindex import LogIndex
+from throttle import Deduplicate, RateLimit, Sample
+
+
+def measure(func: Callable[[], Awaitable[object]]) -> float:
+    start = time.perf_counter()
+    asyncio.run(func())
+    return time.perf_counter() - start
+
+
+def measure_sync(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_file(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+    with tempfile.TemporaryDirectory() as directory:
+
+        async def write(handler: FileHandler) -> None:
+            for message in messages:
+                await handler.handle(message)
+            await handler.aclose()
+
+        cases = {
+            "per line": FileHandler(os.path.join(directory, "plain.txt")),
+            "buffered": FileHandler(os.path.join(directory, "buffered.txt"), True),
+        }
+        print(f"lines={lines:>10,}")
+        for name, handler in cases.items():
+            elapsed = measure(lambda: write(handler))
+            print(f"  {name:<10} {lines / elapsed:12,.0f} lines/s")
+
+
+def bench_rotate(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+    with tempfile.TemporaryDirectory() as directory:
+
+        def run(name: str, **rotation) -> Callable[[], Awaitable[None]]:
+            async def write() -> None:
+                stalls = [0.0]
+                stop = asyncio.Event()
+
+                async def watch() -> None:
+                    # the longest the loop went without running this task
+                    while not stop.is_set():
+                        start = time.perf_counter()
+                        await asyncio.sleep(0)
+                        stalls[0] = max(stalls[0], time.perf_counter() - start)
+
+                watcher = asyncio.create_task(watch())
+                path = os.path.join(directory, f"{name}.txt")
+                async with FileHandler(path, True, **rotation) as handler:
+                    for message in messages:
+                        await handler.handle(message)
+                stop.set()
+                await watcher
+                stall.append(stalls[0])
+
+            return write
+
+        cases = {
+            "none": {},
+            "rotate": {"max_bytes": 1 << 20, "backup_count": 1000},
+            "gzip": {"max_bytes": 1 << 20, "backup_count": 1000, "compress": True},
+        }
+        print(f"lines={lines:>10,}")
+        for name, rotation in cases.items():
+            stall: list[float] = []
+            elapsed = measure(run(name, **rotation))
+            print(
+                f"  {name:<8} {lines / elapsed:12,.0f} lines/s  "
+                f"max loop stall {stall[0] * 1e3:7.2f} ms"
+            )
+
+
+def bench_record(lines: int) -> None:
+    levels = ["DEBUG"] * 8 + ["INFO", "ERROR"]
+    messages = [f"{levels[i % 10]}: request {i} served" for i in range(lines)]
+    with tempfile.TemporaryDirectory() as directory:
+
+        def run(
+            level: str, handlers: int, make: Callable[[str], object]
+        ) -> Callable[[], Awaitable[None]]:
+            async def log() -> None:
+                sinks = [
+                    FileHandler(os.path.join(directory, f"{i}.txt"), True)
+                    for i in range(handlers)
+                ]
+                logger = Logger([LevelFilter(level)], sinks)
+                for message in messages:
+                    await logger.log(make(message))
+                for sink in sinks:
+                    await sink.aclose()
+
+            return log
+
+        print(f"lines={lines:>10,}")
+        for case, level, handlers in (("10% kept", "INFO", 3), ("fan-out", "", 8)):
+            for name, make in (("str", str), ("LogRecord", LogRecord)):
+                elapsed = measure(run(level, handlers, make))
+                print(f"  {case:<9} {name:<10} {lines / elapsed:12,.0f} lines/s")
+
+
+def bench_storm(lines: int) -> None:
+    messages = [
+        f"INFO: request {i} served" if i % 100 == 0 else "ERROR: db connection lost"
+        for i in range(lines)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+
+        def run(name: str, stages: list) -> Callable[[], Awaitable[None]]:
+            async def log() -> None:
+                path = os.path.join(directory, f"{name}.txt")
+                async with FileHandler(path, True) as handler:
+                    logger = Logger([], [handler], stages=stages)
+                    for message in messages:
+                        await logger.log(message)
+                    await logger.aclose()
+                written.append(count_file_lines(path))
+
+            return log
+
+        cases = {
+            "none": [],
+            "dedupe": [Deduplicate(1.0)],
+            "rate": [RateLimit(1000, level="ERROR")],
+            "sample": [Sample(0.01, level="ERROR")],
+        }
+        print(f"lines={lines:>10,}")
+        for name, stages in cases.items():
+            written: list[int] = []
+            elapsed = measure(run(name, stages))
+            print(
+                f"  {name:<8} {lines / elapsed:12,.0f} lines/s  "
+                f"{written[0]:>10,} lines written"
+            )
+
+
+def bench_metrics(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+    filters = [LevelFilter("INFO"), SimpleLogFilter("served")]
+
+    def run(enabled: bool, many: bool) -> Callable[[], Awaitable[None]]:
+        async def log() -> None:
+            logger = Logger(filters, [PlainHandler()], metrics=enabled)
+            if many:
+                await logger.log_many(messages)
+            else:
+                for message in messages:
+                    await logger.log(message)
+
+        return log
+
+    print(f"lines={lines:>10,}")
+    for name, many in (("log", False), ("log_many", True)):
+        off = measure(run(False, many)) / lines
+        on = measure(run(True, many)) / lines
+        print(
+            f"  {name:<9} off {off * 1e9:8.0f} ns  on {on * 1e9:8.0f} ns  "
+            f"overhead {(on - off) * 1e9:6.0f} ns/line"
+        )
+
+
+class PlainHandler:
+    async def handle(self, text: str) -> None:
+        pass
+
+    async def handle_batch(self, texts: list[str]) -> None:
+        pass
+
+
+def bench_index(lines: int) -> None:
+    levels = ["INFO"] * 6 + ["WARNING"] * 3 + ["ERROR"]
+    records = [
+        LogRecord(
+            f"{levels[i % 10]}: request {i} served in {i % 97} ms",
+            created=1_700_000_000 + i // 100,
+        )
+        for i in range(lines)
+    ]
+    stamps = [record.line[1:20] for record in records]
+    since, until = stamps[lines // 2], stamps[lines // 2 + 1000]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "all_logs.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(record.line for record in records)
+
+        def scan(keep: Callable[[str], bool]) -> Callable[[], int]:
+            def run() -> int:
+                with open(path, encoding="utf-8") as f:
+                    return sum(1 for line in f if keep(line))
+
+            return run
+
+        index = LogIndex(path)
+        build = measure_sync(index.update)
+        size = os.path.getsize(path)
+        print(
+            f"lines={lines:>10,}  build {build * 1e3:8.1f} ms "
+            f"({size / build / 2**20:6.1f} MiB/s)  index "
+            f"{os.path.getsize(index.index_path) / size:5.1%} of log"
+        )
+        cases = {
+            "1000 lines": (
+                lambda: index.count(since=since, until=until),
+                scan(lambda line: since <= line[1:20] < until),
+            ),
+            "level": (
+                lambda: index.count(level="ERROR"),
+                scan(lambda line: line[22:].startswith("ERROR")),
+            ),
+            "grep": (
+                lambda: index.count(contains="request 4242 "),
+                scan(lambda line: "request 4242 " in line),
+            ),
+        }
+        for name, (indexed, linear) in cases.items():
+            assert indexed() == linear()
+            before, after = measure_sync(linear), measure_sync(indexed)
+            print(
+                f"  {name:<10} scan {before * 1e3:8.1f} ms  "
+                f"index {after * 1e3:8.2f} ms  x{before / after:8.1f}"
+            )
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(record.line for record in records[:1000])
+        print(f"  append 1000 lines, update {measure_sync(index.update) * 1e3:6.2f} ms")
+
+
+def receive_datagrams(sock: socket.socket, received: "multiprocessing.Value") -> None:
+    # a separate process, like a real syslog daemon, that stops once the
+    # sender has gone quiet
+    sock.settimeout(5.0)
+    try:
+        while True:
+            sock.recv(65536)
+            received.value += 1
+            sock.settimeout(0.5)
+    except socket.timeout:
+        pass
+
+
+def bench_syslog(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+
+    def run(target: object) -> Callable[[], Awaitable[None]]:
+        async def send() -> None:
+            handler = SyslogHandler(target, policy=OverflowPolicy.BLOCK)
+            for message in messages:
+                await handler.handle(message)
+            await handler.aclose()
+
+        return send
+
+    with tempfile.TemporaryDirectory() as directory:
+        cases = {
+            "stderr": (None, None),
+            "udp": (socket.AF_INET, ("127.0.0.1", 0)),
+            "unix": (socket.AF_UNIX, os.path.join(directory, "syslog.sock")),
+        }
+        print(f"lines={lines:>10,}")
+        for name, (family, address) in cases.items():
+            received = multiprocessing.Value("q", lines)
+            target, receiver = None, None
+            if family is not None:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+                sock.bind(address)
+                target = sock.getsockname()
+                received.value = 0
+                receiver = multiprocessing.Process(
+                    target=receive_datagrams, args=(sock, received)
+                )
+                receiver.start()
+                sock.close()
+            # stderr is line buffered, so the baseline pays one write per line
+            with open(os.devnull, "w", buffering=1) as devnull:
+                with contextlib.redirect_stderr(devnull):
+                    elapsed = measure(run(target))
+            if receiver is not None:
+                receiver.join()
+            print(
+                f"  {name:<7} {lines / elapsed:12,.0f} lines/s  "
+                f"{received.value / lines:7.1%} received"
+            )
+
+
+async def count_lines(lines: int, send: Callable[[int], Awaitable[None]]) -> None:
+    received = 0
+    done = asyncio.Event()
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal received
+        async for _ in reader:
+            received += 1
+            if received == lines:
+                done.set()
+        writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    await send(server.sockets[0].getsockname()[1])
+    await done.wait()
+    server.close()
+
+
+def bench_socket(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+
+    def run(persistent: bool) -> Callable[[], Awaitable[None]]:
+        async def send(port: int) -> None:
+            handler = SocketHandler("127.0.0.1", port, persistent)
+            for message in messages:
+                await handler.handle(message)
+            await handler.aclose()
+
+        return lambda: count_lines(lines, send)
+
+    print(f"lines={lines:>10,}")
+    for name, persistent in (("per line", False), ("persistent", True)):
+        elapsed = measure(run(persistent))
+        print(f"  {name:<10} {lines / elapsed:12,.0f} lines/s")
+
+
+def bench_logger(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+    with tempfile.TemporaryDirectory() as directory:
+
+        def run(mode: DispatchMode) -> Callable[[], Awaitable[None]]:
+            async def log() -> None:
+                slow = FileHandler(os.path.join(directory, f"{mode.value}.txt"))
+                fast = FileHandler(os.path.join(directory, "fast.txt"), True)
+                logger = Logger([], [slow, fast], mode, queue_size=lines)
+                start = time.perf_counter()
+                for message in messages:
+                    await logger.log(message)
+                latency.append((time.perf_counter() - start) / lines)
+                await logger.aclose()
+                await fast.aclose()
+
+            return log
+
+        print(f"lines={lines:>10,}")
+        for mode in DispatchMode:
+            latency: list[float] = []
+            elapsed = measure(run(mode))
+            print(
+                f"  {mode.value:<10} log() {latency[0] * 1e6:9.1f} us  "
+                f"drained {lines / elapsed:10,.0f} lines/s"
+            )
+
+
+async def aiter_lines(lines: list[str]):
+    for line in lines:
+        yield line
+
+
+def bench_batch(lines: int) -> None:
+    messages = [f"INFO: request {i} served in {i % 97} ms" for i in range(lines)]
+    with tempfile.TemporaryDirectory() as directory:
+
+        def run(name: str) -> Callable[[], Awaitable[None]]:
+            async def log() -> None:
+                handler = FileHandler(os.path.join(directory, f"{name}.txt"), True)
+                logger = Logger([LevelFilter("INFO")], [handler])
+                if name == "log":
+                    for message in messages:
+                        await logger.log(message)
+                elif name == "log_many":
+                    await logger.log_many(messages)
+                else:
+                    await logger.log_stream(aiter_lines(messages))
+                await handler.aclose()
+
+            return log
+
+        print(f"lines={lines:>10,}")
+        for name in ("log", "log_many", "log_stream"):
+            elapsed = measure(run(name))
+            print(f"  {name:<10} {lines / elapsed:12,.0f} lines/s")
+
+
+def bench_filters(count: int) -> None:
+    tags = [f"<tag{i}>" for i in range(count)]
+    context = " ".join(tags)
+    levels = ["INFO", "ERROR", "WARNING", "DEBUG"]
+    lines = [
+        f"{levels[i % 4]}: svc{i % 50} request {i} took {i % 500} ms {context}"
+        for i in range(10**4)
+    ]
+    routes = {
+        "levels": [LevelFilter("ERR"), SimpleLogFilter("ERROR"), LevelFilter("ERROR")],
+        "duplicates": [SimpleLogFilter("request")] * count + [SimpleLogFilter("svc7 ")],
+        "distinct": [SimpleLogFilter(tag) for tag in tags] + [SimpleLogFilter("svc7 ")],
+        "mixed": [ReLogFilter(r"\d+ ms"), ReLogFilter("request")]
+        + [SimpleLogFilter(tag) for tag in tags]
+        + [LevelFilter("WARNING")],
+    }
+    print(f"filters={count:>6,}")
+    for name, filters in routes.items():
+        chain = compile_filters(filters)
+
+        def plain() -> int:
+            return sum(all(f.match(line) for f in filters) for line in lines)
+
+        def compiled() -> int:
+            return sum(chain.match(line) for line in lines)
+
+        assert plain() == compiled()
+        before = measure_sync(plain) / len(lines)
+        after = measure_sync(compiled) / len(lines)
+        print(
+            f"  {name:<11} {len(filters):>5} -> {len(chain.stages):>3} stages  "
+            f"chain {before * 1e9:8.0f} ns  compiled {after * 1e9:8.0f} ns  "
+            f"x{before / after:6.1f}"
+        )
+
+
+PRODUCER_RECORDS = 10**4
+
+
+def produce_direct(path: str, n: int) -> None:
+    async def run() -> None:
+        async with FileHandler(path, True) as handler:
+            for i in range(PRODUCER_RECORDS):
+                await handler.handle(f"INFO: producer {n} request {i} served")
+
+    asyncio.run(run())
+
+
+def produce_queued(records: multiprocessing.Queue, n: int) -> None:
+    async def run() -> None:
+        async with QueueHandler(records) as handler:
+            for i in range(PRODUCER_RECORDS):
+                await handler.handle(f"INFO: producer {n} request {i} served")
+
+    asyncio.run(run())
+
+
+def build_logger(path: str) -> Logger:
+    return Logger([LevelFilter("INFO")], [FileHandler(path, True)])
+
+
+def count_file_lines(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def bench_aggregate(producers: int) -> None:
+    records = producers * PRODUCER_RECORDS
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "all_logs.txt")
+
+        def run(target: Callable[..., None], sink: object) -> None:
+            processes = [
+                multiprocessing.Process(target=target, args=(sink, n))
+                for n in range(producers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+        def direct() -> None:
+            run(produce_direct, path)
+
+        def aggregated() -> None:
+            with Aggregator(functools.partial(build_logger, path)) as aggregator:
+                run(produce_queued, aggregator.queue)
+
+        print(f"producers={producers:>3}")
+        for name, func in (("direct", direct), ("aggregated", aggregated)):
+            if os.path.exists(path):
+                os.remove(path)
+            elapsed = measure_sync(func)
+            assert count_file_lines(path) == records
+            print(f"  {name:<10} {records / elapsed:12,.0f} records/s")
+
+
+BENCHMARKS: dict[str, tuple[Callable[[int], None], list[int]]] = {
+    "file": (bench_file, [10**3, 10**4]),
+    "rotate": (bench_rotate, [10**5, 10**6]),
+    "record": (bench_record, [10**5, 10**6]),
+    "storm": (bench_storm, [10**5, 10**6]),
+    "metrics": (bench_metrics, [10**5]),
+    "index": (bench_index, [10**5, 10**6]),
+    "syslog": (bench_syslog, [10**4, 10**5]),
+    "socket": (bench_socket, [10**3, 10**4]),
+    "logger": (bench_logger, [10**3, 10**4]),
+    "filters": (bench_filters, [10, 100, 500]),
+    "batch": (bench_batch, [10**4, 10**5]),
+    "aggregate": (bench_aggregate, [1, 2, 4, 8, 16, 32]),
+}
+
+
+if __name__ == "__main__":
+    names = [arg for arg in sys.argv[1:] if arg in BENCHMARKS] or list(BENCHMARKS)
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    for name in names:
+        bench, default_sizes = BENCHMARKS[name]
+        print(f"# {name}")
+        for size in sizes or default_sizes:
+            bench(size)
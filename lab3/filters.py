@@ -0,0 +1,150 @@
+import re
+import time
+from typing import Callable, Iterable, List
+
+from lab3 import (
+    LevelFilter,
+    LogFilterProtocol,
+    LogRecord,
+    ReLogFilter,
+    SimpleLogFilter,
+)
+
+PROFILE_EVERY = 64
+REORDER_EVERY = 16
+
+
+class FilterStage:
+    __slots__ = ("name", "test", "runs", "rejects", "cost_ns")
+
+    def __init__(self, name: str, test: Callable[[str], object]) -> None:
+        self.name = name
+        self.test = test
+        self.runs = 0
+        self.rejects = 0
+        self.cost_ns = 0
+
+    @property
+    def reject_rate(self) -> float:
+        return self.rejects / self.runs if self.runs else 0.0
+
+    @property
+    def mean_cost_ns(self) -> float:
+        return self.cost_ns / self.runs if self.runs else 0.0
+
+    def rank(self) -> float:
+        # cheapest expected cost per rejected line first, the optimal order for
+        # a conjunction of independent predicates
+        if not self.runs:
+            return 0.0
+        return self.mean_cost_ns / max(self.reject_rate, 1e-6)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name} (reject {self.reject_rate:.1%}, {self.mean_cost_ns:.0f} ns)"
+        )
+
+    __repr__ = __str__
+
+
+def _is_literal(regex: re.Pattern) -> bool:
+    return regex.flags == re.UNICODE and re.escape(regex.pattern) == regex.pattern
+
+
+class FilterChain(LogFilterProtocol):
+    def __init__(
+        self,
+        filters: Iterable[LogFilterProtocol],
+        profile_every: int = PROFILE_EVERY,
+    ) -> None:
+        self.profile_every = profile_every
+        self.never = False
+        levels: List[str] = []
+        patterns: List[str] = []
+        stages: List[FilterStage] = []
+        for f in filters:
+            if isinstance(f, LevelFilter):
+                levels.append(f.level)
+            elif isinstance(f, SimpleLogFilter):
+                patterns.append(f.pattern)
+            elif isinstance(f, ReLogFilter) and _is_literal(f.regex):
+                patterns.append(f.regex.pattern)
+            elif isinstance(f, ReLogFilter):
+                stages.append(FilterStage(f"re {f.regex.pattern!r}", f.regex.search))
+            else:
+                stages.append(FilterStage(repr(f), f.match))
+
+        level = max(levels, key=len, default="")
+        if any(not level.startswith(other) for other in levels):
+            self.never = True
+        if level:
+            stages.append(
+                FilterStage(f"level {level!r}", lambda text: text.startswith(level))
+            )
+        for pattern in self._fold(patterns, level):
+            stages.append(
+                FilterStage(f"contains {pattern!r}", lambda text, p=pattern: p in text)
+            )
+        self.stages = stages
+        self._tests = [stage.test for stage in stages]
+        self._calls = 0
+        self._profiled = 0
+
+    @staticmethod
+    def _fold(patterns: List[str], level: str) -> List[str]:
+        # a pattern inside the required level prefix or inside another required
+        # pattern is implied by it and never rejects anything on its own
+        unique = sorted(set(patterns), key=len, reverse=True)
+        kept: List[str] = []
+        for pattern in unique:
+            if pattern in level or any(pattern in longer for longer in kept):
+                continue
+            kept.append(pattern)
+        return kept
+
+    def match(self, text: str | LogRecord) -> bool:
+        if self.never:
+            return False
+        # the stages are compiled for plain text, custom filters included
+        if isinstance(text, LogRecord):
+            text = text.text
+        self._calls += 1
+        if self.profile_every and self._calls % self.profile_every == 0:
+            return self._profile(text)
+        for test in self._tests:
+            if not test(text):
+                return False
+        return True
+
+    def _profile(self, text: str) -> bool:
+        # every stage runs on sampled lines so that stages late in the chain get
+        # unbiased statistics too
+        matched = True
+        clock = time.perf_counter_ns
+        for stage in self.stages:
+            start = clock()
+            passed = stage.test(text)
+            stage.cost_ns += clock() - start
+            stage.runs += 1
+            if not passed:
+                stage.rejects += 1
+                matched = False
+        self._profiled += 1
+        if self._profiled % REORDER_EVERY == 0:
+            self.reorder()
+        return matched
+
+    def reorder(self) -> None:
+        self.stages.sort(key=FilterStage.rank)
+        self._tests = [stage.test for stage in self.stages]
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.stages})"
+
+    __repr__ = __str__
+
+
+def compile_filters(
+    filters: Iterable[LogFilterProtocol], profile_every: int = PROFILE_EVERY
+) -> FilterChain:
+    return FilterChain(filters, profile_every)
@@ -1,20 +1,93 @@
-from typing import Protocol, List
+from typing import AsyncIterable, Iterable, Protocol, List, Self, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import os
 import re
+import shutil
+import socket
 import sys
+import time
 from datetime import datetime
+from enum import Enum
+from functools import lru_cache
 import aiofiles
 import asyncio
 
+from metrics import LoggerMetrics
+
+LEVEL = re.compile(r"[A-Z]*")
+STAMP = re.compile(r"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ")
+STAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+STAMP_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=STAMP_CACHE_SIZE)
+def format_timestamp(second: int) -> str:
+    return datetime.fromtimestamp(second).strftime(STAMP_FORMAT)
+
+
+class LogRecord:
+    __slots__ = ("text", "created", "_level", "_line")
+
+    def __init__(self, text: str, created: float | None = None) -> None:
+        self.text = text
+        self.created = time.time() if created is None else created
+        self._level: str | None = None
+        self._line: str | None = None
+
+    @classmethod
+    def parse(cls, line: str) -> "LogRecord":
+        # the inverse of line, for records read back from a log file
+        line = line.rstrip("\n")
+        stamp = STAMP.match(line)
+        if stamp is None:
+            return cls(line)
+        created = datetime.strptime(stamp.group(1), STAMP_FORMAT).timestamp()
+        return cls(line[stamp.end() :], created)
+
+    @property
+    def level(self) -> str:
+        if self._level is None:
+            self._level = LEVEL.match(self.text).group()
+        return self._level
+
+    @property
+    def line(self) -> str:
+        # formatted on first use and shared by every handler that writes it
+        if self._line is None:
+            self._line = f"[{format_timestamp(int(self.created))}] {self.text}\n"
+        return self._line
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self.text
+
+    def __reduce__(self):
+        return LogRecord, (self.text, self.created)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.text!r}, {self.created!r})"
+
+
+def as_record(text: str | LogRecord) -> LogRecord:
+    return text if isinstance(text, LogRecord) else LogRecord(text)
+
+
+def text_of(text: str | LogRecord) -> str:
+    return text if isinstance(text, str) else text.text
+
 
 class LogFilterProtocol(Protocol):
-    def match(self, text: str) -> bool: ...
+    def match(self, text: str | LogRecord) -> bool: ...
 
 
 class SimpleLogFilter(LogFilterProtocol):
     def __init__(self, pattern: str) -> None:
         self.pattern = pattern
 
-    def match(self, text: str) -> bool:
+    def match(self, text: str | LogRecord) -> bool:
         return self.pattern in text
 
 
@@ -22,99 +95,828 @@ class ReLogFilter(LogFilterProtocol):
     def __init__(self, pattern: str) -> None:
         self.regex = re.compile(pattern)
 
-    def match(self, text: str) -> bool:
-        return bool(self.regex.search(text))
+    def match(self, text: str | LogRecord) -> bool:
+        return bool(self.regex.search(text_of(text)))
 
 
 class LevelFilter(LogFilterProtocol):
     def __init__(self, level: str) -> None:
         self.level = level.upper()
 
-    def match(self, text: str) -> bool:
+    def match(self, text: str | LogRecord) -> bool:
+        # records get the same text prefix check as strings (and as the folded
+        # FilterChain stage), which also leaves their level unparsed
+        if isinstance(text, LogRecord):
+            text = text.text
         return text.startswith(self.level)
 
 
+class LogStageProtocol(Protocol):
+    def process(self, texts: List[str | LogRecord]) -> List[str | LogRecord]: ...
+
+    def flush(self) -> List[str | LogRecord]: ...
+
+
 class LogHandlerProtocol(Protocol):
-    async def handle(self, text: str) -> None: ...
+    async def handle(self, text: str | LogRecord) -> None: ...
+
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
+        for text in texts:
+            await self.handle(text)
+
+
+COMPRESS_LEVEL = 6
+ARCHIVE_CHUNK = 1 << 20
 
 
 class FileHandler(LogHandlerProtocol):
-    def __init__(self, filename: str) -> None:
+    def __init__(
+        self,
+        filename: str,
+        buffered: bool = False,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        rotate_interval: float = 0.0,
+        backup_count: int = 5,
+        compress: bool = False,
+    ) -> None:
         self.filename = filename
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.rotations = 0
+        self.errors = 0
+        self._buffer: List[bytes] = []
+        self._buffered_size = 0
+        self._file = None
+        self._lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._second = -1
+        self._timestamp = ""
+        self._size = -1
+        self._rotate_at = 0.0
+        self._archiver: ThreadPoolExecutor | None = None
+        self._archiving: List[asyncio.Future] = []
+
+    def timestamp(self) -> str:
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._timestamp = format_timestamp(second)
+        return self._timestamp
+
+    async def handle(self, text: str | LogRecord) -> None:
+        await self.handle_batch([text])
+
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
+        try:
+            await self._handle(texts)
+        except (IOError, PermissionError) as e:
+            self.errors += 1
+            sys.stderr.write(f"FileHandler error: {e}\n")
+        except Exception as e:
+            self.errors += 1
+            sys.stderr.write(f"FileHandler unexpected error: {e}\n")
 
-    async def handle(self, text: str) -> None:
+    async def _handle(self, texts: List[str | LogRecord]) -> None:
+        timestamp = self.timestamp()
+        lines = [
+            f"[{timestamp}] {text}\n" if isinstance(text, str) else text.line
+            for text in texts
+        ]
+        # encoded line by line, so one bad line never costs the batch or the
+        # buffer it joins
+        encoded = [line.encode("utf-8", "backslashreplace") for line in lines]
+        if not self.buffered:
+            await self._write(b"".join(encoded))
+            return
+        self._buffer.extend(encoded)
+        self._buffered_size += sum(map(len, encoded))
+        if self._flusher is None and self.flush_interval > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        if self._buffered_size >= self.buffer_size:
+            await self._flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # shielded so that aclose() cancelling the timer never drops a batch
+            # that is already being written
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> None:
         try:
-            await self._handle(text)
+            await self._flush()
         except (IOError, PermissionError) as e:
+            self.errors += 1
             sys.stderr.write(f"FileHandler error: {e}\n")
         except Exception as e:
+            self.errors += 1
             sys.stderr.write(f"FileHandler unexpected error: {e}\n")
 
-    async def _handle(self, text: str) -> None:
-        async with aiofiles.open(self.filename, "a", encoding="utf-8") as f:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            await f.write(f"[{timestamp}] {text}\n")
+    async def _flush(self) -> None:
+        if not self._buffer:
+            return
+        # take the batch before awaiting so lines logged meanwhile start a new one
+        batch, self._buffer, self._buffered_size = self._buffer, [], 0
+        await self._write(b"".join(batch))
+
+    async def _write(self, data: bytes) -> None:
+        # every write and every rotation happens under the lock, so a batch is
+        # always written whole to exactly one file
+        async with self._lock:
+            if self._should_rotate(len(data)):
+                await self._rotate()
+            if self.buffered:
+                if self._file is None:
+                    self._file = await aiofiles.open(self.filename, "ab")
+                await self._file.write(data)
+                await self._file.flush()
+            else:
+                async with aiofiles.open(self.filename, "ab") as f:
+                    await f.write(data)
+            self._size += len(data)
+
+    def _should_rotate(self, size: int) -> bool:
+        if self._size < 0:
+            try:
+                self._size = os.path.getsize(self.filename)
+            except FileNotFoundError:
+                self._size = 0
+            self._rotate_at = time.time() + self.rotate_interval
+        if not self._size:
+            return False
+        if self.max_bytes and self._size + size > self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() >= self._rotate_at
+
+    async def _rotate(self) -> None:
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        self.rotations += 1
+        # renaming is the only step taken on the event loop, shifting the
+        # backups and compressing run on a single archiver thread in order
+        pending = f"{self.filename}.{self.rotations}.rotating"
+        os.replace(self.filename, pending)
+        self._size = 0
+        self._rotate_at = time.time() + self.rotate_interval
+        if self._archiver is None:
+            self._archiver = ThreadPoolExecutor(max_workers=1)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._archiver, self._archive, pending
+        )
+        future.add_done_callback(self._archived)
+        self._archiving.append(future)
+
+    def backup(self, index: int) -> str:
+        suffix = ".gz" if self.compress else ""
+        return f"{self.filename}.{index}{suffix}"
+
+    def _archive(self, pending: str) -> None:
+        if self.backup_count <= 0:
+            os.remove(pending)
+            return
+        for index in range(self.backup_count, 0, -1):
+            source = self.backup(index)
+            if not os.path.exists(source):
+                continue
+            if index == self.backup_count:
+                os.remove(source)
+            else:
+                os.replace(source, self.backup(index + 1))
+        if not self.compress:
+            os.replace(pending, self.backup(1))
+            return
+        partial = f"{pending}.gz"
+        with (
+            open(pending, "rb") as source,
+            gzip.open(partial, "wb", COMPRESS_LEVEL) as target,
+        ):
+            shutil.copyfileobj(source, target, ARCHIVE_CHUNK)
+        os.replace(partial, self.backup(1))
+        os.remove(pending)
+
+    def _archived(self, future: asyncio.Future) -> None:
+        self._archiving.remove(future)
+        if not future.cancelled() and future.exception() is not None:
+            self.errors += 1
+            sys.stderr.write(f"FileHandler error: {future.exception()}\n")
+
+    async def rotate(self) -> None:
+        await self.flush()
+        async with self._lock:
+            if os.path.exists(self.filename):
+                await self._rotate()
+
+    async def aclose(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        async with self._lock:
+            if self._file is not None:
+                await self._file.close()
+                self._file = None
+        if self._archiving:
+            await asyncio.gather(*self._archiving, return_exceptions=True)
+        if self._archiver is not None:
+            self._archiver.shutdown()
+            self._archiver = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+
+async def enqueue(queue: asyncio.Queue, item: object, policy: OverflowPolicy) -> bool:
+    if policy is OverflowPolicy.BLOCK:
+        await queue.put(item)
+        return True
+    if not queue.full():
+        queue.put_nowait(item)
+        return True
+    if policy is OverflowPolicy.DROP_OLDEST:
+        queue.get_nowait()
+        queue.task_done()
+        queue.put_nowait(item)
+    return False
 
 
 class SocketHandler(LogHandlerProtocol):
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        persistent: bool = False,
+        queue_size: int = 10_000,
+        policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        batch_size: int = 1024,
+        timeout: float = 1.0,
+        max_backoff: float = 5.0,
+    ) -> None:
         self.host = host
         self.port = port
-
-    async def handle(self, text: str) -> None:
+        self.persistent = persistent
+        self.policy = policy
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self.connections = 0
+        self.errors = 0
+        self._queue: asyncio.Queue[str | LogRecord] = asyncio.Queue(queue_size)
+        self._sender: asyncio.Task | None = None
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def handle(self, text: str | LogRecord) -> None:
+        await self.handle_batch([text])
+
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
         try:
-            await self._handle(text)
+            await self._handle(texts)
         except (OSError, asyncio.TimeoutError) as e:
+            self.errors += 1
             sys.stderr.write(f"SocketHandler error: {e}\n")
         except Exception as e:
+            self.errors += 1
             sys.stderr.write(f"SocketHandler unexpected error: {e}\n")
 
-    async def _handle(self, text: str) -> None:
+    async def _handle(self, texts: List[str | LogRecord]) -> None:
+        if self.persistent:
+            if self._sender is None or self._sender.done():
+                self._sender = asyncio.create_task(self._send_forever())
+            for text in texts:
+                if not await enqueue(self._queue, text, self.policy):
+                    self.dropped += 1
+            return
         _, writer = await asyncio.wait_for(
-            asyncio.open_connection(self.host, self.port), timeout=1.0
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
         )
-        writer.write((text + "\n").encode("utf-8"))
+        writer.write(self._encode(texts))
         await writer.drain()
         writer.close()
         await writer.wait_closed()
 
+    async def _send_forever(self) -> None:
+        backoff = 0.0
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                data = self._encode(batch)
+                while True:
+                    try:
+                        await self._send(data)
+                        backoff = 0.0
+                        break
+                    except (OSError, asyncio.TimeoutError) as e:
+                        self.errors += 1
+                        sys.stderr.write(f"SocketHandler error: {e}\n")
+                        await self._disconnect()
+                        backoff = min(max(backoff * 2, 0.05), self.max_backoff)
+                        await asyncio.sleep(backoff)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _encode(texts: List[str | LogRecord]) -> bytes:
+        # a lone surrogate is escaped rather than failing the whole batch
+        return "".join(f"{text}\n" for text in texts).encode(
+            "utf-8", "backslashreplace"
+        )
+
+    async def _send(self, data: bytes) -> None:
+        # a peer that went away is noticed through EOF before writing into it
+        if self._writer is not None and (
+            self._writer.is_closing() or self._reader.at_eof()
+        ):
+            await self._disconnect()
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.timeout
+            )
+            self.connections += 1
+        self._writer.write(data)
+        await asyncio.wait_for(self._writer.drain(), timeout=self.timeout)
+
+    async def _disconnect(self) -> None:
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def aclose(self, timeout: float | None = 10.0) -> None:
+        if self._sender is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                self.errors += 1
+                sys.stderr.write(
+                    f"SocketHandler error: {self._queue.qsize()} lines not sent\n"
+                )
+            self._sender.cancel()
+            self._sender = None
+        await self._disconnect()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
 
 class ConsoleHandler(LogHandlerProtocol):
     def __init__(self, use_stderr: bool = False) -> None:
         self.use_stderr = use_stderr
+        self.errors = 0
 
-    async def handle(self, text: str) -> None:
+    async def handle(self, text: str | LogRecord) -> None:
         try:
             if self.use_stderr:
                 sys.stderr.write(f"{text}\n")
             else:
                 print(text)
         except Exception as e:
+            self.errors += 1
             sys.stderr.write(f"ConsoleHandler error: {e}\n")
 
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
+        try:
+            stream = sys.stderr if self.use_stderr else sys.stdout
+            stream.write("".join(f"{text}\n" for text in texts))
+        except Exception as e:
+            self.errors += 1
+            sys.stderr.write(f"ConsoleHandler error: {e}\n")
+
+
+SYSLOG_USER = 1
+SYSLOG_NOTICE = 5
+SYSLOG_SEVERITY = {
+    "EMERG": 0,
+    "ALERT": 1,
+    "CRIT": 2,
+    "CRITICAL": 2,
+    "ERR": 3,
+    "ERROR": 3,
+    "WARN": 4,
+    "WARNING": 4,
+    "NOTICE": 5,
+    "INFO": 6,
+    "DEBUG": 7,
+}
+MAX_DATAGRAM = 8192
+
+
+@lru_cache(maxsize=STAMP_CACHE_SIZE)
+def format_rfc3339(second: int) -> str:
+    return datetime.fromtimestamp(second).astimezone().isoformat()
+
+
+class SyslogProtocol(asyncio.DatagramProtocol):
+    def __init__(self, handler: "SyslogHandler") -> None:
+        self.handler = handler
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.closed = asyncio.Event()
+
+    def pause_writing(self) -> None:
+        self.writable.clear()
+
+    def resume_writing(self) -> None:
+        self.writable.set()
+
+    def error_received(self, exc: Exception) -> None:
+        self.handler.errors += 1
+        sys.stderr.write(f"SyslogHandler error: {exc}\n")
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.writable.set()
+        self.closed.set()
+
 
 class SyslogHandler(LogHandlerProtocol):
-    async def handle(self, text: str) -> None:
+    def __init__(
+        self,
+        address: str | Tuple[str, int] | None = None,
+        facility: int = SYSLOG_USER,
+        app_name: str = "lab3",
+        queue_size: int = 10_000,
+        policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        batch_size: int = 1024,
+        timeout: float = 1.0,
+    ) -> None:
+        # without an address this stays the stderr stand-in, otherwise a str is
+        # a Unix datagram socket path and a tuple a UDP (host, port)
+        self.address = address
+        self.facility = facility
+        self.app_name = app_name
+        self.policy = policy
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.hostname = socket.gethostname() or "-"
+        self.procid = str(os.getpid())
+        self.errors = 0
+        self.dropped = 0
+        self.sent = 0
+        self._queue: asyncio.Queue[str | LogRecord] = asyncio.Queue(queue_size)
+        self._sender: asyncio.Task | None = None
+        self._transport: asyncio.DatagramTransport | None = None
+        self._protocol: SyslogProtocol | None = None
+
+    async def handle(self, text: str | LogRecord) -> None:
+        if self.address is not None:
+            await self.handle_batch([text])
+            return
         try:
             sys.stderr.write(f"SYSLOG: {text}\n")
         except Exception as e:
+            self.errors += 1
             sys.stderr.write(f"SyslogHandler error: {e}\n")
 
+    async def handle_batch(self, texts: List[str | LogRecord]) -> None:
+        if self.address is None:
+            try:
+                sys.stderr.write("".join(f"SYSLOG: {text}\n" for text in texts))
+            except Exception as e:
+                self.errors += 1
+                sys.stderr.write(f"SyslogHandler error: {e}\n")
+            return
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_forever())
+        for text in texts:
+            if not await enqueue(self._queue, text, self.policy):
+                self.dropped += 1
+
+    def frame(self, text: str | LogRecord) -> bytes:
+        # RFC 5424: <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID SD MSG
+        if isinstance(text, LogRecord):
+            created, level, text = text.created, text.level, text.text
+        else:
+            created, level = time.time(), LEVEL.match(text).group()
+        pri = self.facility * 8 + SYSLOG_SEVERITY.get(level, SYSLOG_NOTICE)
+        stamp = format_rfc3339(int(created))
+        header = f"<{pri}>1 {stamp} {self.hostname} {self.app_name} {self.procid} - - "
+        data = (header + text).encode("utf-8", "backslashreplace")
+        if len(data) > MAX_DATAGRAM:
+            # cut on a character boundary so the datagram stays valid UTF-8
+            data = data[:MAX_DATAGRAM].decode("utf-8", "ignore").encode("utf-8")
+        return data
+
+    async def _send_forever(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._send(batch)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.errors += 1
+                self.dropped += len(batch)
+                sys.stderr.write(f"SyslogHandler error: {e}\n")
+                await self._disconnect()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send(self, batch: List[str | LogRecord]) -> None:
+        if self._transport is None or self._transport.is_closing():
+            await self._connect()
+        # the transport never blocks, once the kernel buffer is full it pauses
+        # us and the queue in front absorbs the burst or drops by policy
+        await asyncio.wait_for(self._protocol.writable.wait(), self.timeout)
+        sendto = self._transport.sendto
+        for text in batch:
+            try:
+                data = self.frame(text)
+            except Exception as e:
+                self.errors += 1
+                self.dropped += 1
+                sys.stderr.write(f"SyslogHandler error: {e}\n")
+                continue
+            sendto(data)
+            self.sent += 1
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        family = socket.AF_UNIX if isinstance(self.address, str) else 0
+        self._transport, self._protocol = await asyncio.wait_for(
+            loop.create_datagram_endpoint(
+                lambda: SyslogProtocol(self), remote_addr=self.address, family=family
+            ),
+            timeout=self.timeout,
+        )
+
+    async def _disconnect(self) -> None:
+        transport, protocol = self._transport, self._protocol
+        self._transport, self._protocol = None, None
+        if transport is None:
+            return
+        # datagrams the kernel refused earlier are still buffered in the
+        # transport, which only reports the connection lost once they are out
+        transport.close()
+        try:
+            await asyncio.wait_for(protocol.closed.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            transport.abort()
+
+    async def aclose(self, timeout: float | None = 10.0) -> None:
+        if self._sender is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                self.errors += 1
+                sys.stderr.write(
+                    f"SyslogHandler error: {self._queue.qsize()} lines not sent\n"
+                )
+            self._sender.cancel()
+            self._sender = None
+        await self._disconnect()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
+WORKER_BATCH = 256
+
+
+class DispatchMode(Enum):
+    SEQUENTIAL = "sequential"
+    GATHER = "gather"
+    QUEUED = "queued"
+
 
 class Logger:
     def __init__(
-        self, filters: List[LogFilterProtocol], handlers: List[LogHandlerProtocol]
+        self,
+        filters: List[LogFilterProtocol],
+        handlers: List[LogHandlerProtocol],
+        mode: DispatchMode = DispatchMode.SEQUENTIAL,
+        queue_size: int = 1000,
+        policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        stages: List[LogStageProtocol] | None = None,
+        metrics: bool = False,
     ) -> None:
         self._filters = filters
         self._handlers = handlers
-
-    async def log(self, text: str) -> None:
-        if all(f.match(text) for f in self._filters):
+        self._stages = stages or []
+        self.metrics = (
+            LoggerMetrics(len(filters), handlers, len(self._stages))
+            if metrics
+            else None
+        )
+        self.mode = mode
+        self.queue_size = queue_size
+        self.policy = policy
+        self.dropped = [0] * len(handlers)
+        self._queues: List[asyncio.Queue[str | LogRecord]] = []
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def handlers(self) -> List[LogHandlerProtocol]:
+        return self._handlers
+
+    async def log(self, text: str | LogRecord) -> None:
+        if self.metrics is None:
+            matched = all(f.match(text) for f in self._filters)
+        else:
+            matched = self.metrics.match(self._filters, text)
+        if matched:
+            if self._stages:
+                await self._dispatch_batch(self._run_stages([text]))
+            elif self.mode is DispatchMode.QUEUED:
+                await self._enqueue(text)
+            elif self.mode is DispatchMode.GATHER:
+                await asyncio.gather(*(self._handle(h, text) for h in self._handlers))
+            else:
+                for handler in self._handlers:
+                    await self._handle(handler, text)
+
+    async def log_many(self, lines: Iterable[str | LogRecord]) -> int:
+        batch = list(lines)
+        if self.metrics is None:
+            for f in self._filters:
+                batch = [text for text in batch if f.match(text)]
+        else:
+            batch = self.metrics.match_many(self._filters, batch)
+        if self._stages:
+            batch = self._run_stages(batch)
+        return await self._dispatch_batch(batch)
+
+    def _run_stages(
+        self, batch: List[str | LogRecord], start: int = 0
+    ) -> List[str | LogRecord]:
+        for i in range(start, len(self._stages)):
+            if not batch:
+                break
+            received = len(batch)
+            batch = self._stages[i].process(batch)
+            if self.metrics is not None:
+                stats = self.metrics.stages[i]
+                stats.received += received
+                stats.passed += len(batch)
+        return batch
+
+    async def _dispatch_batch(self, batch: List[str | LogRecord]) -> int:
+        if not batch:
+            return 0
+        if self.mode is DispatchMode.QUEUED:
+            for text in batch:
+                await self._enqueue(text)
+        elif self.mode is DispatchMode.GATHER:
+            await asyncio.gather(
+                *(self._handle_batch(h, batch) for h in self._handlers)
+            )
+        else:
             for handler in self._handlers:
-                try:
-                    await handler.handle(text)
-                except Exception as e:
-                    sys.stderr.write(f"Logger failed to handle log: {e}\n")
+                await self._handle_batch(handler, batch)
+        return len(batch)
+
+    async def log_stream(
+        self, lines: AsyncIterable[str | LogRecord], batch_size: int = 1000
+    ) -> int:
+        logged = 0
+        batch: List[str] = []
+        async for text in lines:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                logged += await self.log_many(batch)
+                batch = []
+        if batch:
+            logged += await self.log_many(batch)
+        return logged
+
+    async def _handle(self, handler: LogHandlerProtocol, text: str | LogRecord) -> None:
+        start = time.perf_counter() if self.metrics is not None else 0.0
+        try:
+            await handler.handle(text)
+        except Exception as e:
+            self._failed(handler, e)
+        if self.metrics is not None:
+            self.metrics.handler(handler).observe(time.perf_counter() - start, 1)
+
+    async def _handle_batch(
+        self, handler: LogHandlerProtocol, texts: List[str | LogRecord]
+    ) -> None:
+        # handlers only have to implement the protocol structurally, so the
+        # batch method may be missing entirely
+        handle_batch = getattr(handler, "handle_batch", None)
+        if handle_batch is None:
+            for text in texts:
+                await self._handle(handler, text)
+            return
+        start = time.perf_counter() if self.metrics is not None else 0.0
+        try:
+            await handle_batch(texts)
+        except Exception as e:
+            self._failed(handler, e)
+        if self.metrics is not None:
+            stats = self.metrics.handler(handler)
+            stats.observe(time.perf_counter() - start, len(texts))
+
+    def _failed(self, handler: LogHandlerProtocol, error: Exception) -> None:
+        sys.stderr.write(f"Logger failed to handle log: {error}\n")
+        if self.metrics is not None:
+            self.metrics.handler(handler).errors += 1
+
+    async def _enqueue(self, text: str | LogRecord) -> None:
+        if not self._workers:
+            self._start()
+        for i, queue in enumerate(self._queues):
+            if not await enqueue(queue, text, self.policy):
+                self.dropped[i] += 1
+        if self.metrics is not None:
+            for stats, queue in zip(self.metrics.handlers, self._queues):
+                stats.max_queue_depth = max(stats.max_queue_depth, queue.qsize())
+
+    def _start(self) -> None:
+        self._queues = [asyncio.Queue(self.queue_size) for _ in self._handlers]
+        self._workers = [
+            asyncio.create_task(self._work(handler, queue))
+            for handler, queue in zip(self._handlers, self._queues)
+        ]
+
+    async def _work(self, handler: LogHandlerProtocol, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < WORKER_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            if len(batch) == 1:
+                await self._handle(handler, batch[0])
+            else:
+                await self._handle_batch(handler, batch)
+            for _ in batch:
+                queue.task_done()
+
+    def pending(self) -> List[int]:
+        return [queue.qsize() for queue in self._queues]
+
+    def snapshot(self) -> dict:
+        if self.metrics is None:
+            return {}
+        return self.metrics.snapshot(
+            self._filters,
+            self._handlers,
+            self._stages,
+            self.dropped,
+            self.pending() or [0] * len(self._handlers),
+        )
+
+    async def flush_stages(self) -> int:
+        # whatever a stage still holds, such as pending repeat summaries, goes
+        # through the stages after it like any other line
+        flushed = 0
+        for i, stage in enumerate(self._stages):
+            flushed += await self._dispatch_batch(
+                self._run_stages(stage.flush(), i + 1)
+            )
+        return flushed
+
+    async def aclose(self, timeout: float | None = None) -> None:
+        await self.flush_stages()
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            sys.stderr.write(
+                f"Logger failed to drain {sum(self.pending())} queued logs\n"
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queues, self._workers = [], []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
 
 
 async def main() -> None:
@@ -127,7 +929,7 @@ async def main() -> None:
 
     console_handler = ConsoleHandler()
     error_file_handler = FileHandler("error_logs.txt")
-    all_file_handler = FileHandler("all_logs.txt")
+    all_file_handler = FileHandler("all_logs.txt", buffered=True)
     syslog_handler = SyslogHandler()
 
     print("\nПример 1: ERROR логи с цифрами")
@@ -156,6 +958,8 @@ async def main() -> None:
     await logger4.log("ERROR: Не удалось сохранить файл")
     await logger4.log("WARNING: Память на сервере почти заполнена")
 
+    await all_file_handler.aclose()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,316 @@
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from heapq import merge
+from typing import Dict, Iterator, List, Self, Tuple
+
+BLOCK_BYTES = 1 << 16
+HEAD_BYTES = 128
+MAGIC = b"LIDX"
+INDEX_VERSION = 2
+# magic, version, head length, level count, block bytes, size, lines, blocks
+HEADER = struct.Struct("<4sBBHQQQQ")
+LEVEL_ENTRY = struct.Struct("<BQ")
+LINE = re.compile(rb"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ([A-Z]*)", re.MULTILINE)
+LEVEL_NAME = re.compile(r"[A-Z]*")
+
+
+def stamp_key(value: str | datetime) -> int:
+    # "2025-06-04 16:32:45" -> 20250604163245, which orders like the time itself;
+    # shorter prefixes such as "2025-06-04" are padded to the start of the period
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    digits = "".join(c for c in value if c.isdigit())
+    if not digits or len(digits) > 14:
+        raise ValueError(f"Invalid timestamp {value!r}")
+    return int(digits.ljust(14, "0"))
+
+
+class LogIndex:
+    def __init__(self, path: str, block_bytes: int = BLOCK_BYTES) -> None:
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.block_bytes = block_bytes
+        self._reset()
+
+    def _reset(self) -> None:
+        self.size = 0
+        self.lines = 0
+        self.head = b""
+        # sparse index, one entry per block of about block_bytes
+        self.block_offsets = array("q")
+        self.block_min = array("q")
+        self.block_max = array("q")
+        self.levels: Dict[str, array] = {}
+
+    @classmethod
+    def open(cls, path: str, block_bytes: int = BLOCK_BYTES) -> Self:
+        index = cls(path, block_bytes)
+        index.load()
+        index.update()
+        return index
+
+    def load(self) -> bool:
+        # anything unreadable or inconsistent is dropped and rebuilt by update()
+        try:
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+            state = _decode(data)
+        except (OSError, ValueError, struct.error):
+            return False
+        (
+            self.block_bytes,
+            self.size,
+            self.lines,
+            self.head,
+            self.block_offsets,
+            self.block_min,
+            self.block_max,
+            self.levels,
+        ) = state
+        return True
+
+    def save(self) -> None:
+        blocks = (self.block_offsets, self.block_min, self.block_max)
+        parts = [
+            HEADER.pack(
+                MAGIC,
+                INDEX_VERSION,
+                len(self.head),
+                len(self.levels),
+                self.block_bytes,
+                self.size,
+                self.lines,
+                len(self.block_offsets),
+            ),
+            self.head,
+            *(_pack(values) for values in blocks),
+        ]
+        for level, offsets in self.levels.items():
+            name = level.encode("ascii")
+            parts += [LEVEL_ENTRY.pack(len(name), len(offsets)), name, _pack(offsets)]
+        partial = f"{self.index_path}.tmp"
+        with open(partial, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(partial, self.index_path)
+
+    def update(self, save: bool = True) -> int:
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(HEAD_BYTES)
+            # a shorter file or a different start means it was truncated or
+            # rotated underneath us
+            if size < self.size or head[: len(self.head)] != self.head:
+                self._reset()
+            if size == self.size:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                added = self._scan(mm, size)
+        if len(self.head) < HEAD_BYTES:
+            self.head = head[: self.size]
+        if added and save:
+            self.save()
+        return added
+
+    def _scan(self, mm: mmap.mmap, size: int) -> int:
+        # only complete lines are indexed, a half written one is picked up by
+        # the next update
+        end = mm.rfind(b"\n", self.size, size) + 1
+        if end <= self.size:
+            return 0
+        offsets, mins, maxs = self.block_offsets, self.block_min, self.block_max
+        boundary = offsets[-1] + self.block_bytes if offsets else 0
+        levels = self.levels
+        added = 0
+        for match in LINE.finditer(mm, self.size, end):
+            start = match.start()
+            key = int(match[1].translate(None, b"- :"))
+            if start >= boundary:
+                offsets.append(start)
+                mins.append(key)
+                maxs.append(key)
+                boundary = start + self.block_bytes
+            elif key < mins[-1]:
+                mins[-1] = key
+            elif key > maxs[-1]:
+                maxs[-1] = key
+            level = match[2].decode("ascii")
+            if level not in levels:
+                levels[level] = array("q")
+            levels[level].append(start)
+            added += 1
+        self.size = end
+        self.lines += added
+        return added
+
+    def _spans(self, since: int | None, until: int | None) -> List[Tuple[int, int]]:
+        spans: List[Tuple[int, int]] = []
+        offsets = self.block_offsets
+        for i in range(len(offsets)):
+            if since is not None and self.block_max[i] < since:
+                continue
+            if until is not None and self.block_min[i] >= until:
+                continue
+            stop = offsets[i + 1] if i + 1 < len(offsets) else self.size
+            if spans and spans[-1][1] == offsets[i]:
+                spans[-1] = (spans[-1][0], stop)
+            else:
+                spans.append((offsets[i], stop))
+        return spans
+
+    def _starts(
+        self,
+        mm: mmap.mmap,
+        spans: List[Tuple[int, int]],
+        level: str | None,
+        text: bytes,
+    ) -> Iterator[int]:
+        if level is not None:
+            lists = [v for k, v in self.levels.items() if k.startswith(level)]
+            offsets = lists[0] if len(lists) == 1 else list(merge(*lists))
+            for lo, hi in spans:
+                yield from offsets[bisect_left(offsets, lo) : bisect_left(offsets, hi)]
+        elif text:
+            for lo, hi in spans:
+                hit = mm.find(text, lo, hi)
+                while hit >= 0:
+                    yield mm.rfind(b"\n", lo, hit) + 1 or lo
+                    hit = mm.find(text, mm.find(b"\n", hit, hi) + 1 or hi, hi)
+        else:
+            for lo, hi in spans:
+                for match in LINE.finditer(mm, lo, hi):
+                    yield match.start()
+
+    def query(
+        self,
+        since: str | datetime | None = None,
+        until: str | datetime | None = None,
+        level: str | None = None,
+        contains: str | None = None,
+    ) -> Iterator[str]:
+        if not self.size:
+            return
+        low = stamp_key(since) if since is not None else None
+        high = stamp_key(until) if until is not None else None
+        level = level.upper() if level is not None else None
+        prefix = level.encode("ascii") if level is not None else b""
+        text = contains.encode("utf-8") if contains else b""
+        with (
+            open(self.path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            spans = self._spans(low, high)
+            for start in self._starts(mm, spans, level, text):
+                match = LINE.match(mm, start)
+                if match is None:
+                    continue
+                key = int(match[1].translate(None, b"- :"))
+                if (low is not None and key < low) or (
+                    high is not None and key >= high
+                ):
+                    continue
+                if not match[2].startswith(prefix):
+                    continue
+                end = mm.find(b"\n", start)
+                line = mm[start:end]
+                if text and text not in line:
+                    continue
+                yield line.decode("utf-8", "replace")
+
+    def count(self, **query: object) -> int:
+        return sum(1 for _ in self.query(**query))
+
+    def __str__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({self.path!r}, {self.lines} lines, "
+            f"{len(self.block_offsets)} blocks, levels {sorted(self.levels)})"
+        )
+
+    __repr__ = __str__
+
+
+def _pack(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array("q", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(data: bytes, pos: int, count: int) -> Tuple[array, int]:
+    end = pos + count * 8
+    if end > len(data):
+        raise ValueError("Index is truncated")
+    values = array("q", data[pos:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def _decode(data: bytes) -> tuple:
+    magic, version, head_size, level_count, block_bytes, size, lines, blocks = (
+        HEADER.unpack_from(data)
+    )
+    if magic != MAGIC or version != INDEX_VERSION:
+        raise ValueError("Not a log index")
+    if head_size > HEAD_BYTES or block_bytes <= 0:
+        raise ValueError("Invalid index header")
+    pos = HEADER.size + head_size
+    head = data[HEADER.size : pos]
+    offsets, pos = _unpack(data, pos, blocks)
+    block_min, pos = _unpack(data, pos, blocks)
+    block_max, pos = _unpack(data, pos, blocks)
+    levels: Dict[str, array] = {}
+    for _ in range(level_count):
+        name_size, count = LEVEL_ENTRY.unpack_from(data, pos)
+        pos += LEVEL_ENTRY.size
+        level = data[pos : pos + name_size].decode("ascii")
+        if len(level) != name_size or not LEVEL_NAME.fullmatch(level):
+            raise ValueError(f"Invalid level {level!r}")
+        levels[level], pos = _unpack(data, pos + name_size, count)
+    if pos != len(data):
+        raise ValueError("Trailing data after the index")
+    # every offset has to point into the indexed part of the log
+    for values in (offsets, *levels.values()):
+        if values and (min(values) < 0 or max(values) >= size):
+            raise ValueError("Index offset out of range")
+    return block_bytes, size, lines, head, offsets, block_min, block_max, levels
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Query [YYYY-mm-dd HH:MM:SS] log files through a sidecar index"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--since", help="first timestamp to include")
+    parser.add_argument("--until", help="first timestamp to exclude")
+    parser.add_argument("--level", help="level prefix such as ERROR")
+    parser.add_argument("--grep", help="substring the line must contain")
+    parser.add_argument("--count", action="store_true", help="print only the count")
+    parser.add_argument("--stats", action="store_true", help="print the index")
+    args = parser.parse_args(argv)
+
+    try:
+        index = LogIndex.open(args.path)
+        if args.stats:
+            print(index)
+            return 0
+        lines = index.query(args.since, args.until, args.level, args.grep)
+        if args.count:
+            print(sum(1 for _ in lines))
+            return 0
+        for line in lines:
+            sys.stdout.write(f"{line}\n")
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"logindex error: {e}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
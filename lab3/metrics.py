@@ -0,0 +1,229 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Dict[str, int]:
+        buckets: Dict[str, int] = {}
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets["+Inf" if bound == float("inf") else repr(bound)] = total
+        return buckets
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th observation
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            if total >= rank and total:
+                return bound
+        return 0.0
+
+
+class FilterStats:
+    __slots__ = ("calls", "rejects", "ns")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.rejects = 0
+        self.ns = 0
+
+
+class HandlerStats:
+    __slots__ = ("latency", "calls", "records", "errors", "max_queue_depth")
+
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.calls = 0
+        self.records = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+
+    def observe(self, seconds: float, records: int) -> None:
+        self.latency.observe(seconds)
+        self.calls += 1
+        self.records += records
+
+
+class StageStats:
+    __slots__ = ("received", "passed")
+
+    def __init__(self) -> None:
+        self.received = 0
+        self.passed = 0
+
+
+class LoggerMetrics:
+    def __init__(self, filters: int, handlers: List[object], stages: int) -> None:
+        self.received = 0
+        self.accepted = 0
+        self.filters = [FilterStats() for _ in range(filters)]
+        self.handlers = [HandlerStats() for _ in handlers]
+        self.stages = [StageStats() for _ in range(stages)]
+        self._by_handler = {id(h): s for h, s in zip(handlers, self.handlers)}
+
+    def handler(self, handler: object) -> HandlerStats:
+        return self._by_handler[id(handler)]
+
+    def match(self, filters: List, text: object) -> bool:
+        self.received += 1
+        clock = time.perf_counter_ns
+        for f, stats in zip(filters, self.filters):
+            start = clock()
+            matched = f.match(text)
+            stats.ns += clock() - start
+            stats.calls += 1
+            if not matched:
+                stats.rejects += 1
+                return False
+        self.accepted += 1
+        return True
+
+    def match_many(self, filters: List, batch: List) -> List:
+        self.received += len(batch)
+        clock = time.perf_counter_ns
+        for f, stats in zip(filters, self.filters):
+            if not batch:
+                break
+            start = clock()
+            kept = [text for text in batch if f.match(text)]
+            stats.ns += clock() - start
+            stats.calls += len(batch)
+            stats.rejects += len(batch) - len(kept)
+            batch = kept
+        self.accepted += len(batch)
+        return batch
+
+    def snapshot(
+        self,
+        filters: List,
+        handlers: List,
+        stages: List,
+        dropped: List[int],
+        depths: List[int],
+    ) -> dict:
+        return {
+            "records": {"received": self.received, "accepted": self.accepted},
+            "filters": [
+                {
+                    "name": _name(i, f),
+                    "calls": stats.calls,
+                    "rejects": stats.rejects,
+                    "seconds": stats.ns / 1e9,
+                }
+                for i, (f, stats) in enumerate(zip(filters, self.filters))
+            ],
+            "handlers": [
+                {
+                    "name": _name(i, h),
+                    "calls": stats.calls,
+                    "records": stats.records,
+                    # errors the handler swallowed itself plus the ones it raised
+                    "errors": stats.errors + getattr(h, "errors", 0),
+                    "dropped": dropped[i] + getattr(h, "dropped", 0),
+                    "queue_depth": depths[i],
+                    "max_queue_depth": stats.max_queue_depth,
+                    "latency": {
+                        "buckets": stats.latency.cumulative(),
+                        "sum": stats.latency.sum,
+                        "count": stats.latency.count,
+                        "p50": stats.latency.quantile(0.5),
+                        "p99": stats.latency.quantile(0.99),
+                    },
+                }
+                for i, (h, stats) in enumerate(zip(handlers, self.handlers))
+            ],
+            "stages": [
+                {
+                    "name": _name(i, stage),
+                    "received": stats.received,
+                    "passed": stats.passed,
+                }
+                for i, (stage, stats) in enumerate(zip(stages, self.stages))
+            ],
+        }
+
+
+def _name(index: int, component: object) -> str:
+    return f"{index}:{component.__class__.__name__}"
+
+
+def _label(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(snapshot: dict, prefix: str = "logger") -> str:
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, samples: Iterable[Tuple[str, object]]) -> None:
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{prefix}_{name}{{{labels}}} {value}")
+
+    metric(
+        "records_total",
+        "counter",
+        ((f'stage="{stage}"', n) for stage, n in snapshot["records"].items()),
+    )
+    filters = [(f'filter="{_label(f["name"])}"', f) for f in snapshot["filters"]]
+    metric("filter_calls_total", "counter", ((k, f["calls"]) for k, f in filters))
+    metric("filter_rejects_total", "counter", ((k, f["rejects"]) for k, f in filters))
+    metric("filter_seconds_total", "counter", ((k, f["seconds"]) for k, f in filters))
+
+    handlers = [(f'handler="{_label(h["name"])}"', h) for h in snapshot["handlers"]]
+    lines.append(f"# TYPE {prefix}_handler_latency_seconds histogram")
+    for key, h in handlers:
+        latency = h["latency"]
+        for le, count in latency["buckets"].items():
+            lines.append(
+                f'{prefix}_handler_latency_seconds_bucket{{{key},le="{le}"}} {count}'
+            )
+        lines.append(f"{prefix}_handler_latency_seconds_sum{{{key}}} {latency['sum']}")
+        lines.append(
+            f"{prefix}_handler_latency_seconds_count{{{key}}} {latency['count']}"
+        )
+    for name, kind in (
+        ("records", "counter"),
+        ("errors", "counter"),
+        ("dropped", "counter"),
+        ("queue_depth", "gauge"),
+        ("max_queue_depth", "gauge"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        metric(f"handler_{name}{suffix}", kind, ((k, h[name]) for k, h in handlers))
+
+    stages = [(f'stage="{_label(s["name"])}"', s) for s in snapshot["stages"]]
+    metric("stage_received_total", "counter", ((k, s["received"]) for k, s in stages))
+    metric("stage_passed_total", "counter", ((k, s["passed"]) for k, s in stages))
+    return "\n".join(lines) + "\n"
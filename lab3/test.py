@@ -0,0 +1,1376 @@
+import asyncio
+import functools
+import glob
+import gzip
+import multiprocessing
+import os
+import pickle
+import re
+import socket
+import time
+from datetime import datetime
+from queue import Full
+
+import logindex
+import pytest
+from aggregator import Aggregator, QueueHandler
+from filters import FilterChain, compile_filters
+from lab3 import (
+    DispatchMode,
+    FileHandler,
+    ConsoleHandler,
+    LevelFilter,
+    LogHandlerProtocol,
+    LogRecord,
+    Logger,
+    MAX_DATAGRAM,
+    OverflowPolicy,
+    ReLogFilter,
+    SimpleLogFilter,
+    SocketHandler,
+    SyslogHandler,
+    as_record,
+    text_of,
+)
+from logindex import LogIndex, stamp_key
+from metrics import to_prometheus
+from throttle import Deduplicate, RateLimit, Sample
+
+LINE = re.compile(r"^\[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] (.*)$")
+
+
+def read_messages(path) -> list[str]:
+    return [LINE.match(line).group(1) for line in path.read_text().splitlines()]
+
+
+class TestFileHandler:
+    def test_unbuffered_writes_immediately(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            handler = FileHandler(str(path))
+            await handler.handle("INFO: one")
+            assert read_messages(path) == ["INFO: one"]
+            await handler.handle("INFO: two")
+
+        asyncio.run(run())
+        assert read_messages(path) == ["INFO: one", "INFO: two"]
+
+    def test_unbuffered_batch_with_unencodable_line(self, tmp_path):
+        path = tmp_path / "log.txt"
+        handler = FileHandler(str(path))
+        asyncio.run(handler.handle_batch(["INFO a", "INFO bad \ud800", "INFO b"]))
+        assert handler.errors == 0
+        assert read_messages(path) == ["INFO a", "INFO bad \\ud800", "INFO b"]
+
+    def test_buffered_flushes_on_close(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            async with FileHandler(str(path), buffered=True) as handler:
+                for i in range(100):
+                    await handler.handle(f"INFO: {i}")
+                assert not path.exists()
+
+        asyncio.run(run())
+        assert read_messages(path) == [f"INFO: {i}" for i in range(100)]
+
+    def test_buffered_unencodable_line(self, tmp_path):
+        path = tmp_path / "log.txt"
+        lines = [f"INFO: {i}" for i in range(200)]
+
+        async def run():
+            async with FileHandler(str(path), buffered=True) as handler:
+                for line in lines[:100]:
+                    await handler.handle(line)
+                await handler.handle("INFO: bad \ud800")
+                for line in lines[100:]:
+                    await handler.handle(line)
+            return handler
+
+        handler = asyncio.run(run())
+        assert handler.errors == 0
+        assert read_messages(path) == lines[:100] + ["INFO: bad \\ud800"] + lines[100:]
+
+    def test_buffered_flushes_on_size(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            handler = FileHandler(str(path), buffered=True, buffer_size=256)
+            for i in range(20):
+                await handler.handle(f"INFO: message number {i}")
+            flushed = read_messages(path)
+            await handler.aclose()
+            return flushed
+
+        flushed = asyncio.run(run())
+        assert 0 < len(flushed) < 20
+        assert read_messages(path) == [f"INFO: message number {i}" for i in range(20)]
+
+    def test_buffered_flushes_on_interval(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            handler = FileHandler(str(path), buffered=True, flush_interval=0.02)
+            await handler.handle("INFO: tick")
+            await asyncio.sleep(0.2)
+            flushed = read_messages(path)
+            await handler.aclose()
+            return flushed
+
+        assert asyncio.run(run()) == ["INFO: tick"]
+
+    def test_concurrent_writers(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def writer(handler, n):
+            for i in range(50):
+                await handler.handle(f"{n}:{i}")
+                await asyncio.sleep(0)
+
+        async def run():
+            async with FileHandler(str(path), True, 512, 0.001) as handler:
+                await asyncio.gather(*(writer(handler, n) for n in range(10)))
+
+        asyncio.run(run())
+        messages = read_messages(path)
+        assert sorted(messages) == sorted(
+            f"{n}:{i}" for n in range(10) for i in range(50)
+        )
+        for n in range(10):
+            mine = [m for m in messages if m.startswith(f"{n}:")]
+            assert mine == [f"{n}:{i}" for i in range(50)]
+
+    def test_timestamp_is_cached_per_second(self, monkeypatch):
+        handler = FileHandler("unused.txt")
+        now = [1000.1]
+        monkeypatch.setattr("lab3.time.time", lambda: now[0])
+        first = handler.timestamp()
+        now[0] = 1000.9
+        assert handler.timestamp() is first
+        now[0] = 1001.0
+        assert handler.timestamp() != first
+
+    def test_write_errors_are_reported(self, tmp_path, capsys):
+        async def run():
+            handler = FileHandler(str(tmp_path / "missing" / "log.txt"), buffered=True)
+            await handler.handle("INFO: lost")
+            await handler.aclose()
+
+        asyncio.run(run())
+        assert "FileHandler error" in capsys.readouterr().err
+
+
+def read_rotated(handler: FileHandler) -> list[str]:
+    paths = sorted(
+        glob.glob(f"{handler.filename}.*"),
+        key=lambda path: int(path.split(".")[-2 if handler.compress else -1]),
+        reverse=True,
+    )
+    messages = []
+    for path in paths + [handler.filename]:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            messages.extend(LINE.match(line).group(1) for line in f.read().splitlines())
+    return messages
+
+
+class TestFileRotation:
+    @pytest.mark.parametrize("buffered", [False, True])
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_sustained_load(self, tmp_path, buffered, compress):
+        path = tmp_path / "log.txt"
+        handler = FileHandler(
+            str(path),
+            buffered,
+            buffer_size=512,
+            flush_interval=0.001,
+            max_bytes=4096,
+            backup_count=1000,
+            compress=compress,
+        )
+
+        async def writer(n):
+            for i in range(300):
+                await handler.handle(f"INFO: writer {n} line {i}")
+                if i % 7 == 0:
+                    await asyncio.sleep(0)
+
+        async def run():
+            async with handler:
+                await asyncio.gather(*(writer(n) for n in range(10)))
+
+        asyncio.run(run())
+        assert handler.rotations > 10
+        assert not glob.glob(f"{path}*.rotating*")
+        messages = read_rotated(handler)
+        assert len(messages) == 3000
+        for n in range(10):
+            mine = [m for m in messages if m.startswith(f"INFO: writer {n} ")]
+            assert mine == [f"INFO: writer {n} line {i}" for i in range(300)]
+        if not compress:
+            for backup in glob.glob(f"{path}.*"):
+                assert os.path.getsize(backup) <= 4096
+
+    def test_retention(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            async with FileHandler(str(path), max_bytes=100, backup_count=2) as handler:
+                for i in range(50):
+                    await handler.handle(f"INFO: line {i}")
+            return handler
+
+        handler = asyncio.run(run())
+        assert sorted(os.listdir(tmp_path)) == ["log.txt", "log.txt.1", "log.txt.2"]
+        messages = read_rotated(handler)
+        assert messages == [f"INFO: line {i}" for i in range(50 - len(messages), 50)]
+
+    def test_time_based(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            async with FileHandler(str(path), rotate_interval=0.05) as handler:
+                await handler.handle("INFO: first")
+                await handler.handle("INFO: still first")
+                await asyncio.sleep(0.1)
+                await handler.handle("INFO: second")
+            return handler
+
+        handler = asyncio.run(run())
+        assert handler.rotations == 1
+        assert read_messages(tmp_path / "log.txt.1") == [
+            "INFO: first",
+            "INFO: still first",
+        ]
+        assert read_messages(path) == ["INFO: second"]
+
+    def test_compressed_backups(self, tmp_path):
+        path = tmp_path / "log.txt"
+
+        async def run():
+            async with FileHandler(str(path), compress=True) as handler:
+                await handler.handle("INFO: old")
+                await handler.rotate()
+                await handler.handle("INFO: new")
+
+        asyncio.run(run())
+        assert sorted(os.listdir(tmp_path)) == ["log.txt", "log.txt.1.gz"]
+        with gzip.open(tmp_path / "log.txt.1.gz", "rt") as f:
+            assert LINE.match(f.read()).group(1) == "INFO: old"
+        assert read_messages(path) == ["INFO: new"]
+
+    def test_archive_errors_are_reported(self, tmp_path, capsys, monkeypatch):
+        def fail(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("lab3.shutil.copyfileobj", fail)
+
+        async def run():
+            async with FileHandler(str(tmp_path / "log.txt"), compress=True) as handler:
+                await handler.handle("INFO: old")
+                await handler.rotate()
+
+        asyncio.run(run())
+        assert "FileHandler error: disk full" in capsys.readouterr().err
+
+
+class TestLogRecord:
+    def test_level_is_parsed_once(self):
+        record = LogRecord("ERROR: disk full")
+        assert record.level == "ERROR"
+        assert record.level is record.level
+        assert LogRecord("WARNING123 odd").level == "WARNING"
+        assert LogRecord("lower case").level == ""
+
+    def test_line_is_formatted_once(self):
+        record = LogRecord("INFO: started", created=86400 * 365)
+        assert LINE.match(record.line).group(1) == "INFO: started"
+        assert record.line.endswith("\n")
+        assert record.line is record.line
+
+    def test_parse_round_trip(self):
+        record = LogRecord("INFO: [brackets] stay", created=1_700_000_000)
+        parsed = LogRecord.parse(record.line)
+        assert (parsed.text, parsed.created) == (record.text, record.created)
+        assert LogRecord.parse("no stamp\n").text == "no stamp"
+
+    def test_pickle(self):
+        record = LogRecord("INFO: shipped", created=12.5)
+        record.line
+        copy = pickle.loads(pickle.dumps(record))
+        assert (copy.text, copy.created) == ("INFO: shipped", 12.5)
+
+    @pytest.mark.parametrize(
+        "f",
+        [
+            SimpleLogFilter("disk"),
+            ReLogFilter(r"\d+%"),
+            LevelFilter("err"),
+            LevelFilter("ERROR:"),
+            FilterChain([LevelFilter("ERROR"), SimpleLogFilter("disk")]),
+        ],
+    )
+    def test_filters_accept_records(self, f):
+        lines = ["ERROR: disk 90% full", "INFO: disk ok", "ERROR: net", "ERRORS 5%"]
+        assert [f.match(LogRecord(line)) for line in lines] == [
+            f.match(line) for line in lines
+        ]
+        chain = compile_filters([f])
+        assert [chain.match(LogRecord(line)) for line in lines] == [
+            f.match(line) for line in lines
+        ]
+
+    def test_handlers_share_formatting(self, tmp_path, capsys):
+        first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+        records = [LogRecord(f"INFO: {i}", created=1_700_000_000 + i) for i in range(3)]
+        rejected = LogRecord("DEBUG: noise")
+
+        async def run():
+            handlers = [
+                FileHandler(str(first)),
+                FileHandler(str(second), buffered=True),
+                ConsoleHandler(),
+            ]
+            logger = Logger([LevelFilter("INFO")], handlers)
+            await logger.log(records[0])
+            await logger.log(rejected)
+            await logger.log_many(records[1:])
+            await handlers[1].aclose()
+
+        asyncio.run(run())
+        assert first.read_text() == second.read_text()
+        assert first.read_text() == "".join(record.line for record in records)
+        assert capsys.readouterr().out == "INFO: 0\nINFO: 1\nINFO: 2\n"
+        assert rejected._line is None and rejected._level is None
+
+    def test_as_record(self):
+        record = LogRecord("INFO: x")
+        assert as_record(record) is record
+        assert as_record("INFO: y").text == "INFO: y"
+        assert text_of(record) == text_of("INFO: x") == "INFO: x"
+
+
+class TestFilterChain:
+    TEXTS = [
+        "ERROR: Код ошибки 503",
+        "ERROR: disk full",
+        "WARNING: slow response 1200 ms",
+        "INFO: started",
+        "INFO: request 42 ok",
+        "DEBUG: cache hit",
+        "",
+    ]
+    FILTERS = [
+        [],
+        [SimpleLogFilter("ERROR"), ReLogFilter(r"\d+")],
+        [LevelFilter("info"), SimpleLogFilter("request")],
+        [LevelFilter("WARN"), LevelFilter("WARNING"), ReLogFilter("ms")],
+        [LevelFilter("INFO"), LevelFilter("ERROR")],
+        [SimpleLogFilter("E"), SimpleLogFilter("ERR"), SimpleLogFilter("full")],
+        [SimpleLogFilter(""), ReLogFilter("^D")],
+    ]
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    def test_same_result_as_filters(self, filters):
+        chain = compile_filters(filters, profile_every=2)
+        for _ in range(40):
+            for text in self.TEXTS:
+                assert chain.match(text) == all(f.match(text) for f in filters)
+
+    def test_folding(self):
+        chain = FilterChain(
+            [
+                LevelFilter("ERROR"),
+                SimpleLogFilter("ERR"),
+                SimpleLogFilter("disk"),
+                SimpleLogFilter("disk full"),
+                SimpleLogFilter("disk full"),
+                ReLogFilter("full"),
+            ]
+        )
+        assert [stage.name for stage in chain.stages] == [
+            "level 'ERROR'",
+            "contains 'disk full'",
+        ]
+
+    def test_conflicting_levels_never_match(self):
+        chain = FilterChain([LevelFilter("INFO"), LevelFilter("ERROR")])
+        assert chain.never
+        assert not chain.match("INFO: x")
+        assert not chain.match("ERROR: x")
+
+    def test_reorders_by_selectivity(self):
+        filters = [SimpleLogFilter(f"common{i}") for i in range(5)]
+        filters.append(SimpleLogFilter("rare"))
+        chain = FilterChain(filters, profile_every=1)
+        text = " ".join(f"common{i}" for i in range(5))
+        for _ in range(64):
+            chain.match(text)
+        assert chain.stages[0].name == "contains 'rare'"
+        assert chain.stages[0].reject_rate == 1.0
+        assert chain.stages[-1].reject_rate == 0.0
+
+    def test_profiling_can_be_disabled(self):
+        chain = FilterChain([SimpleLogFilter("a")], profile_every=0)
+        for _ in range(100):
+            chain.match("abc")
+        assert chain.stages[0].runs == 0
+
+    def test_logger_with_compiled_chain(self):
+        handler = SlowHandler()
+        filters = [LevelFilter("ERROR"), ReLogFilter(r"\d+")]
+        logger = Logger([compile_filters(filters)], [handler])
+
+        async def run():
+            for text in self.TEXTS:
+                await logger.log(text)
+
+        asyncio.run(run())
+        assert handler.received == ["ERROR: Код ошибки 503"]
+
+
+class SlowHandler:
+    def __init__(self, delay: float = 0.0, fail_on: str | None = None) -> None:
+        self.delay = delay
+        self.fail_on = fail_on
+        self.received: list[str] = []
+
+    async def handle(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        if text == self.fail_on:
+            raise RuntimeError("handler failed")
+        self.received.append(text)
+
+
+class TestLogger:
+    def test_sequential(self):
+        fast, slow = SlowHandler(), SlowHandler(0.001)
+        logger = Logger([SimpleLogFilter("INFO")], [fast, slow])
+
+        async def run():
+            for text in ["INFO: a", "DEBUG: b", "INFO: c"]:
+                await logger.log(text)
+
+        asyncio.run(run())
+        assert fast.received == slow.received == ["INFO: a", "INFO: c"]
+
+    def test_gather_runs_handlers_concurrently(self):
+        handlers = [SlowHandler(0.05) for _ in range(4)]
+        logger = Logger([], handlers, DispatchMode.GATHER)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await logger.log("INFO: x")
+            return loop.time() - start
+
+        assert asyncio.run(run()) < 0.15
+        assert all(h.received == ["INFO: x"] for h in handlers)
+
+    def test_queued_log_does_not_wait_for_handlers(self):
+        fast, slow = SlowHandler(), SlowHandler(0.01)
+        logger = Logger([], [fast, slow], DispatchMode.QUEUED)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for i in range(20):
+                await logger.log(f"INFO: {i}")
+            elapsed = loop.time() - start
+            await logger.aclose()
+            return elapsed
+
+        assert asyncio.run(run()) < 0.05
+        expected = [f"INFO: {i}" for i in range(20)]
+        assert fast.received == slow.received == expected
+        assert logger.dropped == [0, 0]
+
+    @pytest.mark.parametrize(
+        "policy, kept",
+        [
+            (OverflowPolicy.DROP_NEWEST, ["0", "1", "2"]),
+            (OverflowPolicy.DROP_OLDEST, ["0", "8", "9"]),
+        ],
+    )
+    def test_queued_drop_policies(self, policy, kept):
+        slow = SlowHandler(0.01)
+        logger = Logger([], [slow], DispatchMode.QUEUED, queue_size=2, policy=policy)
+
+        async def run():
+            await logger.log("0")
+            await asyncio.sleep(0)
+            for i in range(1, 10):
+                await logger.log(str(i))
+            async with logger:
+                pass
+
+        asyncio.run(run())
+        assert slow.received == kept
+        assert logger.dropped == [7]
+
+    def test_queued_block_policy(self):
+        slow = SlowHandler(0.01)
+        logger = Logger([], [slow], DispatchMode.QUEUED, queue_size=2)
+
+        async def run():
+            for i in range(10):
+                await logger.log(str(i))
+            await logger.aclose()
+
+        asyncio.run(run())
+        assert slow.received == [str(i) for i in range(10)]
+
+    def test_queued_handler_errors(self, capsys):
+        failing, other = SlowHandler(fail_on="2"), SlowHandler()
+        logger = Logger([], [failing, other], DispatchMode.QUEUED)
+
+        async def run():
+            for i in range(5):
+                await logger.log(str(i))
+            await logger.aclose()
+
+        asyncio.run(run())
+        assert failing.received == ["0", "1", "3", "4"]
+        assert other.received == [str(i) for i in range(5)]
+        assert "Logger failed to handle log" in capsys.readouterr().err
+
+    def test_aclose_timeout(self, capsys):
+        logger = Logger([], [SlowHandler(1.0)], DispatchMode.QUEUED)
+
+        async def run():
+            for i in range(3):
+                await logger.log(str(i))
+            await logger.aclose(timeout=0.01)
+            return logger.pending()
+
+        assert asyncio.run(run()) == []
+        assert "failed to drain" in capsys.readouterr().err
+
+
+class BatchHandler(SlowHandler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    async def handle_batch(self, texts: list[str]) -> None:
+        self.batches.append(list(texts))
+        self.received.extend(texts)
+
+
+class PlainHandler(LogHandlerProtocol):
+    def __init__(self) -> None:
+        self.received: list[str] = []
+
+    async def handle(self, text: str) -> None:
+        self.received.append(text)
+
+
+async def agen(lines):
+    for line in lines:
+        await asyncio.sleep(0)
+        yield line
+
+
+class TestBatchLogging:
+    LINES = [f"{'ERROR' if i % 3 == 0 else 'INFO'}: event {i}" for i in range(30)]
+    ERRORS = [line for line in LINES if line.startswith("ERROR")]
+
+    @pytest.mark.parametrize("mode", list(DispatchMode))
+    def test_log_many(self, mode):
+        batch, plain, protocol = BatchHandler(), SlowHandler(), PlainHandler()
+        logger = Logger([LevelFilter("ERROR")], [batch, plain, protocol], mode)
+
+        async def run():
+            logged = await logger.log_many(self.LINES)
+            await logger.aclose()
+            return logged
+
+        assert asyncio.run(run()) == len(self.ERRORS)
+        for handler in (batch, plain, protocol):
+            assert handler.received == self.ERRORS
+        if mode is not DispatchMode.QUEUED:
+            assert batch.batches == [self.ERRORS]
+
+    def test_log_many_with_nothing_accepted(self):
+        batch = BatchHandler()
+        logger = Logger([LevelFilter("DEBUG")], [batch])
+        assert asyncio.run(logger.log_many(self.LINES)) == 0
+        assert batch.batches == []
+
+    def test_log_stream(self):
+        batch = BatchHandler()
+        logger = Logger([SimpleLogFilter("event")], [batch])
+        logged = asyncio.run(logger.log_stream(agen(self.LINES), batch_size=8))
+        assert logged == 30
+        assert [len(b) for b in batch.batches] == [8, 8, 8, 6]
+        assert batch.received == self.LINES
+
+    def test_fallback_reports_each_failure(self, capsys):
+        failing = SlowHandler(fail_on="INFO: event 1")
+        logger = Logger([], [failing])
+        asyncio.run(logger.log_many(self.LINES[:3]))
+        assert failing.received == ["ERROR: event 0", "INFO: event 2"]
+        assert "Logger failed to handle log" in capsys.readouterr().err
+
+    def test_file_handler_batch(self, tmp_path):
+        path = tmp_path / "log.txt"
+        logger = Logger([], [FileHandler(str(path))])
+        asyncio.run(logger.log_many(self.LINES))
+        assert read_messages(path) == self.LINES
+
+    def test_console_handler_batch(self, capsys):
+        asyncio.run(ConsoleHandler().handle_batch(["a", "b"]))
+        assert capsys.readouterr().out == "a\nb\n"
+
+    def test_queued_workers_batch(self):
+        batch = BatchHandler()
+        logger = Logger([], [batch], DispatchMode.QUEUED, queue_size=100)
+
+        async def run():
+            await logger.log_many(self.LINES)
+            await logger.aclose()
+
+        asyncio.run(run())
+        assert batch.received == self.LINES
+        assert len(batch.batches) < len(self.LINES)
+
+
+class LineServer:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.connections = 0
+        self.port = 0
+        self._server: asyncio.Server | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(
+            self._serve, "127.0.0.1", self.port, reuse_address=True
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def _serve(self, reader, writer) -> None:
+        self.connections += 1
+        self._writers.append(writer)
+        async for line in reader:
+            self.lines.append(line.decode("utf-8").rstrip("\n"))
+        writer.close()
+
+    async def stop(self) -> None:
+        self._server.close()
+        for writer in self._writers:
+            writer.close()
+        await self._server.wait_closed()
+        self._writers.clear()
+
+    async def wait_for(self, count: int, timeout: float = 2.0) -> None:
+        async def poll():
+            while len(self.lines) < count:
+                await asyncio.sleep(0.005)
+
+        await asyncio.wait_for(poll(), timeout)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestSocketHandler:
+    def test_connection_per_line(self):
+        async def run():
+            server = LineServer()
+            port = await server.start()
+            handler = SocketHandler("127.0.0.1", port)
+            for i in range(5):
+                await handler.handle(f"INFO: {i}")
+            await server.wait_for(5)
+            await server.stop()
+            return server
+
+        server = asyncio.run(run())
+        assert sorted(server.lines) == [f"INFO: {i}" for i in range(5)]
+        assert server.connections == 5
+
+    def test_persistent_single_connection(self):
+        async def run():
+            server = LineServer()
+            port = await server.start()
+            async with SocketHandler("127.0.0.1", port, persistent=True) as handler:
+                for i in range(1000):
+                    await handler.handle(f"INFO: {i}")
+            await server.wait_for(1000)
+            await server.stop()
+            return server, handler
+
+        server, handler = asyncio.run(run())
+        assert server.lines == [f"INFO: {i}" for i in range(1000)]
+        assert server.connections == handler.connections == 1
+
+    def test_persistent_unencodable_line(self):
+        async def run():
+            server = LineServer()
+            port = await server.start()
+            async with SocketHandler("127.0.0.1", port, persistent=True) as handler:
+                await handler.handle("INFO bad \ud800")
+                await handler.handle("INFO good")
+                await server.wait_for(2)
+                handler._sender.cancel()
+                await asyncio.sleep(0)
+                await handler.handle("INFO after restart")
+                await server.wait_for(3)
+            await server.stop()
+            return server, handler
+
+        server, handler = asyncio.run(run())
+        assert server.lines == ["INFO bad \\ud800", "INFO good", "INFO after restart"]
+        assert handler.errors == 0
+
+    def test_reconnects_after_server_restart(self, capsys):
+        async def run():
+            server = LineServer()
+            port = await server.start()
+            handler = SocketHandler("127.0.0.1", port, persistent=True)
+            await handler.handle("before")
+            await server.wait_for(1)
+            await server.stop()
+            await asyncio.sleep(0.05)
+            await handler.handle("during")
+            await asyncio.sleep(0.1)
+            await server.start()
+            await handler.handle("after")
+            await server.wait_for(3)
+            await handler.aclose()
+            await server.stop()
+            return server, handler
+
+        server, handler = asyncio.run(run())
+        assert server.lines == ["before", "during", "after"]
+        assert handler.connections == 2
+        assert "SocketHandler error" in capsys.readouterr().err
+
+    @pytest.mark.parametrize(
+        "policy, kept",
+        [
+            (OverflowPolicy.DROP_NEWEST, [f"{i}" for i in range(5)]),
+            (OverflowPolicy.DROP_OLDEST, [f"{i}" for i in range(15, 20)]),
+        ],
+    )
+    def test_drop_policies(self, policy, kept):
+        async def run():
+            server = LineServer()
+            server.port = free_port()
+            handler = SocketHandler(
+                "127.0.0.1", server.port, True, queue_size=5, policy=policy
+            )
+            await handler.handle("first")
+            await asyncio.sleep(0.01)
+            for i in range(20):
+                await handler.handle(f"{i}")
+            await server.start()
+            await server.wait_for(6)
+            await handler.aclose()
+            await server.stop()
+            return server, handler
+
+        server, handler = asyncio.run(run())
+        assert server.lines == ["first"] + kept
+        assert handler.dropped == 15
+
+    def test_block_policy_applies_backpressure(self):
+        async def run():
+            handler = SocketHandler("127.0.0.1", free_port(), True, queue_size=2)
+            await handler.handle("first")
+            await asyncio.sleep(0.01)
+            await handler.handle("1")
+            await handler.handle("2")
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(handler.handle("3"), 0.05)
+            await handler.aclose(timeout=0.01)
+            return handler
+
+        assert asyncio.run(run()).dropped == 0
+
+
+def produce(records, n: int, count: int) -> None:
+    async def run():
+        async with QueueHandler(records, batch_size=64) as handler:
+            for i in range(count):
+                await handler.handle(f"{'ERROR' if i % 3 == 0 else 'INFO'}: {n}:{i}")
+
+    asyncio.run(run())
+
+
+def build_logger(path: str, filters=()) -> Logger:
+    return Logger(list(filters), [FileHandler(path, buffered=True)])
+
+
+class TestAggregator:
+    def run_producers(self, aggregator, producers, count):
+        processes = [
+            multiprocessing.Process(target=produce, args=(aggregator.queue, n, count))
+            for n in range(producers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        aggregator.close(timeout=10)
+
+    def test_single_writer_for_many_producers(self, tmp_path):
+        path = str(tmp_path / "all_logs.txt")
+        aggregator = Aggregator(functools.partial(build_logger, path))
+        aggregator.start()
+        self.run_producers(aggregator, 4, 500)
+        assert aggregator.exitcode == 0
+        messages = read_messages(tmp_path / "all_logs.txt")
+        assert len(messages) == 2000
+        for n in range(4):
+            mine = [m.split(" ", 1)[1] for m in messages if f" {n}:" in m]
+            assert mine == [f"{n}:{i}" for i in range(500)]
+
+    def test_aggregator_runs_filters(self, tmp_path):
+        path = str(tmp_path / "error_logs.txt")
+        build = functools.partial(build_logger, path, [LevelFilter("ERROR")])
+        with Aggregator(build) as aggregator:
+            self.run_producers(aggregator, 2, 30)
+        messages = read_messages(tmp_path / "error_logs.txt")
+        assert sorted(messages) == sorted(
+            f"ERROR: {n}:{i}" for n in range(2) for i in range(0, 30, 3)
+        )
+
+    def test_queue_handler_ships_batches(self):
+        records = multiprocessing.Queue()
+
+        async def run():
+            handler = QueueHandler(records, batch_size=10, flush_interval=0)
+            for i in range(25):
+                await handler.handle(f"INFO: {i}")
+            shipped = [records.get(timeout=5), records.get(timeout=5)]
+            assert records.empty()
+            await handler.aclose()
+            shipped.append(records.get(timeout=5))
+            return shipped
+
+        shipped = asyncio.run(run())
+        assert [len(batch) for batch in shipped] == [10, 10, 5]
+        assert sum(shipped, []) == [f"INFO: {i}" for i in range(25)]
+
+    def test_queue_handler_flushes_in_order(self):
+        class SlowQueue:
+            def __init__(self) -> None:
+                self.batches = []
+                self.delays = [0.05, 0.0, 0.05]
+
+            def put_nowait(self, batch):
+                raise Full
+
+            def put(self, batch):
+                time.sleep(self.delays.pop(0))
+                self.batches.append(batch)
+
+        async def run():
+            queue = SlowQueue()
+            handler = QueueHandler(queue, batch_size=2, flush_interval=0.01)
+            await asyncio.gather(
+                handler.handle_batch(["a", "b"]), handler.handle_batch(["c", "d"])
+            )
+            # the timer is still putting this one when aclose() starts
+            await handler.handle("e")
+            await asyncio.sleep(0.02)
+            await handler.aclose()
+            return list(queue.batches)
+
+        assert asyncio.run(run()) == [["a", "b"], ["c", "d"], ["e"]]
+
+    def test_queue_handler_counts_failed_puts(self, capsys):
+        class ClosedQueue:
+            def put_nowait(self, batch):
+                raise Full
+
+            def put(self, batch):
+                raise ValueError("Queue is closed")
+
+        async def run():
+            handler = QueueHandler(ClosedQueue(), batch_size=10, flush_interval=0)
+            for i in range(25):
+                await handler.handle(f"INFO: {i}")
+            await handler.aclose()
+            return handler
+
+        handler = asyncio.run(run())
+        assert handler.errors == 3
+        assert handler.dropped == 25
+        assert "QueueHandler error: Queue is closed" in capsys.readouterr().err
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestThrottle:
+    def test_rate_limit_per_level(self):
+        clock = FakeClock()
+        limit = RateLimit(2, burst=2, level="error", clock=clock)
+        lines = ["ERROR: down"] * 5 + ["INFO: fine"] * 3
+        assert limit.process(lines) == ["ERROR: down"] * 2 + ["INFO: fine"] * 3
+        assert limit.dropped == 3
+        clock.now = 0.5
+        assert limit.process(["ERROR: down"] * 5) == ["ERROR: down"]
+        clock.now = 10.0
+        assert limit.process(["ERROR: down"] * 5) == ["ERROR: down"] * 2
+
+    def test_rate_limit_per_pattern(self):
+        limit = RateLimit(1, level="ERROR", pattern="db", clock=FakeClock())
+        lines = ["ERROR: db lost", "ERROR: db lost", "ERROR: api", "WARNING: db"]
+        assert limit.process(lines) == ["ERROR: db lost", "ERROR: api", "WARNING: db"]
+
+    def test_sample(self):
+        sample = Sample(0.25, level="DEBUG", seed=7)
+        kept = sample.process(["DEBUG: x"] * 4000 + ["INFO: y"] * 10)
+        assert kept[-10:] == ["INFO: y"] * 10
+        assert 800 < len(kept) - 10 < 1200
+        assert sample.dropped == 4000 - (len(kept) - 10)
+
+    def test_deduplicate_collapses_within_window(self):
+        clock = FakeClock()
+        dedupe = Deduplicate(window=1.0, clock=clock)
+        assert dedupe.process(["ERROR: down"] * 1000 + ["INFO: up"]) == [
+            "ERROR: down",
+            "INFO: up",
+        ]
+        clock.now = 0.5
+        assert dedupe.process(["ERROR: down"]) == []
+        clock.now = 1.5
+        assert dedupe.process(["ERROR: down"]) == [
+            "ERROR: down (repeated 1000 times)",
+            "ERROR: down",
+        ]
+        assert dedupe.collapsed == 1000
+        assert dedupe.flush() == []
+
+    def test_deduplicate_memory_is_bounded(self):
+        clock = FakeClock()
+        dedupe = Deduplicate(window=60.0, max_keys=10, clock=clock)
+        out = []
+        for i in range(1000):
+            out += dedupe.process([f"ERROR: {i}", f"ERROR: {i}"])
+            assert len(dedupe._seen) <= 10
+        out += dedupe.flush()
+        assert [line for line in out if "repeated" not in line] == [
+            f"ERROR: {i}" for i in range(1000)
+        ]
+        assert sorted(line for line in out if "repeated" in line) == sorted(
+            f"ERROR: {i} (repeated 1 times)" for i in range(1000)
+        )
+
+    def test_deduplicate_records(self):
+        dedupe = Deduplicate(clock=FakeClock())
+        dedupe.process([LogRecord("ERROR: down")] * 3)
+        (summary,) = dedupe.flush()
+        assert isinstance(summary, LogRecord)
+        assert summary.text == "ERROR: down (repeated 2 times)"
+
+    @pytest.mark.parametrize("mode", list(DispatchMode))
+    def test_logger_stages(self, mode):
+        handler = BatchHandler()
+        stages = [Deduplicate(window=60.0), RateLimit(1, level="ERROR")]
+
+        async def run():
+            logger = Logger([], [handler], mode, stages=stages)
+            for _ in range(100):
+                await logger.log("ERROR: storm")
+            await logger.log_many(["ERROR: storm"] * 100 + ["INFO: calm"])
+            await logger.aclose()
+
+        asyncio.run(run())
+        # the summary still has to get through the rate limit after dedupe
+        assert handler.received == ["ERROR: storm", "INFO: calm"]
+        assert stages[0].collapsed == 199 and stages[1].dropped == 1
+
+    def test_logger_flushes_summaries_on_close(self):
+        handler = BatchHandler()
+
+        async def run():
+            async with Logger([], [handler], stages=[Deduplicate()]) as logger:
+                await logger.log_many(["ERROR: storm"] * 50)
+
+        asyncio.run(run())
+        assert handler.received == ["ERROR: storm", "ERROR: storm (repeated 49 times)"]
+
+
+class TestMetrics:
+    def test_disabled_by_default(self):
+        logger = Logger([], [PlainHandler()])
+        assert logger.metrics is None
+        assert logger.snapshot() == {}
+
+    def test_filters_and_handlers(self, tmp_path):
+        slow = SlowHandler(delay=0.02, fail_on="ERROR: 2")
+        broken = FileHandler(str(tmp_path / "missing" / "log.txt"))
+        fast = BatchHandler()
+        logger = Logger(
+            [LevelFilter("ERROR"), SimpleLogFilter("2")],
+            [slow, broken, fast],
+            stages=[Deduplicate()],
+            metrics=True,
+        )
+
+        async def run():
+            for line in ["INFO: 2", "ERROR: 1", "ERROR: 2", "ERROR: 12"]:
+                await logger.log(line)
+            await logger.log_many(["ERROR: 22", "ERROR: 22", "INFO: 3"])
+
+        asyncio.run(run())
+        snapshot = logger.snapshot()
+        assert snapshot["records"] == {"received": 7, "accepted": 4}
+        level, pattern = snapshot["filters"]
+        assert (level["name"], level["calls"], level["rejects"]) == (
+            "0:LevelFilter",
+            7,
+            2,
+        )
+        assert (pattern["calls"], pattern["rejects"]) == (5, 1)
+        assert level["seconds"] > 0
+        slow_stats, broken_stats, fast_stats = snapshot["handlers"]
+        assert slow_stats["records"] == 3 and slow_stats["errors"] == 1
+        assert slow_stats["latency"]["count"] == 3
+        assert slow_stats["latency"]["buckets"]["0.01"] == 0
+        assert slow_stats["latency"]["p50"] >= 0.02
+        assert broken_stats["errors"] == 3
+        assert fast_stats["errors"] == 0
+        assert fast_stats["latency"]["buckets"]["+Inf"] == 3
+        assert snapshot["stages"] == [
+            {"name": "0:Deduplicate", "received": 4, "passed": 3}
+        ]
+
+    def test_queue_depth_and_drops(self):
+        handler = SlowHandler(delay=0.01)
+        logger = Logger(
+            [],
+            [handler],
+            DispatchMode.QUEUED,
+            queue_size=5,
+            policy=OverflowPolicy.DROP_NEWEST,
+            metrics=True,
+        )
+
+        async def run():
+            for i in range(20):
+                await logger.log(f"INFO: {i}")
+            depth = logger.snapshot()["handlers"][0]["queue_depth"]
+            await logger.aclose()
+            return depth
+
+        assert asyncio.run(run()) == 5
+        (stats,) = logger.snapshot()["handlers"]
+        assert stats["max_queue_depth"] == 5
+        assert stats["dropped"] == 20 - len(handler.received)
+        assert stats["queue_depth"] == 0
+
+    def test_prometheus(self):
+        logger = Logger([LevelFilter("INFO")], [BatchHandler()], metrics=True)
+        asyncio.run(logger.log_many(["INFO: a", "DEBUG: b"]))
+        text = to_prometheus(logger.snapshot(), prefix="lab3")
+        sample = re.compile(r'^lab3_[a-z_]+\{([a-z_]+="[^"]*",?)+\} [0-9.e+-]+$')
+        for line in text.splitlines():
+            assert line.startswith("# TYPE lab3_") or sample.match(line), line
+        assert 'lab3_records_total{stage="accepted"} 1' in text
+        assert (
+            'lab3_handler_latency_seconds_bucket{handler="0:BatchHandler",le="+Inf"} 1'
+            in text
+        )
+        assert 'lab3_filter_rejects_total{filter="0:LevelFilter"} 1' in text
+
+
+def write_log(path, start: int, count: int) -> list[str]:
+    levels = ["INFO", "ERROR", "WARNING", "DEBUG"]
+    lines = [
+        LogRecord(
+            f"{levels[i % 4]}: request {i} {'timeout' if i % 7 == 0 else 'ok'}",
+            created=1_700_000_000 + i // 10,
+        ).line
+        for i in range(start, start + count)
+    ]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+    return [line.rstrip("\n") for line in lines]
+
+
+class TestLogIndex:
+    def brute(self, lines, since=None, until=None, level=None, contains=None):
+        low = stamp_key(since) if since else None
+        high = stamp_key(until) if until else None
+        out = []
+        for line in lines:
+            key = stamp_key(line[1:20])
+            text = line[22:]
+            if (low and key < low) or (high and key >= high):
+                continue
+            if level and not text.startswith(level.upper()):
+                continue
+            if contains and contains not in line:
+                continue
+            out.append(line)
+        return out
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            {},
+            {"level": "ERROR"},
+            {"level": "warn"},
+            {"contains": "timeout"},
+            {"contains": "request 1234 "},
+            {"level": "INFO", "contains": "timeout"},
+        ],
+    )
+    def test_queries_match_a_full_scan(self, tmp_path, query):
+        path = str(tmp_path / "all_logs.txt")
+        lines = write_log(path, 0, 5000)
+        index = LogIndex.open(path, block_bytes=4096)
+        assert len(index.block_offsets) > 10
+        stamps = [line[1:20] for line in lines]
+        since, until = stamps[1200], stamps[3700]
+        for bounds in (
+            {},
+            {"since": since},
+            {"until": until},
+            {"since": since, "until": until},
+        ):
+            assert list(index.query(**bounds, **query)) == self.brute(
+                lines, **bounds, **query
+            )
+
+    def test_time_range_only_reads_matching_blocks(self, tmp_path):
+        path = str(tmp_path / "all_logs.txt")
+        lines = write_log(path, 0, 5000)
+        index = LogIndex.open(path, block_bytes=4096)
+        since, until = lines[2000][1:20], lines[2100][1:20]
+        (span,) = index._spans(stamp_key(since), stamp_key(until))
+        assert span[1] - span[0] < 3 * 4096 + 200
+        assert index.count(since=since, until=until) == 100
+
+    def test_incremental_update(self, tmp_path):
+        path = str(tmp_path / "all_logs.txt")
+        lines = write_log(path, 0, 1000)
+        index = LogIndex.open(path, block_bytes=4096)
+        assert index.lines == 1000
+        lines += write_log(path, 1000, 500)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("[2023-11-14 22:13:20] ERROR: half writ")
+        assert index.update() == 500
+        assert index.count(level="ERROR") == len(self.brute(lines, level="ERROR"))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("ten\n")
+        assert index.update() == 1
+        assert list(index.query(contains="half written")) == [
+            "[2023-11-14 22:13:20] ERROR: half written"
+        ]
+
+        reopened = LogIndex(path)
+        assert reopened.load()
+        assert reopened.update() == 0
+        assert reopened.lines == 1501
+        assert list(reopened.query()) == list(index.query())
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: pickle.dumps([1, 2, 3]),
+            lambda data: b"",
+            lambda data: data[:-5],
+            lambda data: data + b"\0",
+            lambda data: b"error".join(data.rsplit(b"ERROR", 1)),
+            lambda data: data[:-8] + (1 << 40).to_bytes(8, "little"),
+        ],
+    )
+    def test_malformed_sidecar_is_rebuilt(self, tmp_path, corrupt):
+        path = str(tmp_path / "all_logs.txt")
+        lines = write_log(path, 0, 1000)
+        LogIndex.open(path)
+        with open(f"{path}.idx", "rb") as f:
+            data = f.read()
+        with open(f"{path}.idx", "wb") as f:
+            f.write(corrupt(data))
+        assert not LogIndex(path).load()
+        index = LogIndex.open(path)
+        assert index.lines == 1000
+        assert list(index.query()) == lines
+        assert LogIndex(path).load()
+
+    def test_rotated_file_is_reindexed(self, tmp_path):
+        path = str(tmp_path / "all_logs.txt")
+        write_log(path, 0, 1000)
+        index = LogIndex.open(path)
+        os.replace(path, f"{path}.1")
+        lines = write_log(path, 5000, 10)
+        assert index.update() == 10
+        assert list(index.query()) == lines
+
+    def test_cli(self, tmp_path, capsys):
+        path = str(tmp_path / "all_logs.txt")
+        lines = write_log(path, 0, 200)
+        since = lines[50][1:20]
+        assert logindex.main([path, "--since", since, "--level", "error"]) == 0
+        out = capsys.readouterr().out.splitlines()
+        assert out == self.brute(lines, since=since, level="ERROR")
+        assert logindex.main([path, "--grep", "timeout", "--count"]) == 0
+        assert (
+            capsys.readouterr().out == f"{len(self.brute(lines, contains='timeout'))}\n"
+        )
+        assert logindex.main([str(tmp_path / "missing.txt")]) == 1
+        assert "logindex error" in capsys.readouterr().err
+
+
+SYSLOG = re.compile(r"^<(\d+)>1 (\S+) (\S+) lab3 (\d+) - - (.*)$", re.DOTALL)
+
+
+class DatagramServer(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.datagrams: list[bytes] = []
+        self.transport = None
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.datagrams.append(data)
+
+    async def start(self, address, family=0):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=address, family=family
+        )
+        return self.transport.get_extra_info("sockname")
+
+    async def wait_for(self, count: int, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while len(self.datagrams) < count and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    def messages(self) -> list[tuple[int, str, str]]:
+        parsed = [SYSLOG.match(data.decode()) for data in self.datagrams]
+        return [(int(m[1]), m[2], m[5]) for m in parsed]
+
+
+class TestSyslogHandler:
+    def test_stderr_fallback(self, capsys):
+        async def run():
+            handler = SyslogHandler()
+            await handler.handle("INFO: one")
+            await handler.handle_batch(["INFO: two"])
+
+        asyncio.run(run())
+        assert capsys.readouterr().err == "SYSLOG: INFO: one\nSYSLOG: INFO: two\n"
+
+    def test_udp(self):
+        server = DatagramServer()
+
+        async def run():
+            address = await server.start(("127.0.0.1", 0))
+            async with SyslogHandler(address, facility=16) as handler:
+                await handler.handle("ERROR: disk full")
+                await handler.handle_batch([f"INFO: {i}" for i in range(100)])
+                await handler.handle("odd line")
+            await server.wait_for(102)
+            server.transport.close()
+            return handler
+
+        handler = asyncio.run(run())
+        messages = server.messages()
+        assert messages[0][0] == 16 * 8 + 3 and messages[0][2] == "ERROR: disk full"
+        assert [m[2] for m in messages[1:101]] == [f"INFO: {i}" for i in range(100)]
+        assert {m[0] for m in messages[1:101]} == {16 * 8 + 6}
+        assert messages[101][0] == 16 * 8 + 5
+        assert handler.sent == 102 and handler.dropped == 0
+
+    def test_unix_datagram_and_records(self, tmp_path):
+        server = DatagramServer()
+        path = str(tmp_path / "log.sock")
+        record = LogRecord("WARNING: slow — 5 s", created=1_700_000_000.5)
+
+        async def run():
+            await server.start(path, socket.AF_UNIX)
+            async with SyslogHandler(path) as handler:
+                await handler.handle(record)
+            await server.wait_for(1)
+            server.transport.close()
+
+        asyncio.run(run())
+        ((pri, stamp, text),) = server.messages()
+        assert (pri, text) == (8 + 4, "WARNING: slow — 5 s")
+        assert datetime.fromisoformat(stamp).timestamp() == 1_700_000_000
+
+    @pytest.mark.parametrize(
+        "policy", [OverflowPolicy.DROP_NEWEST, OverflowPolicy.DROP_OLDEST]
+    )
+    def test_drops_under_pressure(self, tmp_path, policy):
+        # a stand-in that never reads fills up and pushes back on the sender
+        path = str(tmp_path / "stuck.sock")
+        stuck = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stuck.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stuck.bind(path)
+
+        async def run():
+            handler = SyslogHandler(path, queue_size=100, policy=policy, timeout=0.2)
+            start = time.perf_counter()
+            for i in range(20_000):
+                await handler.handle(f"INFO: {i} " + "x" * 200)
+            elapsed = time.perf_counter() - start
+            await handler.aclose(timeout=0.5)
+            return handler, elapsed
+
+        try:
+            handler, elapsed = asyncio.run(run())
+        finally:
+            stuck.close()
+        assert elapsed < 5
+        assert handler.dropped > 0
+        assert handler.sent + handler.dropped <= 20_000
+
+    def test_unencodable_lines_do_not_stop_the_sender(self):
+        server = DatagramServer()
+
+        async def run():
+            address = await server.start(("127.0.0.1", 0))
+            async with SyslogHandler(address) as handler:
+                await handler.handle("INFO bad \ud800")
+                await handler.handle("INFO good")
+                await asyncio.sleep(0.01)
+                handler._sender.cancel()
+                await asyncio.sleep(0)
+                await handler.handle("INFO after restart")
+            await server.wait_for(3)
+            server.transport.close()
+            return handler
+
+        handler = asyncio.run(run())
+        assert [m[2] for m in server.messages()] == [
+            "INFO bad \\ud800",
+            "INFO good",
+            "INFO after restart",
+        ]
+        assert handler.sent == 3 and handler.errors == 0
+
+    @pytest.mark.parametrize("pad", ["", "x"])
+    def test_frame_truncates_on_character_boundary(self, pad):
+        handler = SyslogHandler(("127.0.0.1", 514))
+        data = handler.frame(f"INFO {pad}" + "é" * MAX_DATAGRAM)
+        assert MAX_DATAGRAM - 1 <= len(data) <= MAX_DATAGRAM
+        assert data.decode("utf-8").endswith("é")
+
+    def test_connection_errors_are_reported(self, tmp_path, capsys):
+        async def run():
+            handler = SyslogHandler(str(tmp_path / "missing.sock"))
+            await handler.handle("ERROR: nobody listens")
+            await handler.aclose()
+            return handler
+
+        handler = asyncio.run(run())
+        assert handler.dropped == 1 and handler.errors == 1
+        assert "SyslogHandler error" in capsys.readouterr().err
@@ -0,0 +1,140 @@
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+from lab3 import LogRecord, LogStageProtocol, text_of
+
+DEDUPE_KEYS = 1024
+
+
+class Rule:
+    def __init__(self, level: str | None = None, pattern: str | None = None) -> None:
+        self.level = level.upper() if level else None
+        self.pattern = pattern
+        self.dropped = 0
+
+    def applies(self, text: str) -> bool:
+        if self.level is not None and not text.startswith(self.level):
+            return False
+        return self.pattern is None or self.pattern in text
+
+
+class RateLimit(Rule, LogStageProtocol):
+    def __init__(
+        self,
+        rate: float,
+        burst: int | None = None,
+        level: str | None = None,
+        pattern: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(level, pattern)
+        self.rate = rate
+        self.burst = burst if burst is not None else max(int(rate), 1)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def _take(self) -> bool:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def process(self, texts: List[str | LogRecord]) -> List[str | LogRecord]:
+        kept = []
+        for text in texts:
+            if not self.applies(text_of(text)) or self._take():
+                kept.append(text)
+            else:
+                self.dropped += 1
+        return kept
+
+    def flush(self) -> List[str | LogRecord]:
+        return []
+
+
+class Sample(Rule, LogStageProtocol):
+    def __init__(
+        self,
+        rate: float,
+        level: str | None = None,
+        pattern: str | None = None,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__(level, pattern)
+        self.rate = rate
+        self._random = random.Random(seed).random
+
+    def process(self, texts: List[str | LogRecord]) -> List[str | LogRecord]:
+        kept = []
+        for text in texts:
+            if not self.applies(text_of(text)) or self._random() < self.rate:
+                kept.append(text)
+            else:
+                self.dropped += 1
+        return kept
+
+    def flush(self) -> List[str | LogRecord]:
+        return []
+
+
+class Deduplicate(LogStageProtocol):
+    def __init__(
+        self,
+        window: float = 1.0,
+        max_keys: int = DEDUPE_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self.collapsed = 0
+        # text -> [first seen, copies suppressed since, first copy], oldest first
+        self._seen: OrderedDict[str, list] = OrderedDict()
+
+    def _summary(self, entry: list) -> str | LogRecord:
+        _, count, first = entry
+        text = f"{text_of(first)} (repeated {count} times)"
+        return LogRecord(text) if isinstance(first, LogRecord) else text
+
+    def _expire(self, now: float, out: List[str | LogRecord]) -> None:
+        seen = self._seen
+        while seen:
+            entry = next(iter(seen.values()))
+            if now - entry[0] < self.window and len(seen) <= self.max_keys:
+                break
+            seen.popitem(last=False)
+            if entry[1]:
+                out.append(self._summary(entry))
+
+    def process(self, texts: List[str | LogRecord]) -> List[str | LogRecord]:
+        out: List[str | LogRecord] = []
+        now = self.clock()
+        self._expire(now, out)
+        seen = self._seen
+        for text in texts:
+            key = text_of(text)
+            entry = seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self.collapsed += 1
+                continue
+            if entry is not None:
+                del seen[key]
+                if entry[1]:
+                    out.append(self._summary(entry))
+            seen[key] = [now, 0, text]
+            out.append(text)
+            if len(seen) > self.max_keys:
+                self._expire(now, out)
+        return out
+
+    def flush(self) -> List[str | LogRecord]:
+        out = [self._summary(entry) for entry in self._seen.values() if entry[1]]
+        self._seen.clear()
+        return out